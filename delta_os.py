@@ -10,11 +10,38 @@
 """
 
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from streamlit.runtime.scriptrunner.script_run_context import SCRIPT_RUN_CONTEXT_ATTR_NAME
 import os
-from datetime import datetime
+import sys
+import argparse
+import gzip
+import pickle
+import uuid
+from datetime import datetime, timedelta
 import json
 import hashlib
-from typing import Dict, List, Optional, Any
+import zlib
+import base64
+import re
+import math
+import heapq
+import bisect
+import unicodedata
+import threading
+import time
+import random
+import asyncio
+import inspect
+import itertools
+import atexit
+import sqlite3
+import shutil
+import tempfile
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional, Any, Callable, Tuple, Set, Iterable, Iterator, AsyncIterator
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import numpy as np
 import subprocess
 import platform
 import smtplib
@@ -22,6 +49,25 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import imaplib
 import email
+import email.errors
+import email.policy
+import email.utils
+
+try:
+    import orjson  # Sérialisation JSON rapide (optionnelle, repli sur json)
+except ImportError:
+    orjson = None
+
+try:
+    import fcntl  # Verrou des fichiers de l'index vectoriel (POSIX)
+except ImportError:
+    fcntl = None
+
+try:
+    import pyarrow as pa  # Export / import en colonnes (optionnel, repli sur NDJSON)
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # SECTION 1 : CONFIGURATION GLOBALE
@@ -31,252 +77,4831 @@ MASTER_CODE = "B2008a2020@"
 AUTHORIZED_IP = "82.64.93.65"
 LOCATION = "Annecy, Rhône-Alpes, FR"
 
+# Tampon d'écriture différée (write-behind) des insertions Supabase
+WRITE_BUFFER_MAX_ROWS = 50        # Nombre de lignes déclenchant un envoi groupé
+WRITE_BUFFER_MAX_AGE = 2.0        # Âge maximal (secondes) d'une ligne en attente
+WRITE_BUFFER_CAPACITY = 2000      # Lignes en attente avant back-pressure
+WRITE_BUFFER_PUT_TIMEOUT = 5.0    # Attente maximale (secondes) quand le tampon est plein
+
+# Valeurs connues des colonnes de regroupement (comptages sans fonction SQL)
+SEMANTIC_CATEGORIES = ["Personnel", "Projet", "Contact", "Préférence"]
+INTERACTION_TYPES = ["conversation", "email_sent", "inbox_read", "command_executed"]
+
+# Pagination par clé (keyset) des lectures longues
+PAGE_SIZE = 100                   # Lignes par page pour les parcours complets
+TIMELINE_PAGE_SIZE = 50           # Lignes par page de la timeline épisodique
+
+# Colonnes demandées par chaque vue (projection côté serveur)
+SEMANTIC_COLUMNS = "id,category,key,value,created_at"
+HISTORY_COLUMNS = "id,timestamp,interaction_type,content"
+HABIT_COLUMNS = "id,action,frequency,context,last_executed"
+
+# Lecture concurrente des trois mémoires (page Mémoire)
+MEMORY_FETCH_WORKERS = 8          # Threads partagés par toutes les sessions
+MEMORY_FETCH_TIMEOUT = 5.0        # Délai maximal (secondes) par requête
+
+UNKNOWN_COMMAND_RESPONSE = ("Je n'ai pas compris votre commande, Monsieur Sezer. "
+                            "Essayez : 'quelle heure est-il ?', 'où suis-je ?' ou 'info système'.")
+
+# Questions sur les faits mémorisés ("quel est mon email principal ?")
+FACT_QUESTION_PATTERN = re.compile(
+    r"^(?:quel|quelle|quels|quelles)(?:\s+est|\s+sont|\s+c'est)?\s+(?:mon|ma|mes)\s+(.+?)\s*\??$"
+)
+
+# Recherche plein texte (index inversé BM25 des faits et interactions)
+SEARCH_RESULTS_LIMIT = 20         # Résultats renvoyés par défaut
+SEARCH_INDEX_PAGE_SIZE = 1000     # Lignes par page lors de la construction de l'index
+SEARCH_PREFIX_EXPANSIONS = 50     # Termes maximum pour une recherche par préfixe (mot*)
+SEARCH_SYNC_INTERVAL = 30.0       # Intervalle (secondes) entre deux mises à jour depuis la base
+BM25_K1 = 1.2                     # Saturation de la fréquence d'un terme
+BM25_B = 0.75                     # Normalisation par la longueur du document
+SEARCH_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+SEARCH_STOPWORDS = {
+    "a", "au", "aux", "c", "ce", "ces", "d", "dans", "de", "des", "du", "elle", "en", "est",
+    "et", "il", "j", "je", "l", "la", "le", "les", "m", "ma", "mais", "me", "mes", "mon",
+    "n", "ne", "nous", "on", "ou", "par", "pas", "pour", "qu", "que", "qui", "s", "sa",
+    "se", "ses", "son", "sur", "t", "ta", "te", "tes", "ton", "tu", "un", "une", "vous", "y"
+}
+SEARCH_COMMAND_PATTERN = re.compile(r"^(?:cherche|recherche)\s+(.+)$")
+
+# Métadonnées des interactions (jsonb côté Supabase, JSON texte côté SQLite)
+JSON_COLUMNS = {"metadata"}       # Colonnes JSON décodées à la lecture (SQLite)
+METADATA_FILTER_PATTERN = re.compile(r"^([A-Za-z_][A-Za-z0-9_]*)\s*(!=|>=|<=|>|<|=)\s*(.+)$")
+METADATA_FILTER_OPERATORS = {"=": "eq", "!=": "neq", ">": "gt", ">=": "gte", "<": "lt", "<=": "lte"}
+FAILED_COMMANDS_PATTERN = re.compile(r"commandes?\s+(?:qui\s+ont\s+)?(?:échou|echou|ratée|en\s+erreur)")
+
+# Contenus volumineux des métadonnées stockés une seule fois (adressés par empreinte SHA-256)
+BLOB_MIN_BYTES = 96               # Taille minimale (caractères) d'une valeur externalisée
+BLOB_CACHE_MAX_ENTRIES = 2048     # Empreintes connues (et leurs contenus) gardées en mémoire
+BLOB_RESOLVE_BATCH = 100          # Empreintes résolues par requête
+INSERT_IGNORE_CONFLICTS = {"memory_blobs": ["digest"]}  # Insertions sans effet si la clé existe déjà
+
+# Rappel par similarité (vecteurs n-grammes hachés, calculés localement)
+VECTOR_DIM = 128                  # Dimension des vecteurs (float32)
+VECTOR_CHUNK_ROWS = 65536         # Lignes ajoutées à la matrice quand elle est pleine
+VECTOR_STORE_PATH = "delta_vectors"  # Préfixe des fichiers (.f32 et .jsonl)
+VECTOR_SOURCES = {"semantic": 1, "episodic": 2}
+VECTOR_SYNC_INTERVAL = 30.0       # Intervalle (secondes) entre deux rattrapages depuis la base
+RECALL_RESULTS_LIMIT = 5          # Résultats renvoyés par défaut
+RECALL_MIN_SCORE = 0.6            # Similarité minimale pour répondre par un souvenir
+
+# Rétention de l'historique : brut récent, puis résumés par jour et archives compressées
+RETENTION_ENABLED = False         # Compactage désactivé sauf RETENTION_ENABLED=true (secrets ou environnement)
+RETENTION_HOT_DAYS = 30           # Jours d'historique conservés en entier
+RETENTION_INTERVAL = 3600.0       # Intervalle (secondes) entre deux passes de compactage
+RETENTION_STARTUP_DELAY = 60.0    # Délai (secondes) avant la première passe
+RETENTION_MAX_DAYS_PER_RUN = 7    # Jours compactés au maximum par passe
+RETENTION_PAGE_ROWS = 1000        # Lignes lues par requête pendant le compactage
+RETENTION_SUMMARY_SAMPLES = 3     # Extraits conservés dans chaque résumé
+
+# Détection des routines à partir de l'historique (mémoire procédurale)
+HABIT_MINING_INTERVAL = 900.0     # Intervalle (secondes) entre deux analyses
+HABIT_MINING_STARTUP_DELAY = 30.0  # Délai (secondes) avant la première analyse
+HABIT_PAGE_ROWS = 5000            # Lignes lues par requête
+HABIT_MIN_EVENTS = 5              # Occurrences minimales pour parler de routine
+HABIT_MIN_GAP = 300               # Intervalle minimal (secondes) entre deux occurrences distinctes
+HABIT_MAX_PERIOD_CV = 0.5         # Variabilité maximale des intervalles (écart-type / moyenne)
+HABIT_WEEKDAY_SHARE = 0.5         # Part minimale d'un jour pour une routine hebdomadaire
+HABIT_ACTION_LABELS = {
+    "conversation": "Conversation avec DELTA",
+    "inbox_read": "Lecture de la boîte mail"
+}
+HABIT_FREE_TEXT_TYPES = ("command_executed", "email_sent")  # Actions tirées du contenu (sinon du type seul)
+HABIT_CONTEXT_PREFIX = "🤖 Routine détectée"  # Marque des routines écrites par l'analyse (les autres sont à l'utilisateur)
+WEEKDAYS_FR = ["lundi", "mardi", "mercredi", "jeudi", "vendredi", "samedi", "dimanche"]
+
+# Cache des perceptions : faits statiques lus une fois par processus, les autres avec durée de vie
+PERCEPTION_TTL = 300.0            # Durée de vie (secondes) des faits qui changent lentement
+INTENT_MEMO_TTL = 300.0           # Durée de vie (secondes) des réponses déterministes mémorisées
+
+# Métriques système (Linux : /proc) échantillonnées en arrière-plan pour la barre latérale
+METRICS_SAMPLE_INTERVAL = 2.0     # Intervalle (secondes) entre deux mesures
+METRICS_HISTORY = 300             # Mesures conservées dans le tampon circulaire (10 minutes)
+METRICS_FIELDS = ("cpu", "memory", "memory_used", "load1", "load5", "load15")  # %, %, Go, charges moyennes
+
+# Envoi des emails : connexions SMTP authentifiées conservées et réutilisées
+SMTP_POOL_SIZE = 3                # Connexions simultanées maximales par compte
+SMTP_TIMEOUT = 30.0               # Délai maximal (secondes) d'une opération SMTP
+SMTP_KEEPALIVE_INTERVAL = 60.0    # Inactivité (secondes) après laquelle une connexion est vérifiée (NOOP)
+SMTP_MAX_IDLE = 600.0             # Inactivité (secondes) après laquelle une connexion est fermée
+SMTP_BULK_CHUNK = 20              # Messages par connexion avant d'en ouvrir une autre (send_bulk)
+INBOX_HEADER_FIELDS = "FROM SUBJECT DATE"  # Seuls en-têtes téléchargés pour la liste des emails
+
+# Mémoire de travail (contexte de session) bornée
+WORK_MEMORY_MAX_BYTES = 1_000_000    # Budget mémoire par session (octets, éviction LRU)
+WORK_MEMORY_DEFAULT_TTL = 3600.0     # Durée de vie (secondes) par défaut d'une entrée
+WORK_MEMORY_SPILL = True             # Conserver sur disque les entrées évincées
+WORK_MEMORY_SPILL_PATH = "delta_spill.db"
+WORK_MEMORY_PURGE_INTERVAL = 60.0    # Intervalle (secondes) entre deux purges du disque
+CONVERSATION_HISTORY_MAX_MESSAGES = 200  # Messages conservés à l'écran (l'historique complet est en base)
+RESPONSE_TIMINGS_MAX = 200               # Mesures de latence conservées par session (premier fragment, totale)
+
+# Export / import des mémoires (python -m delta_os export|import)
+MEMORY_TABLES = {                 # Table -> clé unique (parcours par clé, upsert à l'import)
+    "semantic_memory": "id",
+    "episodic_memory": "id",
+    "procedural_memory": "id",
+    "episodic_summary": "id",
+    "episodic_archive": "id",
+    "habit_profiles": "action",
+    "memory_watermarks": "job",
+    "memory_blobs": "digest"
+}
+EXPORT_FORMATS = {"parquet": ".parquet", "arrow": ".arrow", "ndjson": ".ndjson.gz"}
+EXPORT_PAGE_ROWS = 1000           # Lignes lues par requête
+EXPORT_BATCH_ROWS = 50_000        # Lignes par groupe écrit (mémoire bornée)
+IMPORT_BATCH_ROWS = 1000          # Lignes par upsert groupé
+EXPORT_MANIFEST = "manifest.json"
+
+# Moteur de stockage des mémoires : "supabase" (distant) ou "sqlite" (local, hors ligne)
+STORAGE_BACKEND = "supabase"
+SQLITE_PATH = "delta_memory.db"
+
+# Client Supabase partagé par toutes les sessions du processus
+SUPABASE_POOL_SIZE = 20                # Connexions HTTP maximales du pool
+SUPABASE_HEALTH_CHECK_INTERVAL = 30.0  # Intervalle (secondes) entre deux vérifications
+SUPABASE_READ_TIMEOUT = 5.0            # Délai maximal (secondes) d'une lecture
+SUPABASE_WRITE_TIMEOUT = 10.0          # Délai maximal (secondes) d'une écriture
+SUPABASE_RETRY_ATTEMPTS = 3            # Tentatives pour les lectures (idempotentes)
+SUPABASE_RETRY_BASE_DELAY = 0.2        # Délai initial (secondes) entre deux tentatives
+SUPABASE_RETRY_MAX_DELAY = 2.0         # Délai maximal (secondes) entre deux tentatives
+
+# Disjoncteur : mode dégradé (cache, écritures en attente) quand Supabase ne répond plus
+BREAKER_FAILURE_THRESHOLD = 5          # Échecs consécutifs avant ouverture
+BREAKER_RESET_TIMEOUT = 30.0           # Durée (secondes) avant un appel d'essai
+
+# Cache des lectures Supabase (partagé par toutes les sessions du processus)
+QUERY_CACHE_MAX_ENTRIES = 256     # Nombre de résultats conservés (éviction LRU)
+QUERY_CACHE_DEFAULT_TTL = 60.0    # Durée de vie (secondes) par défaut
+QUERY_CACHE_TTL = {               # Durée de vie (secondes) par table
+    "semantic_memory": 300.0,
+    "procedural_memory": 300.0,
+    "episodic_memory": 30.0
+}
+
 # ═══════════════════════════════════════════════════════════════════════════════
-# SECTION 2 : GESTION DE SUPABASE
+# SECTION 2 : STOCKAGE DES MÉMOIRES (SUPABASE / SQLITE)
 # ═══════════════════════════════════════════════════════════════════════════════
 
-class SupabaseManager:
-    """Gestionnaire de connexion et opérations Supabase"""
+class UISink:
+    """
+    Destination des messages d'état des modules (succès, erreurs, avertissements)
     
-    def __init__(self):
-        """Initialisation de la connexion Supabase"""
-        try:
-            from supabase import create_client, Client
-            self.supabase_url = st.secrets.get("SUPABASE_URL", "")
-            self.supabase_key = st.secrets.get("SUPABASE_KEY", "")
-            self.client: Optional[Client] = None
-            
-            if self.supabase_url and self.supabase_key:
-                try:
-                    self.client = create_client(self.supabase_url, self.supabase_key)
-                    st.success("✅ Connexion Supabase établie")
-                except Exception as e:
-                    st.error(f"❌ Erreur connexion Supabase: {e}")
-            else:
-                st.warning("⚠️ Clés Supabase non configurées")
-        except ImportError:
-            st.error("❌ Module 'supabase' non installé. Installez-le avec: pip install supabase")
-            self.client = None
+    Par défaut les messages sont affichés par Streamlit ; le mode batch installe
+    un ConsoleSink avec set_ui_sink pour utiliser DELTA hors de l'interface.
+    """
     
-    def is_connected(self) -> bool:
-        """Vérifie si la connexion est établie"""
-        return self.client is not None
+    def success(self, message: str) -> None:
+        """Message de réussite"""
+        st.success(message)
     
-    def insert(self, table: str, data: Dict) -> bool:
-        """Insère un enregistrement dans une table"""
-        if not self.is_connected():
-            st.error("❌ Pas de connexion Supabase")
-            return False
-        
-        try:
-            self.client.table(table).insert(data).execute()
-            return True
-        except Exception as e:
-            st.error(f"❌ Erreur insertion dans {table}: {e}")
-            return False
+    def error(self, message: str) -> None:
+        """Message d'erreur"""
+        st.error(message)
     
-    def select(self, table: str, filters: Optional[Dict] = None, limit: int = 100) -> List[Dict]:
-        """Sélectionne des enregistrements d'une table"""
-        if not self.is_connected():
-            return []
+    def warning(self, message: str) -> None:
+        """Avertissement"""
+        st.warning(message)
+    
+    def info(self, message: str) -> None:
+        """Information"""
+        st.info(message)
+
+
+class ConsoleSink(UISink):
+    """Messages d'état écrits sur la sortie d'erreur et comptés par niveau (ligne de commande)"""
+    
+    def __init__(self, stream: Any = None, levels: Tuple[str, ...] = ("error", "warning")):
+        """
+        Initialisation de la destination console
         
+        Args:
+            stream: Flux de sortie (sys.stderr si None)
+            levels: Niveaux affichés (les autres sont seulement comptés)
+        """
+        self.stream = stream
+        self.levels = set(levels)
+        self.counts = {"success": 0, "error": 0, "warning": 0, "info": 0}
+        self._lock = threading.Lock()
+    
+    def _emit(self, level: str, message: str) -> None:
+        """Compte le message et l'écrit si son niveau est affiché"""
+        with self._lock:
+            self.counts[level] += 1
+            if level in self.levels:
+                print(message, file=self.stream or sys.stderr, flush=True)
+    
+    def success(self, message: str) -> None:
+        """Message de réussite"""
+        self._emit("success", message)
+    
+    def error(self, message: str) -> None:
+        """Message d'erreur"""
+        self._emit("error", message)
+    
+    def warning(self, message: str) -> None:
+        """Avertissement"""
+        self._emit("warning", message)
+    
+    def info(self, message: str) -> None:
+        """Information"""
+        self._emit("info", message)
+
+
+UI_SINK: UISink = UISink()
+
+
+def set_ui_sink(sink: UISink) -> UISink:
+    """
+    Remplace la destination des messages d'état des modules
+    
+    Args:
+        sink: Nouvelle destination
+    
+    Returns:
+        Destination précédente (pour la rétablir)
+    """
+    global UI_SINK
+    previous, UI_SINK = UI_SINK, sink
+    return previous
+
+
+def get_secret(key: str, default: Any = None) -> Any:
+    """
+    Lit un paramètre de configuration : secrets Streamlit, sinon variable d'environnement
+    
+    Args:
+        key: Nom du secret (SUPABASE_URL, STORAGE_BACKEND...)
+        default: Valeur si le secret n'est défini nulle part
+    
+    Returns:
+        Valeur du secret
+    """
+    # Sans fichier secrets.toml (ligne de commande), st.secrets afficherait une erreur
+    if st.secrets.load_if_toml_exists() and key in st.secrets:
+        return st.secrets[key]
+    return os.environ.get(key, default)
+
+
+def json_dumps(value: Any) -> str:
+    """
+    Sérialise une valeur en JSON compact (orjson si disponible)
+    
+    Args:
+        value: Valeur à sérialiser (les types inconnus sont convertis en texte)
+    
+    Returns:
+        Texte JSON
+    """
+    if orjson is not None:
+        return orjson.dumps(value, default=str).decode("utf-8")
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def json_loads(text: Any) -> Any:
+    """
+    Désérialise un texte JSON (orjson si disponible)
+    
+    Args:
+        text: Texte (ou octets) JSON
+    
+    Returns:
+        Valeur décodée
+    
+    Raises:
+        ValueError: si le texte n'est pas du JSON valide
+    """
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def parse_metadata_filter(expression: str) -> List[Tuple[str, str, Any]]:
+    """
+    Traduit une expression de filtre sur les métadonnées en conditions
+    
+    Args:
+        expression: Conditions séparées par des virgules ("success=false, return_code!=0") ;
+                    les valeurs sont des littéraux JSON, ou du texte brut sinon
+    
+    Returns:
+        Liste de tuples (clé, opérateur MemoryQuery, valeur)
+    
+    Raises:
+        ValueError: si une condition est mal formée
+    """
+    conditions = []
+    for part in expression.split(","):
+        if not part.strip():
+            continue
+        match = METADATA_FILTER_PATTERN.match(part.strip())
+        if not match:
+            raise ValueError(f"Filtre de métadonnées invalide : {part.strip()}")
+        key, symbol, raw = match.groups()
         try:
-            query = self.client.table(table).select("*")
-            
-            if filters:
-                for key, value in filters.items():
-                    query = query.eq(key, value)
-            
-            response = query.limit(limit).execute()
-            return response.data if response.data else []
-        except Exception as e:
-            st.error(f"❌ Erreur lecture {table}: {e}")
-            return []
+            value = json_loads(raw)
+        except ValueError:
+            value = raw
+        conditions.append((key, METADATA_FILTER_OPERATORS[symbol], value))
+    return conditions
 
-# ═══════════════════════════════════════════════════════════════════════════════
-# SECTION 3 : SYSTÈME DE SÉCURITÉ
-# ═══════════════════════════════════════════════════════════════════════════════
 
-class SecurityLayer:
-    """Couche de sécurité pour toutes les actions sensibles"""
+class MemoryQuery:
+    """Requête de lecture construite par chaînage et exécutée par le moteur de stockage"""
     
-    @staticmethod
-    def verify_code(input_code: str) -> bool:
-        """Vérifie le code maître"""
-        return input_code == MASTER_CODE
+    OPERATORS = ("eq", "neq", "gt", "gte", "lt", "lte", "in", "like", "ilike")
     
-    @staticmethod
-    def request_auth(action_name: str, key_suffix: str = "") -> bool:
+    def __init__(self, backend: "StorageBackend", table: str):
         """
-        Demande une autorisation pour une action sensible
+        Initialisation d'une requête vide (toutes colonnes, 100 lignes)
         
         Args:
-            action_name: Nom de l'action (ex: "envoi email")
-            key_suffix: Suffixe unique pour le widget (évite les doublons)
+            backend: Moteur qui exécutera la requête
+            table: Table interrogée
+        """
+        self.backend = backend
+        self.table = table
+        self.columns = "*"
+        self.conditions: List[Tuple[str, str, Any]] = []
+        self.ordering: List[Tuple[str, bool]] = []
+        self.row_limit = 100
+        self.row_offset = 0
+    
+    def select(self, *columns: str) -> "MemoryQuery":
+        """Colonnes à récupérer (projection) ; accepte aussi "a,b,c" """
+        self.columns = ",".join(columns) if columns else "*"
+        return self
+    
+    def where(self, column: str, operator: str, value: Any) -> "MemoryQuery":
+        """
+        Ajoute un filtre exécuté côté serveur
+        
+        Args:
+            column: Colonne filtrée
+            operator: Un des OPERATORS (in : liste de valeurs, like : motif avec %)
+            value: Valeur de comparaison
+        """
+        if operator not in self.OPERATORS:
+            raise ValueError(f"Opérateur inconnu : {operator}")
+        if operator == "in":
+            value = list(value)
+        self.conditions.append((column, operator, value))
+        return self
+    
+    def eq(self, column: str, value: Any) -> "MemoryQuery":
+        """Filtre d'égalité"""
+        return self.where(column, "eq", value)
+    
+    def neq(self, column: str, value: Any) -> "MemoryQuery":
+        """Filtre de différence"""
+        return self.where(column, "neq", value)
+    
+    def gt(self, column: str, value: Any) -> "MemoryQuery":
+        """Filtre strictement supérieur"""
+        return self.where(column, "gt", value)
+    
+    def gte(self, column: str, value: Any) -> "MemoryQuery":
+        """Filtre supérieur ou égal"""
+        return self.where(column, "gte", value)
+    
+    def lt(self, column: str, value: Any) -> "MemoryQuery":
+        """Filtre strictement inférieur"""
+        return self.where(column, "lt", value)
+    
+    def lte(self, column: str, value: Any) -> "MemoryQuery":
+        """Filtre inférieur ou égal"""
+        return self.where(column, "lte", value)
+    
+    def in_(self, column: str, values: List[Any]) -> "MemoryQuery":
+        """Filtre d'appartenance à une liste"""
+        return self.where(column, "in", values)
+    
+    def like(self, column: str, pattern: str) -> "MemoryQuery":
+        """Filtre par motif (% = n'importe quelle suite de caractères)"""
+        return self.where(column, "like", pattern)
+    
+    def ilike(self, column: str, pattern: str) -> "MemoryQuery":
+        """Filtre par motif, insensible à la casse"""
+        return self.where(column, "ilike", pattern)
+    
+    def json_field(self, column: str, key: str, operator: str, value: Any) -> "MemoryQuery":
+        """
+        Filtre sur une clé d'une colonne JSON, exécuté côté serveur
+        
+        Args:
+            column: Colonne JSON (metadata)
+            key: Clé de premier niveau
+            operator: eq, neq, gt, gte, lt ou lte (comparaison des valeurs JSON)
+            value: Valeur JSON de comparaison (booléen, nombre, texte)
+        """
+        if not re.match(r"^[A-Za-z_][A-Za-z0-9_]*$", key):
+            raise ValueError(f"Clé JSON invalide : {key}")
+        if operator not in ("eq", "neq", "gt", "gte", "lt", "lte"):
+            raise ValueError(f"Opérateur non disponible sur une clé JSON : {operator}")
+        return self.where(f"{column}->{key}", operator, value)
+    
+    def order(self, column: str, desc: bool = False) -> "MemoryQuery":
+        """Ajoute une clé de tri (les appels successifs s'enchaînent)"""
+        self.ordering.append((column, desc))
+        return self
+    
+    def limit(self, count: int) -> "MemoryQuery":
+        """Nombre maximum de lignes"""
+        self.row_limit = count
+        return self
+    
+    def offset(self, count: int) -> "MemoryQuery":
+        """Nombre de lignes à sauter"""
+        self.row_offset = count
+        return self
+    
+    def cache_key(self) -> Tuple:
+        """Clé de cache de la requête (la table en premier élément)"""
+        spec = {"where": self.conditions, "order": self.ordering, "offset": self.row_offset}
+        return QueryCache.make_key(self.table, spec, self.row_limit, self.columns)
+    
+    def execute(self, use_cache: bool = True) -> List[Dict]:
+        """
+        Exécute la requête sur le moteur
+        
+        Args:
+            use_cache: Si False, ignore le cache de lectures du moteur
         
         Returns:
-            True si autorisé, False sinon
+            Liste des enregistrements
         """
-        st.warning(f"🔐 Action sensible : **{action_name}**")
-        st.info("⚠️ Code maître requis pour continuer")
+        return self.backend.run_query(self, use_cache)
+    
+    def delete(self) -> bool:
+        """
+        Supprime les lignes qui satisfont les filtres (tri, limite et colonnes ignorés)
         
-        # Génération d'une clé unique pour le widget
-        widget_key = f"auth_{action_name}_{key_suffix}_{datetime.now().timestamp()}"
+        Returns:
+            True si succès, False sinon
+        """
+        if not self.conditions:
+            raise ValueError("Suppression sans filtre refusée")
+        return self.backend.run_delete(self)
+
+
+class StorageBackend:
+    """Interface commune des moteurs de stockage utilisés par MemorySystem"""
+    
+    name = "Stockage"
+    location = ""
+    
+    def is_connected(self) -> bool:
+        """Vérifie si le moteur est utilisable"""
+        raise NotImplementedError
+    
+    def health_check(self, force: bool = False) -> bool:
+        """Vérifie que le moteur répond"""
+        return self.is_connected()
+    
+    def insert(self, table: str, data: Dict, deferred: bool = False) -> bool:
+        """Insère un enregistrement dans une table"""
+        raise NotImplementedError
+    
+    def upsert(self, table: str, data: Any, on_conflict: List[str]) -> bool:
+        """Insère des enregistrements (dict ou liste) ou met à jour ceux qui ont la même clé unique"""
+        raise NotImplementedError
+    
+    def query(self, table: str) -> MemoryQuery:
+        """
+        Démarre une requête de lecture sur une table
         
-        code_input = st.text_input(
-            "Entrez le code maître",
-            type="password",
-            key=widget_key,
-            help="Code configuré dans le système"
-        )
+        Args:
+            table: Table interrogée
         
-        if code_input:
-            if SecurityLayer.verify_code(code_input):
-                st.success("✅ Code correct - Action autorisée")
-                return True
-            else:
-                st.error("❌ Code incorrect - Action refusée")
-                return False
+        Returns:
+            Requête à compléter (select, filtres, order, limit...) puis execute()
+        """
+        return MemoryQuery(self, table)
+    
+    def run_query(self, query: MemoryQuery, use_cache: bool = True) -> List[Dict]:
+        """Exécute une requête construite par MemoryQuery"""
+        raise NotImplementedError
+    
+    def run_delete(self, query: MemoryQuery) -> bool:
+        """Supprime les lignes qui satisfont les filtres d'une MemoryQuery"""
+        raise NotImplementedError
+    
+    def select(self, table: str, filters: Optional[Dict] = None, limit: int = 100,
+               columns: str = "*", use_cache: bool = True) -> List[Dict]:
+        """
+        Sélectionne des enregistrements d'une table
+        
+        Args:
+            table: Table interrogée
+            filters: Filtres d'égalité colonne -> valeur
+            limit: Nombre maximum de lignes
+            columns: Colonnes à récupérer
+            use_cache: Si False, force la lecture en base
+        
+        Returns:
+            Liste des enregistrements
+        """
+        query = self.query(table).select(columns).limit(limit)
+        for column, value in (filters or {}).items():
+            query.eq(column, value)
+        return query.execute(use_cache)
+    
+    def fetch_page(self, table: str, order_by: str = "id", page_size: int = PAGE_SIZE,
+                   after: Optional[Tuple] = None, filters: Optional[Dict] = None,
+                   columns: str = "*", descending: bool = True,
+                   use_cache: bool = True) -> Tuple[List[Dict], Optional[Tuple]]:
+        """Lit une page triée, positionnée par clé (keyset)"""
+        raise NotImplementedError
+    
+    def count(self, table: str, filters: Optional[Dict] = None, mode: str = "exact") -> int:
+        """Compte les enregistrements dans le moteur"""
+        raise NotImplementedError
+    
+    def count_by(self, table: str, column: str, values: Optional[List[str]] = None) -> Dict[str, int]:
+        """Compte les enregistrements par valeur d'une colonne"""
+        raise NotImplementedError
+    
+    def sum_by(self, table: str, column: str, summed: str) -> Dict[str, int]:
+        """Somme d'une colonne numérique par valeur d'une autre colonne"""
+        raise NotImplementedError
+    
+    def time_range(self, table: str, column: str) -> Tuple[Optional[str], Optional[str]]:
+        """Valeurs minimale et maximale d'une colonne"""
+        raise NotImplementedError
+    
+    def flush(self, table: Optional[str] = None) -> bool:
+        """Envoie les écritures en attente (aucune par défaut)"""
+        return True
+    
+    def enable_write_behind(self) -> bool:
+        """
+        Active le regroupement des insertions différées (insert(..., deferred=True))
         
+        Returns:
+            True si les insertions différées passent par un tampon d'écriture
+        """
         return False
+    
+    def create_unique_indexes(self) -> List[str]:
+        """Crée les index uniques des upserts et renvoie les tables bloquées par des doublons (Supabase : schema.sql)"""
+        return []
+    
+    def sync_identity(self, table: str) -> bool:
+        """Recale le générateur d'id après une insertion d'ids explicites (rien par défaut)"""
+        return True
+    
+    def write_stats(self) -> Dict[str, Any]:
+        """Statistiques d'écriture différée (vide si non applicable)"""
+        return {}
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Statistiques du cache de lectures (vide si non applicable)"""
+        return {}
+    
+    def pool_status(self) -> Dict[str, Any]:
+        """État du pool de connexions (vide si non applicable)"""
+        return {}
+    
+    def iter_rows(self, table: str, order_by: str = "id", page_size: int = PAGE_SIZE,
+                  filters: Optional[Dict] = None, columns: str = "*",
+                  descending: bool = True, use_cache: bool = False) -> Iterator[Dict]:
+        """
+        Parcourt toute une table page par page, en mémoire bornée
+        
+        La page suivante est préchargée dans un thread pendant que la page
+        courante est consommée ; au plus deux pages sont en mémoire.
+        
+        Args:
+            table: Table interrogée
+            order_by: Colonne de tri (horodatage ou id)
+            page_size: Nombre de lignes par page
+            filters: Filtres d'égalité colonne -> valeur
+            columns: Colonnes à récupérer
+            descending: Tri décroissant (plus récent d'abord)
+            use_cache: Garde les pages dans le cache de lectures (jamais par défaut :
+                       un parcours complet en évincerait les résultats de l'interface)
+        
+        Yields:
+            Enregistrements un par un
+        """
+        def fetch(after):
+            return self.fetch_page(table, order_by, page_size, after, filters, columns, descending, use_cache)
+        
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="delta-prefetch") as prefetcher:
+            rows, cursor = fetch(None)
+            while True:
+                upcoming = prefetcher.submit(fetch, cursor) if cursor is not None else None
+                yield from rows
+                if upcoming is None:
+                    return
+                rows, cursor = upcoming.result()
 
-# ═══════════════════════════════════════════════════════════════════════════════
-# SECTION 4 : SYSTÈME DE MÉMOIRE COGNITIVE
-# ═══════════════════════════════════════════════════════════════════════════════
 
-class MemorySystem:
-    """Système de mémoire quadruple de DELTA"""
+class WriteBehindBuffer:
+    """Tampon d'écriture différée : regroupe les insertions par table"""
     
-    def __init__(self, db: SupabaseManager):
+    def __init__(self, flush_fn: Callable[[str, List[Dict]], bool],
+                 max_rows: int = WRITE_BUFFER_MAX_ROWS,
+                 max_age: float = WRITE_BUFFER_MAX_AGE,
+                 capacity: int = WRITE_BUFFER_CAPACITY):
         """
-        Initialisation du système de mémoire
+        Initialisation du tampon et démarrage du thread d'envoi
         
         Args:
-            db: Instance du gestionnaire Supabase
+            flush_fn: Fonction d'insertion groupée (table, lignes) -> succès
+            max_rows: Nombre de lignes d'une table déclenchant un envoi
+            max_age: Âge maximal (secondes) d'une ligne avant envoi
+            capacity: Nombre total de lignes en attente avant back-pressure
         """
-        self.db = db
+        self.flush_fn = flush_fn
+        self.max_rows = max_rows
+        self.max_age = max_age
+        self.capacity = capacity
+        
+        self._queues: Dict[str, List[Dict]] = {}
+        self._oldest: Dict[str, float] = {}
+        self._size = 0
+        self._retry_after = 0.0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._stats = {
+            "enqueued": 0,
+            "flushed_rows": 0,
+            "batches": 0,
+            "failed_batches": 0,
+            "dropped_rows": 0,
+            "backpressure_waits": 0,
+            "last_error": None
+        }
+        
+        self._thread = threading.Thread(target=self._run, name="delta-write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+    
+    def put(self, table: str, row: Dict, timeout: float = WRITE_BUFFER_PUT_TIMEOUT) -> bool:
+        """
+        Ajoute une ligne au tampon (bloque si le tampon est plein)
+        
+        Args:
+            table: Table de destination
+            row: Ligne à insérer
+            timeout: Attente maximale quand le tampon est plein
+        
+        Returns:
+            True si la ligne est en attente d'envoi, False si rejetée
+        """
+        with self._cond:
+            if self._closed:
+                return False
+            
+            # Back-pressure : on réveille le thread d'envoi et on attend de la place
+            if self._size >= self.capacity:
+                self._stats["backpressure_waits"] += 1
+                self._retry_after = 0.0
+                self._cond.notify_all()
+                if not self._cond.wait_for(lambda: self._size < self.capacity or self._closed, timeout):
+                    self._stats["dropped_rows"] += 1
+                    return False
+                if self._closed:
+                    return False
+            
+            queue = self._queues.setdefault(table, [])
+            if not queue:
+                self._oldest[table] = time.monotonic()
+            queue.append(row)
+            self._size += 1
+            self._stats["enqueued"] += 1
+            
+            if len(queue) >= self.max_rows:
+                self._cond.notify_all()
+            return True
+    
+    def pending(self, table: Optional[str] = None) -> int:
+        """
+        Nombre de lignes en attente
+        
+        Args:
+            table: Table à inspecter (toutes si None)
+        
+        Returns:
+            Nombre de lignes non encore envoyées
+        """
+        with self._cond:
+            if table is None:
+                return self._size
+            return len(self._queues.get(table, []))
+    
+    def flush(self, table: Optional[str] = None) -> bool:
+        """
+        Envoie immédiatement les lignes en attente (dans le thread appelant)
+        
+        Args:
+            table: Table à vider (toutes si None)
+        
+        Returns:
+            True si tous les lots ont été envoyés
+        """
+        with self._cond:
+            tables = [table] if table else list(self._queues)
+            batches = [(t, self._take(t)) for t in tables]
+        
+        return all([self._send(t, rows) for t, rows in batches if rows])
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Statistiques du tampon
+        
+        Returns:
+            Compteurs d'envoi, lignes en attente par table
+        """
+        with self._cond:
+            stats = dict(self._stats)
+            stats["pending"] = self._size
+            stats["pending_by_table"] = {t: len(q) for t, q in self._queues.items() if q}
+            return stats
+    
+    def close(self) -> None:
+        """Arrête le thread d'envoi et vide le tampon (fin de session / processus)"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout=self.max_age * 2)
+        self.flush()
     
     # ───────────────────────────────────────────────────────────────────────────
-    # MÉMOIRE SÉMANTIQUE - Faits permanents
+    # Mécanique interne
     # ───────────────────────────────────────────────────────────────────────────
     
-    def store_semantic(self, category: str, key: str, value: str) -> bool:
+    def _take(self, table: str) -> List[Dict]:
+        """Retire toutes les lignes d'une table (verrou déjà acquis)"""
+        rows = self._queues.pop(table, [])
+        self._oldest.pop(table, None)
+        self._size -= len(rows)
+        if rows:
+            self._cond.notify_all()
+        return rows
+    
+    def _due_tables(self) -> List[str]:
+        """Tables dont le lot est plein ou trop ancien (verrou déjà acquis)"""
+        now = time.monotonic()
+        if now < self._retry_after:
+            return []
+        return [
+            t for t, q in self._queues.items()
+            if q and (len(q) >= self.max_rows or now - self._oldest[t] >= self.max_age)
+        ]
+    
+    @staticmethod
+    def is_transient(error: Exception) -> bool:
         """
-        Stocke un fait permanent
+        Erreur passagère (réseau, disjoncteur ouvert, base verrouillée) : le lot sera retenté
         
-        Args:
-            category: Catégorie du fait (Personnel, Projet, Contact, Préférence)
-            key: Clé unique du fait
-            value: Valeur du fait
+        Une erreur métier PostgREST (APIError) ou une contrainte SQLite violée
+        se reproduirait à l'identique à chaque nouvelle tentative.
+        """
+        if isinstance(error, sqlite3.OperationalError):
+            return True
+        if isinstance(error, sqlite3.Error):
+            return False
+        try:
+            from postgrest.exceptions import APIError
+        except ImportError:
+            return True
+        return not isinstance(error, APIError)
+    
+    def _send(self, table: str, rows: List[Dict]) -> bool:
+        """
+        Envoie un lot hors verrou
+        
+        Après une erreur passagère, le lot est remis en tête de file. Après une
+        erreur définitive, il est coupé en deux pour isoler les lignes refusées,
+        qui sont écartées (et comptées).
+        """
+        transient = True
+        try:
+            success = self.flush_fn(table, rows)
+            error = None if success else f"insertion groupée refusée ({table})"
+        except Exception as e:
+            success, error, transient = False, f"{table}: {e}", self.is_transient(e)
+        
+        with self._cond:
+            if success:
+                self._stats["batches"] += 1
+                self._stats["flushed_rows"] += len(rows)
+                return True
+            
+            self._stats["failed_batches"] += 1
+            self._stats["last_error"] = error
+            if not transient and len(rows) == 1:
+                self._stats["dropped_rows"] += 1
+                return False
+        
+        if not transient:
+            middle = len(rows) // 2
+            return all([self._send(table, rows[:middle]), self._send(table, rows[middle:])])
+        
+        with self._cond:
+            self._retry_after = time.monotonic() + self.max_age
+            
+            room = max(self.capacity - self._size, 0) if not self._closed else 0
+            kept = rows[:room]
+            self._stats["dropped_rows"] += len(rows) - len(kept)
+            if kept:
+                self._queues[table] = kept + self._queues.get(table, [])
+                self._oldest[table] = time.monotonic()
+                self._size += len(kept)
+            return False
+    
+    def _run(self) -> None:
+        """Boucle du thread d'envoi : envoie les lots pleins ou trop anciens"""
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._closed or bool(self._due_tables()), self.max_age / 2)
+                if self._closed:
+                    return
+                batches = [(t, self._take(t)) for t in self._due_tables()]
+            
+            for table, rows in batches:
+                self._send(table, rows)
+
+
+class QueryCache:
+    """Cache LRU à durée de vie des résultats de lecture, invalidé par table"""
+    
+    def __init__(self, max_entries: int = QUERY_CACHE_MAX_ENTRIES,
+                 ttl_by_table: Optional[Dict[str, float]] = None,
+                 default_ttl: float = QUERY_CACHE_DEFAULT_TTL):
+        """
+        Initialisation du cache
+        
+        Args:
+            max_entries: Nombre maximum de résultats conservés
+            ttl_by_table: Durée de vie (secondes) par table
+            default_ttl: Durée de vie des tables non listées
+        """
+        self.max_entries = max_entries
+        self.ttl_by_table = dict(QUERY_CACHE_TTL if ttl_by_table is None else ttl_by_table)
+        self.default_ttl = default_ttl
+        
+        self._entries: "OrderedDict[Tuple, Tuple[float, List[Dict]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "stale_hits": 0,
+                       "evictions": 0, "invalidations": 0}
+    
+    @staticmethod
+    def make_key(table: str, filters: Optional[Dict], limit: int, columns: str) -> Tuple:
+        """
+        Construit la clé d'une requête
+        
+        Args:
+            table: Table interrogée
+            filters: Filtres d'égalité
+            limit: Nombre maximum de lignes
+            columns: Colonnes demandées
+        
+        Returns:
+            Clé hashable (la table en premier élément)
+        """
+        filters_key = json.dumps(filters or {}, sort_keys=True, default=str)
+        return (table, filters_key, limit, columns)
+    
+    def get(self, key: Tuple) -> Optional[List[Dict]]:
+        """
+        Récupère un résultat encore valide
+        
+        Args:
+            key: Clé construite par make_key
+        
+        Returns:
+            Copie du résultat, ou None si absent ou expiré
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            
+            expires_at, rows = entry
+            if time.monotonic() >= expires_at:
+                # Conservé (jusqu'à éviction) pour le mode dégradé : voir get_stale
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return list(rows)
+    
+    def get_stale(self, key: Tuple) -> Optional[List[Dict]]:
+        """
+        Récupère un résultat même expiré (repli quand la base est indisponible)
+        
+        Args:
+            key: Clé construite par make_key
+        
+        Returns:
+            Copie du dernier résultat connu, ou None si absent
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._stats["stale_hits"] += 1
+            return list(entry[1])
+    
+    def put(self, key: Tuple, rows: List[Dict]) -> None:
+        """
+        Enregistre un résultat (éviction du moins récemment utilisé si plein)
+        
+        Args:
+            key: Clé construite par make_key
+            rows: Lignes renvoyées par la base
+        """
+        ttl = self.ttl_by_table.get(key[0], self.default_ttl)
+        if ttl <= 0:
+            return
+        
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, list(rows))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+    
+    def invalidate(self, table: Optional[str] = None) -> None:
+        """
+        Supprime les résultats d'une table (ou tout le cache)
+        
+        Args:
+            table: Table modifiée (tout le cache si None)
+        """
+        with self._lock:
+            if table is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k[0] == table]:
+                    del self._entries[key]
+            self._stats["invalidations"] += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Statistiques du cache
+        
+        Returns:
+            Compteurs de hits/misses, taux de succès et taille
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+@st.cache_resource
+def get_query_cache() -> QueryCache:
+    """Cache de lectures unique pour le processus (survit aux reruns Streamlit)"""
+    return QueryCache()
+
+
+class CircuitOpenError(Exception):
+    """Levée quand le disjoncteur refuse un appel (service considéré indisponible)"""
+
+
+class CircuitBreaker:
+    """Disjoncteur : coupe les appels après des échecs répétés, puis teste un appel"""
+    
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = BREAKER_RESET_TIMEOUT):
+        """
+        Initialisation du disjoncteur (fermé)
+        
+        Args:
+            failure_threshold: Échecs consécutifs avant ouverture
+            reset_timeout: Durée (secondes) d'ouverture avant un appel d'essai
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        self._stats = {"opened": 0, "rejected": 0}
+    
+    def allow(self) -> bool:
+        """
+        Indique si un appel peut partir (passe en semi-ouvert après le délai)
+        
+        Returns:
+            True si l'appel est autorisé
+        """
+        with self._lock:
+            if self.state == "closed":
+                return True
+            
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                self._trial_in_flight = False
+            
+            if self.state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            
+            self._stats["rejected"] += 1
+            return False
+    
+    def is_open(self) -> bool:
+        """Vrai si les appels sont actuellement refusés (sans consommer d'essai)"""
+        with self._lock:
+            if self.state == "open":
+                return time.monotonic() - self.opened_at < self.reset_timeout
+            return self.state == "half_open" and self._trial_in_flight
+    
+    def record_success(self) -> None:
+        """Enregistre un appel réussi (referme le disjoncteur)"""
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._trial_in_flight = False
+    
+    def record_failure(self) -> None:
+        """Enregistre un échec (ouvre le disjoncteur au-delà du seuil ou après un essai raté)"""
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    self._stats["opened"] += 1
+                self.state = "open"
+                self.opened_at = time.monotonic()
+    
+    def status(self) -> Dict[str, Any]:
+        """
+        État du disjoncteur
+        
+        Returns:
+            État, échecs consécutifs, délai avant essai et compteurs
+        """
+        with self._lock:
+            retry_in = 0.0
+            if self.state == "open":
+                retry_in = max(self.reset_timeout - (time.monotonic() - self.opened_at), 0.0)
+            return {
+                "state": self.state,
+                "failures": self.failures,
+                "retry_in": retry_in,
+                **self._stats
+            }
+
+
+class SupabasePool:
+    """Client Supabase et pool de connexions HTTP partagés par tout le processus"""
+    
+    def __init__(self, supabase_url: str, supabase_key: str,
+                 pool_size: int = SUPABASE_POOL_SIZE, cache: Optional[QueryCache] = None):
+        """
+        Création du client, du pool HTTP et du tampon d'écriture partagés
+        
+        Args:
+            supabase_url: URL du projet Supabase
+            supabase_key: Clé d'API Supabase
+            pool_size: Nombre maximal de connexions HTTP simultanées
+            cache: Cache de lectures à invalider après les écritures groupées
+        
+        Raises:
+            Exception: si le client ne peut pas être créé
+        """
+        self.supabase_url = supabase_url
+        self.supabase_key = supabase_key
+        self.pool_size = pool_size
+        self.cache = cache if cache is not None else QueryCache()
+        self.breaker = CircuitBreaker()
+        
+        self._lock = threading.Lock()
+        self._session = None
+        self._sessions: Dict[str, Any] = {}
+        self.client = self._connect()
+        
+        self.healthy = True
+        self.last_check = time.monotonic()
+        self.last_error: Optional[str] = None
+        self.reconnections = 0
+        
+        self.writer = WriteBehindBuffer(self._bulk_insert)
+    
+    def _connect(self):
+        """Crée le client Supabase et remplace sa session HTTP par un pool dimensionné"""
+        from supabase import create_client
+        client = create_client(self.supabase_url, self.supabase_key)
+        self._configure_pool(client)
+        return client
+    
+    def _configure_pool(self, client) -> None:
+        """
+        Installe des sessions httpx (une par type d'opération, chacune avec son
+        délai) qui partagent un même transport, donc un même pool de connexions
+        
+        Args:
+            client: Client Supabase dont la session PostgREST est remplacée
+        """
+        import httpx
+        from postgrest.utils import SyncClient
+        
+        postgrest = client.postgrest
+        old_session = postgrest.session
+        previous = list(self._sessions.values())
+        transport = httpx.HTTPTransport(
+            limits=httpx.Limits(
+                max_connections=self.pool_size,
+                max_keepalive_connections=self.pool_size
+            )
+        )
+        self._sessions = {
+            operation: SyncClient(
+                base_url=old_session.base_url,
+                headers=old_session.headers,
+                timeout=timeout,
+                transport=transport
+            )
+            for operation, timeout in (("read", SUPABASE_READ_TIMEOUT), ("write", SUPABASE_WRITE_TIMEOUT))
+        }
+        self._session = self._sessions["write"]
+        postgrest.session = self._session
+        old_session.close()
+        # Sessions remplacées (reconnexion) : leur fermeture libère le pool de l'ancien transport
+        for session in previous:
+            session.close()
+    
+    def table(self, table: str, operation: str = "read"):
+        """
+        Constructeur de requête PostgREST utilisant la session de l'opération
+        
+        Args:
+            table: Table visée
+            operation: "read" ou "write" (détermine le délai maximal)
+        
+        Returns:
+            Constructeur de requête postgrest-py
+        """
+        builder = self.client.table(table)
+        builder.session = self._sessions.get(operation, self._session)
+        return builder
+    
+    def rpc(self, function: str, params: Dict):
+        """
+        Appel de fonction SQL avec le délai des lectures
+        
+        Args:
+            function: Nom de la fonction
+            params: Paramètres nommés
+        
+        Returns:
+            Constructeur de requête postgrest-py
+        """
+        builder = self.client.rpc(function, params)
+        builder.session = self._sessions.get("read", self._session)
+        return builder
+    
+    @staticmethod
+    def _is_transient(error: Exception) -> bool:
+        """Erreur réseau ou réponse non exploitable (et non une erreur métier PostgREST)"""
+        from postgrest.exceptions import APIError
+        return not isinstance(error, APIError)
+    
+    def call(self, fn: Callable[[], Any], idempotent: bool = True) -> Any:
+        """
+        Exécute un appel Supabase sous la protection du disjoncteur
+        
+        Les appels idempotents (lectures) sont retentés avec un délai
+        exponentiel à gigue ; les écritures ne sont tentées qu'une fois.
+        
+        Args:
+            fn: Appel à exécuter (construit et exécute la requête)
+            idempotent: Autorise les nouvelles tentatives
+        
+        Returns:
+            Résultat de fn
+        
+        Raises:
+            CircuitOpenError: si le disjoncteur est ouvert
+            Exception: dernière erreur rencontrée
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError("Supabase indisponible (disjoncteur ouvert)")
+        
+        attempts = SUPABASE_RETRY_ATTEMPTS if idempotent else 1
+        last_error: Optional[Exception] = None
+        for attempt in range(attempts):
+            try:
+                result = fn()
+            except Exception as e:
+                if not self._is_transient(e):
+                    # Le serveur a répondu : le service est disponible
+                    self.breaker.record_success()
+                    raise
+                last_error = e
+                if attempt + 1 < attempts:
+                    delay = min(SUPABASE_RETRY_MAX_DELAY, SUPABASE_RETRY_BASE_DELAY * 2 ** attempt)
+                    time.sleep(random.uniform(0, delay))
+                continue
+            self.breaker.record_success()
+            return result
+        
+        self.breaker.record_failure()
+        self.last_error = str(last_error)
+        raise last_error
+    
+    def health_check(self, force: bool = False) -> bool:
+        """
+        Vérifie la connexion (au plus une fois par intervalle) et reconnecte si besoin
+        
+        Args:
+            force: Ignore l'intervalle entre deux vérifications
+        
+        Returns:
+            True si la base répond
+        """
+        # Disjoncteur ouvert : inutile d'attendre un délai réseau
+        if self.breaker.is_open():
+            self.healthy = False
+            return False
+        
+        # Après un échec, nouvelle vérification dès que le disjoncteur le permet
+        now = time.monotonic()
+        if not force and self.healthy and now - self.last_check < SUPABASE_HEALTH_CHECK_INTERVAL:
+            return self.healthy
+        
+        with self._lock:
+            self.last_check = now
+            try:
+                # Le client recrée sa session PostgREST après un événement d'auth
+                if self.client.postgrest.session is not self._session:
+                    self._configure_pool(self.client)
+                # Lecture d'un seul id : valide la connexion et la clé
+                self.table("semantic_memory").select("id").limit(1).execute()
+                self.healthy = True
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                try:
+                    self.client = self._connect()
+                    self.reconnections += 1
+                    self.table("semantic_memory").select("id").limit(1).execute()
+                    self.healthy = True
+                except Exception as retry_error:
+                    self.healthy = False
+                    self.last_error = str(retry_error)
+                    self.breaker.record_failure()
+        
+        return self.healthy
+    
+    def status(self) -> Dict[str, Any]:
+        """
+        État du pool partagé
+        
+        Returns:
+            Santé, taille du pool, reconnexions, disjoncteur et dernière erreur
+        """
+        return {
+            "healthy": self.healthy,
+            "pool_size": self.pool_size,
+            "reconnections": self.reconnections,
+            "last_error": self.last_error,
+            "seconds_since_check": round(time.monotonic() - self.last_check, 1),
+            "breaker": self.breaker.status()
+        }
+    
+    def _bulk_insert(self, table: str, rows: List[Dict]) -> bool:
+        """
+        Insertion multi-lignes en une seule requête (utilisée par le tampon)
+        
+        Args:
+            table: Table de destination
+            rows: Enregistrements à insérer
+        
+        Returns:
+            True si succès (lève une exception en cas d'erreur réseau ou disjoncteur ouvert)
+        """
+        conflict = INSERT_IGNORE_CONFLICTS.get(table)
+        if conflict:
+            # Contenu adressé par empreinte : une ligne déjà présente est identique
+            self.call(lambda: self.table(table, "write").upsert(
+                rows, on_conflict=",".join(conflict), returning="minimal", ignore_duplicates=True
+            ).execute(), idempotent=True)
+        else:
+            self.call(lambda: self.table(table, "write").insert(rows, returning="minimal").execute(), idempotent=False)
+        self.cache.invalidate(table)
+        return True
+
+
+@st.cache_resource(show_spinner=False)
+def get_supabase_pool(supabase_url: str, supabase_key: str, pool_size: int,
+                      _cache: QueryCache) -> SupabasePool:
+    """Pool Supabase unique par processus et par projet (créé une seule fois)"""
+    return SupabasePool(supabase_url, supabase_key, pool_size, _cache)
+
+
+class SupabaseManager(StorageBackend):
+    """Gestionnaire de connexion et opérations Supabase"""
+    
+    name = "Supabase"
+    
+    def __init__(self):
+        """Initialisation de la connexion Supabase (via le pool partagé du processus)"""
+        self.cache = get_query_cache()
+        self.pool: Optional[SupabasePool] = None
+        self.writer: Optional[WriteBehindBuffer] = None
+        
+        try:
+            import supabase  # noqa: F401
+            self.supabase_url = get_secret("SUPABASE_URL", "")
+            self.supabase_key = get_secret("SUPABASE_KEY", "")
+            self.location = self.supabase_url
+            pool_size = int(get_secret("SUPABASE_POOL_SIZE", SUPABASE_POOL_SIZE))
+            
+            if self.supabase_url and self.supabase_key:
+                try:
+                    self.pool = get_supabase_pool(self.supabase_url, self.supabase_key, pool_size, self.cache)
+                    self.writer = self.pool.writer
+                    UI_SINK.success("✅ Connexion Supabase établie")
+                except Exception as e:
+                    UI_SINK.error(f"❌ Erreur connexion Supabase: {e}")
+            else:
+                UI_SINK.warning("⚠️ Clés Supabase non configurées")
+        except ImportError:
+            UI_SINK.error("❌ Module 'supabase' non installé. Installez-le avec: pip install supabase")
+    
+    @property
+    def client(self):
+        """Client Supabase partagé (None si non connecté)"""
+        return self.pool.client if self.pool is not None else None
+    
+    def is_connected(self) -> bool:
+        """Vérifie si la connexion est établie"""
+        return self.client is not None
+    
+    def health_check(self, force: bool = False) -> bool:
+        """
+        Vérifie la santé de la connexion partagée
+        
+        Args:
+            force: Ignore l'intervalle entre deux vérifications
+        
+        Returns:
+            True si connecté et la base répond
+        """
+        return self.pool.health_check(force) if self.pool is not None else False
+    
+    def pool_status(self) -> Dict[str, Any]:
+        """
+        État du pool de connexions partagé
+        
+        Returns:
+            Dictionnaire d'état (vide si non connecté)
+        """
+        return self.pool.status() if self.pool is not None else {}
+    
+    def insert(self, table: str, data: Dict, deferred: bool = False) -> bool:
+        """
+        Insère un enregistrement dans une table
+        
+        Args:
+            table: Table de destination
+            data: Enregistrement à insérer
+            deferred: Si True, l'enregistrement passe par le tampon d'écriture
+                      différée et sera envoyé dans une insertion groupée
+        
+        Returns:
+            True si inséré (ou mis en attente), False sinon
+        """
+        if not self.is_connected():
+            UI_SINK.error("❌ Pas de connexion Supabase")
+            return False
+        
+        # Disjoncteur ouvert : l'écriture attend le retour du service dans le tampon
+        breaker_open = self.pool.breaker.is_open()
+        if (deferred or breaker_open) and self.writer is not None:
+            if self.writer.put(table, data):
+                if breaker_open and not deferred:
+                    UI_SINK.warning(f"⚠️ Supabase indisponible : écriture dans {table} mise en attente")
+                return True
+            UI_SINK.warning(f"⚠️ Tampon d'écriture saturé, insertion directe dans {table}")
+        
+        conflict = INSERT_IGNORE_CONFLICTS.get(table)
+        try:
+            if conflict:
+                self.pool.call(lambda: self.pool.table(table, "write").upsert(
+                    data, on_conflict=",".join(conflict), returning="minimal", ignore_duplicates=True
+                ).execute(), idempotent=True)
+            else:
+                self.pool.call(lambda: self.pool.table(table, "write").insert(data).execute(), idempotent=False)
+            self.cache.invalidate(table)
+            return True
+        except Exception as e:
+            UI_SINK.error(f"❌ Erreur insertion dans {table}: {e}")
+            return False
+    
+    def upsert(self, table: str, data: Any, on_conflict: List[str]) -> bool:
+        """
+        Insère des enregistrements ou remplace ceux qui ont la même clé unique
+        
+        Args:
+            table: Table de destination
+            data: Enregistrement à écrire, ou liste d'enregistrements (une seule requête)
+            on_conflict: Colonnes de la contrainte d'unicité (voir schema.sql)
+        
+        Returns:
+            True si écrit, False sinon
+        """
+        if not self.is_connected():
+            UI_SINK.error("❌ Pas de connexion Supabase")
+            return False
+        
+        try:
+            # Écriture idempotente : peut être retentée comme une lecture
+            self.pool.call(
+                lambda: self.pool.table(table, "write").upsert(
+                    data, on_conflict=",".join(on_conflict), returning="minimal"
+                ).execute(),
+                idempotent=True
+            )
+            self.cache.invalidate(table)
+            return True
+        except Exception as e:
+            UI_SINK.error(f"❌ Erreur écriture dans {table}: {e}")
+            return False
+    
+    def sync_identity(self, table: str) -> bool:
+        """
+        Recale la séquence d'id sur le plus grand id de la table (après un import)
+        
+        Utilise la fonction SQL memory_sync_identity (voir schema.sql).
+        
+        Args:
+            table: Table dont les ids ont été écrits explicitement
+        
+        Returns:
+            True si succès, False sinon
+        """
+        if not self.is_connected():
+            return False
+        try:
+            self.pool.call(
+                lambda: self.pool.rpc("memory_sync_identity", {"table_name": table}).execute(),
+                idempotent=True
+            )
+            return True
+        except Exception as e:
+            UI_SINK.error(f"❌ Erreur recalage des ids de {table}: {e}")
+            return False
+    
+    def flush(self, table: Optional[str] = None) -> bool:
+        """
+        Envoie immédiatement les écritures différées en attente
+        
+        Args:
+            table: Table à vider (toutes si None)
+        
+        Returns:
+            True si tout a été envoyé
+        """
+        if self.writer is None:
+            return True
+        return self.writer.flush(table)
+    
+    def enable_write_behind(self) -> bool:
+        """Le tampon du pool est toujours actif quand Supabase est connecté"""
+        return self.writer is not None
+    
+    def write_stats(self) -> Dict[str, Any]:
+        """
+        Statistiques du tampon d'écriture différée
+        
+        Returns:
+            Dictionnaire de compteurs (vide si non connecté)
+        """
+        return self.writer.stats() if self.writer is not None else {}
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """
+        Statistiques du cache de lectures
+        
+        Returns:
+            Dictionnaire de compteurs (hits, misses, taille...)
+        """
+        return self.cache.stats()
+    
+    def _read(self, table: str, key: Tuple, fetch: Callable[[], List[Dict]],
+              use_cache: bool = True, quiet: bool = False) -> Optional[List[Dict]]:
+        """
+        Lecture résiliente : cache, disjoncteur, délai et nouvelles tentatives
+        
+        Si la base est indisponible, renvoie le dernier résultat connu
+        (même expiré) plutôt que de bloquer le rendu.
+        
+        Args:
+            table: Table lue
+            key: Clé de cache du résultat
+            fetch: Appel réseau renvoyant les lignes à mettre en cache
+            use_cache: Si False, lit en base sans garder le résultat en cache
+                       (parcours complets, lectures de contrôle)
+            quiet: N'affiche pas les erreurs (l'appelant a un repli)
+        
+        Returns:
+            Lignes lues, ou None si indisponible et absent du cache
+        """
+        # Lecture de ses propres écritures : on envoie d'abord les lignes en attente
+        # (l'envoi invalide les résultats en cache de la table)
+        if self.writer is not None and self.writer.pending(table) and not self.pool.breaker.is_open():
+            self.writer.flush(table)
+        
+        if use_cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        
+        try:
+            rows = self.pool.call(fetch, idempotent=True)
+        except CircuitOpenError:
+            return self.cache.get_stale(key)
+        except Exception as e:
+            if not quiet:
+                UI_SINK.error(f"❌ Erreur lecture {table}: {e}")
+            return self.cache.get_stale(key)
+        
+        if use_cache:
+            self.cache.put(key, rows)
+        return rows
+    
+    @staticmethod
+    def _apply_conditions(request, query: MemoryQuery):
+        """Traduit les filtres d'une MemoryQuery en filtres PostgREST"""
+        for column, operator, value in query.conditions:
+            if "->" in column:
+                # Clé JSON : égalité par inclusion (@>, index GIN), sinon comparaison jsonb
+                column, key = column.split("->", 1)
+                if operator == "eq":
+                    request = request.filter(column, "cs", json_dumps({key: value}))
+                else:
+                    request = request.filter(f"{column}->{key}", operator, json_dumps(value))
+            elif operator == "in":
+                request = request.in_(column, value)
+            elif operator in ("like", "ilike"):
+                request = getattr(request, operator)(column, value)
+            else:
+                request = request.filter(column, operator, value)
+        return request
+    
+    def run_delete(self, query: MemoryQuery) -> bool:
+        """
+        Supprime côté serveur les lignes qui satisfont les filtres
+        
+        Args:
+            query: Requête construite par MemoryQuery (filtres uniquement)
+        
+        Returns:
+            True si succès, False sinon
+        """
+        if not self.is_connected():
+            return False
+        
+        try:
+            # Suppression filtrée : rejouable sans effet de bord
+            self.pool.call(
+                lambda: self._apply_conditions(
+                    self.pool.table(query.table, "write").delete(returning="minimal"), query
+                ).execute(),
+                idempotent=True
+            )
+            self.cache.invalidate(query.table)
+            return True
+        except Exception as e:
+            UI_SINK.error(f"❌ Erreur suppression dans {query.table}: {e}")
+            return False
+    
+    def run_query(self, query: MemoryQuery, use_cache: bool = True) -> List[Dict]:
+        """
+        Exécute une requête côté serveur (colonnes, filtres, tri, limite) via le cache
+        
+        Args:
+            query: Requête construite par MemoryQuery
+            use_cache: Si False, force la lecture en base
+        
+        Returns:
+            Liste des enregistrements
+        """
+        if not self.is_connected():
+            return []
+        
+        def fetch() -> List[Dict]:
+            request = self._apply_conditions(self.pool.table(query.table).select(query.columns), query)
+            
+            if query.ordering:
+                # Un seul paramètre order (order() de postgrest-py 0.13 le dupliquerait)
+                request.params = request.params.add(
+                    "order", ",".join(f"{c}.{'desc' if d else 'asc'}" for c, d in query.ordering)
+                )
+            
+            request = request.limit(query.row_limit)
+            if query.row_offset:
+                request = request.offset(query.row_offset)
+            
+            response = request.execute()
+            return response.data if response.data else []
+        
+        return self._read(query.table, query.cache_key(), fetch, use_cache) or []
+    
+    def fetch_page(self, table: str, order_by: str = "id", page_size: int = PAGE_SIZE,
+                   after: Optional[Tuple] = None, filters: Optional[Dict] = None,
+                   columns: str = "*", descending: bool = True,
+                   use_cache: bool = True) -> Tuple[List[Dict], Optional[Tuple]]:
+        """
+        Lit une page triée, positionnée par clé (keyset) plutôt que par offset
+        
+        Le tri se fait sur (order_by, id) : la page suivante commence
+        strictement après la dernière ligne lue, quel que soit le volume de la table.
+        
+        Args:
+            table: Table interrogée
+            order_by: Colonne de tri (horodatage ou id)
+            page_size: Nombre de lignes par page
+            after: Curseur renvoyé par la page précédente (None pour la première)
+            filters: Filtres d'égalité colonne -> valeur
+            columns: Colonnes à récupérer (order_by et id sont ajoutées si besoin)
+            descending: Tri décroissant (plus récent d'abord)
+            use_cache: Sert et garde la page dans le cache de lectures (page de l'interface)
+        
+        Returns:
+            Tuple (lignes, curseur de la page suivante ou None si dernière page)
+        """
+        if not self.is_connected():
+            return [], None
+        
+        if columns != "*":
+            wanted = [c.strip() for c in columns.split(",")]
+            columns = ",".join(wanted + [c for c in (order_by, "id") if c not in wanted])
+        
+        def fetch() -> List[Dict]:
+            query = self.pool.table(table).select(columns)
+            
+            if filters:
+                for key_name, value in filters.items():
+                    query = query.eq(key_name, value)
+            
+            if after is not None:
+                op = "lt" if descending else "gt"
+                last_value, last_id = after
+                if order_by == "id":
+                    query = query.filter("id", op, last_id)
+                else:
+                    # postgrest-py 0.13 n'expose pas or_() : paramètre ajouté directement
+                    # (repli sur id quand plusieurs lignes partagent la même valeur)
+                    value = json.dumps(str(last_value))
+                    query.params = query.params.add(
+                        "or",
+                        f"({order_by}.{op}.{value},and({order_by}.eq.{value},id.{op}.{last_id}))"
+                    )
+            
+            # Un seul paramètre order (order() de postgrest-py 0.13 le dupliquerait)
+            direction = "desc" if descending else "asc"
+            sort_keys = [order_by] if order_by == "id" else [order_by, "id"]
+            query.params = query.params.add("order", ",".join(f"{c}.{direction}" for c in sort_keys))
+            
+            response = query.limit(page_size).execute()
+            return response.data if response.data else []
+        
+        key = QueryCache.make_key(table, filters, page_size, f"page:{columns}:{order_by}:{descending}:{after}")
+        rows = self._read(table, key, fetch, use_cache)
+        if rows is None:
+            return [], None
+        
+        if len(rows) < page_size:
+            return rows, None
+        last = rows[-1]
+        return rows, (last.get(order_by), last.get("id"))
+    
+    def count(self, table: str, filters: Optional[Dict] = None, mode: str = "exact") -> int:
+        """
+        Compte les enregistrements côté serveur (sans transférer les lignes)
+        
+        Args:
+            table: Table interrogée
+            filters: Filtres d'égalité colonne -> valeur
+            mode: Méthode de comptage PostgreSQL : exact, planned ou estimated
+        
+        Returns:
+            Nombre d'enregistrements (0 si erreur ou non connecté)
+        """
+        if mode not in ("exact", "planned", "estimated"):
+            raise ValueError(f"Mode de comptage inconnu : {mode}")
+        
+        if not self.is_connected():
+            return 0
+        
+        def fetch() -> List[Dict]:
+            # Le total est lu dans l'en-tête Content-Range ; une seule ligne transférée
+            query = self.pool.table(table).select("id", count=mode)
+            
+            if filters:
+                for key_name, value in filters.items():
+                    query = query.eq(key_name, value)
+            
+            response = query.limit(1).execute()
+            return [{"count": response.count or 0}]
+        
+        rows = self._read(table, QueryCache.make_key(table, filters, 0, f"count:{mode}"), fetch)
+        return rows[0]["count"] if rows else 0
+    
+    def count_by(self, table: str, column: str, values: Optional[List[str]] = None) -> Dict[str, int]:
+        """
+        Compte les enregistrements par valeur d'une colonne (GROUP BY en base)
+        
+        Utilise la fonction SQL memory_count_by (voir schema.sql) ; à défaut,
+        effectue un comptage serveur par valeur connue.
+        
+        Args:
+            table: Table interrogée
+            column: Colonne de regroupement
+            values: Valeurs connues, utilisées si la fonction SQL est absente
+        
+        Returns:
+            Dictionnaire valeur -> nombre d'enregistrements
+        """
+        if not self.is_connected():
+            return {}
+        
+        def fetch() -> List[Dict]:
+            response = self.pool.rpc(
+                "memory_count_by",
+                {"table_name": table, "column_name": column}
+            ).execute()
+            return [{"value": row["value"], "count": int(row["count"])} for row in (response.data or [])]
+        
+        key = QueryCache.make_key(table, None, 0, f"count_by:{column}")
+        rows = self._read(table, key, fetch, quiet=True)
+        
+        if rows is None and values and not self.pool.breaker.is_open():
+            rows = [{"value": value, "count": self.count(table, {column: value})} for value in values]
+            rows = [row for row in rows if row["count"]]
+            self.cache.put(key, rows)
+        
+        return {row["value"]: row["count"] for row in (rows or [])}
+    
+    def sum_by(self, table: str, column: str, summed: str) -> Dict[str, int]:
+        """
+        Somme d'une colonne numérique par valeur d'une autre colonne (GROUP BY en base)
+        
+        Utilise la fonction SQL memory_sum_by (voir schema.sql).
+        
+        Args:
+            table: Table interrogée
+            column: Colonne de regroupement
+            summed: Colonne additionnée
+        
+        Returns:
+            Dictionnaire valeur -> somme (vide si la fonction SQL est absente)
+        """
+        if not self.is_connected():
+            return {}
+        
+        def fetch() -> List[Dict]:
+            response = self.pool.rpc(
+                "memory_sum_by",
+                {"table_name": table, "column_name": column, "sum_column": summed}
+            ).execute()
+            return [{"value": row["value"], "total": int(row["total"])} for row in (response.data or [])]
+        
+        rows = self._read(table, QueryCache.make_key(table, None, 0, f"sum_by:{column}:{summed}"), fetch, quiet=True)
+        return {row["value"]: row["total"] for row in (rows or [])}
+    
+    def time_range(self, table: str, column: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Valeurs minimale et maximale d'une colonne (tri et limite côté serveur)
+        
+        Args:
+            table: Table interrogée
+            column: Colonne horodatée
+        
+        Returns:
+            Tuple (minimum, maximum), (None, None) si table vide ou erreur
+        """
+        if not self.is_connected():
+            return None, None
+        
+        def fetch() -> List[Dict]:
+            first = self.pool.table(table).select(column).order(column).limit(1).execute()
+            last = self.pool.table(table).select(column).order(column, desc=True).limit(1).execute()
+            return [{
+                "min": first.data[0][column] if first.data else None,
+                "max": last.data[0][column] if last.data else None
+            }]
+        
+        rows = self._read(table, QueryCache.make_key(table, None, 0, f"range:{column}"), fetch)
+        return (rows[0]["min"], rows[0]["max"]) if rows else (None, None)
+
+
+class SQLiteBackend(StorageBackend):
+    """Moteur de stockage local SQLite (journal WAL), utilisable hors ligne"""
+    
+    name = "SQLite"
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS semantic_memory (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            category TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            created_at TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS episodic_memory (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            interaction_type TEXT NOT NULL,
+            content TEXT NOT NULL,
+            metadata TEXT NOT NULL DEFAULT '{}',
+            timestamp TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS episodic_summary (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            day TEXT NOT NULL,
+            interaction_type TEXT NOT NULL,
+            interaction_count INTEGER NOT NULL,
+            first_timestamp TEXT NOT NULL,
+            last_timestamp TEXT NOT NULL,
+            sample TEXT NOT NULL DEFAULT '',
+            UNIQUE (day, interaction_type)
+        );
+        CREATE TABLE IF NOT EXISTS episodic_archive (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            day TEXT NOT NULL,
+            interaction_type TEXT NOT NULL,
+            row_count INTEGER NOT NULL,
+            first_id INTEGER NOT NULL,
+            last_id INTEGER NOT NULL,
+            payload TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            UNIQUE (day, interaction_type)
+        );
+        CREATE TABLE IF NOT EXISTS habit_profiles (
+            action TEXT PRIMARY KEY,
+            profile TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS memory_blobs (
+            digest TEXT PRIMARY KEY,
+            content TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE TABLE IF NOT EXISTS memory_watermarks (
+            job TEXT PRIMARY KEY,
+            value TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS procedural_memory (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            action TEXT NOT NULL,
+            frequency INTEGER NOT NULL DEFAULT 1,
+            context TEXT,
+            last_executed TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS episodic_memory_timestamp_idx ON episodic_memory (timestamp, id);
+        CREATE INDEX IF NOT EXISTS episodic_memory_type_idx ON episodic_memory (interaction_type, timestamp);
+        CREATE INDEX IF NOT EXISTS episodic_memory_success_idx
+            ON episodic_memory (interaction_type, json_extract("metadata", '$.success'));
+    """
+    
+    # Cibles des upserts : créés à part, une base qui contient encore des doublons
+    # s'ouvre quand même (fusion explicite : python -m delta_os dedupe)
+    UNIQUE_INDEXES = {
+        "semantic_memory": "CREATE UNIQUE INDEX IF NOT EXISTS semantic_memory_category_key_uniq "
+                           "ON semantic_memory (category, key)",
+        "procedural_memory": "CREATE UNIQUE INDEX IF NOT EXISTS procedural_memory_action_uniq "
+                             "ON procedural_memory (action)"
+    }
+    
+    _IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+    
+    def __init__(self, path: str = SQLITE_PATH):
+        """
+        Ouverture (ou création) de la base locale
+        
+        Args:
+            path: Chemin du fichier SQLite
+        """
+        self.path = path
+        self.location = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self.writer: Optional[WriteBehindBuffer] = None
+        self.connected = False
+        
+        try:
+            conn = self._connection()
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+            self.connected = True
+        except sqlite3.Error as e:
+            UI_SINK.error(f"❌ Erreur ouverture base SQLite {path}: {e}")
+            return
+        
+        blocked = self.create_unique_indexes()
+        if blocked:
+            UI_SINK.warning(f"⚠️ Doublons dans {', '.join(blocked)} : écritures impossibles "
+                            f"avant la fusion (python -m delta_os dedupe)")
+    
+    def create_unique_indexes(self) -> List[str]:
+        """
+        Crée les index uniques des upserts (sans jamais supprimer de ligne)
+        
+        Returns:
+            Tables dont les doublons empêchent encore la création de l'index
+        """
+        conn = self._connection()
+        conn.execute("DROP INDEX IF EXISTS semantic_memory_category_key_idx")  # Remplacé par l'index unique
+        blocked = []
+        for table, statement in self.UNIQUE_INDEXES.items():
+            try:
+                conn.execute(statement)
+            except sqlite3.IntegrityError:
+                blocked.append(table)
+        return blocked
+    
+    def _connection(self) -> sqlite3.Connection:
+        """Connexion propre au thread courant (les lecteurs WAL ne se bloquent pas)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+    
+    @classmethod
+    def _quote(cls, identifier: str) -> str:
+        """Valide et protège un nom de table ou de colonne"""
+        if not cls._IDENTIFIER.match(identifier):
+            raise ValueError(f"Identifiant SQL invalide : {identifier}")
+        return f'"{identifier}"'
+    
+    @classmethod
+    def _column(cls, column: str) -> str:
+        """Traduit une colonne de filtre, clé JSON comprise (metadata->success)"""
+        if "->" not in column:
+            return cls._quote(column)
+        column, key = column.split("->", 1)
+        # Clé validée puis écrite en littéral : l'expression correspond à celle des index
+        return f"json_extract({cls._quote(column)}, '$.{cls._quote(key)[1:-1]}')"
+    
+    @staticmethod
+    def _encode(row: Dict) -> List[Any]:
+        """Valeurs d'un enregistrement, objets et listes sérialisés en JSON"""
+        return [json_dumps(v) if isinstance(v, (dict, list)) else v for v in row.values()]
+    
+    def _columns(self, columns: str) -> str:
+        """Traduit une liste de colonnes PostgREST ("a,b" ou "*") en SQL"""
+        if columns.strip() == "*":
+            return "*"
+        return ", ".join(self._quote(c.strip()) for c in columns.split(","))
+    
+    def _where(self, filters: Optional[Dict]) -> Tuple[str, List[Any]]:
+        """Construit la clause WHERE des filtres d'égalité"""
+        if not filters:
+            return "", []
+        clauses = [f"{self._quote(k)} = ?" for k in filters]
+        return " WHERE " + " AND ".join(clauses), list(filters.values())
+    
+    def _query(self, sql: str, params: List[Any]) -> List[Dict]:
+        """Exécute une lecture et renvoie des dictionnaires (colonnes JSON décodées)"""
+        cursor = self._connection().execute(sql, params)
+        json_columns = [c[0] for c in cursor.description if c[0] in JSON_COLUMNS]
+        rows = [dict(row) for row in cursor.fetchall()]
+        for row in rows:
+            for column in json_columns:
+                if isinstance(row[column], str):
+                    try:
+                        row[column] = json_loads(row[column])
+                    except ValueError:
+                        pass
+        return rows
+    
+    def is_connected(self) -> bool:
+        """Vérifie si la base est ouverte"""
+        return self.connected
+    
+    def health_check(self, force: bool = False) -> bool:
+        """Vérifie que la base répond"""
+        try:
+            self._connection().execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+    
+    def insert(self, table: str, data: Dict, deferred: bool = False) -> bool:
+        """
+        Insère un enregistrement (synchrone, sauf si enable_write_behind a été appelé)
+        
+        Args:
+            table: Table de destination
+            data: Enregistrement à insérer
+            deferred: Si True et le tampon actif, l'enregistrement est écrit plus
+                      tard dans une transaction groupée
+        
+        Returns:
+            True si inséré (ou mis en attente), False sinon
+        """
+        if deferred and self.writer is not None and self.writer.put(table, data):
+            return True
+        
+        columns = ", ".join(self._quote(c) for c in data)
+        placeholders = ", ".join("?" for _ in data)
+        conflict = INSERT_IGNORE_CONFLICTS.get(table)
+        on_conflict = f" ON CONFLICT ({', '.join(self._quote(c) for c in conflict)}) DO NOTHING" if conflict else ""
+        try:
+            with self._write_lock:
+                self._connection().execute(
+                    f"INSERT INTO {self._quote(table)} ({columns}) VALUES ({placeholders}){on_conflict}",
+                    self._encode(data)
+                )
+            return True
+        except sqlite3.Error as e:
+            UI_SINK.error(f"❌ Erreur insertion dans {table}: {e}")
+            return False
+    
+    def upsert(self, table: str, data: Any, on_conflict: List[str]) -> bool:
+        """
+        Insère des enregistrements ou met à jour ceux qui ont la même clé unique
+        
+        Args:
+            table: Table de destination
+            data: Enregistrement à écrire, ou liste d'enregistrements de mêmes colonnes
+            on_conflict: Colonnes de l'index unique
+        
+        Returns:
+            True si écrit, False sinon
+        """
+        rows = data if isinstance(data, list) else [data]
+        if not rows:
+            return True
+        columns = ", ".join(self._quote(c) for c in rows[0])
+        placeholders = ", ".join("?" for _ in rows[0])
+        target = ", ".join(self._quote(c) for c in on_conflict)
+        updates = ", ".join(f"{self._quote(c)} = excluded.{self._quote(c)}" for c in rows[0] if c not in on_conflict)
+        action = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+        conn = self._connection()
+        try:
+            with self._write_lock:
+                # Une seule transaction par lot (sinon une validation par ligne)
+                conn.execute("BEGIN")
+                try:
+                    conn.executemany(
+                        f"INSERT INTO {self._quote(table)} ({columns}) VALUES ({placeholders}) "
+                        f"ON CONFLICT ({target}) {action}",
+                        [self._encode(row) for row in rows]
+                    )
+                    conn.execute("COMMIT")
+                except sqlite3.Error:
+                    conn.execute("ROLLBACK")
+                    raise
+            return True
+        except sqlite3.Error as e:
+            UI_SINK.error(f"❌ Erreur écriture dans {table}: {e}")
+            return False
+    
+    def enable_write_behind(self) -> bool:
+        """
+        Regroupe désormais les insertions différées : une transaction par lot au
+        lieu d'une validation par ligne (mode batch)
+        
+        Returns:
+            True
+        """
+        if self.writer is None:
+            self.writer = WriteBehindBuffer(self._bulk_insert)
+        return True
+    
+    def _bulk_insert(self, table: str, rows: List[Dict]) -> bool:
+        """
+        Insertion groupée en une transaction (utilisée par le tampon)
+        
+        Args:
+            table: Table de destination
+            rows: Enregistrements à insérer
+        
+        Returns:
+            True si succès (lève sqlite3.Error sinon : le lot est retenté si la base
+            est verrouillée, découpé pour écarter les lignes refusées sinon)
+        """
+        conflict = INSERT_IGNORE_CONFLICTS.get(table)
+        on_conflict = f" ON CONFLICT ({', '.join(self._quote(c) for c in conflict)}) DO NOTHING" if conflict else ""
+        groups: Dict[Tuple[str, ...], List[List[Any]]] = {}
+        for row in rows:
+            groups.setdefault(tuple(row), []).append(self._encode(row))
+        conn = self._connection()
+        with self._write_lock:
+            conn.execute("BEGIN")
+            try:
+                for columns, values in groups.items():
+                    conn.executemany(
+                        f"INSERT INTO {self._quote(table)} ({', '.join(self._quote(c) for c in columns)}) "
+                        f"VALUES ({', '.join('?' for _ in columns)}){on_conflict}",
+                        values
+                    )
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                conn.execute("ROLLBACK")
+                raise
+        return True
+    
+    def _settle(self, table: str) -> None:
+        """Écrit les insertions en attente d'une table avant de la lire ou de la modifier"""
+        if self.writer is not None and self.writer.pending(table):
+            self.writer.flush(table)
+    
+    def flush(self, table: Optional[str] = None) -> bool:
+        """
+        Écrit immédiatement les insertions différées en attente
+        
+        Args:
+            table: Table à vider (toutes si None)
+        
+        Returns:
+            True si tout a été écrit
+        """
+        if self.writer is None:
+            return True
+        return self.writer.flush(table)
+    
+    def write_stats(self) -> Dict[str, Any]:
+        """Statistiques du tampon d'écriture (vide s'il n'est pas actif)"""
+        return self.writer.stats() if self.writer is not None else {}
+    
+    _SQL_OPERATORS = {"eq": "=", "neq": "!=", "gt": ">", "gte": ">=", "lt": "<", "lte": "<=", "like": "LIKE"}
+    
+    def _conditions(self, query: MemoryQuery) -> Tuple[str, List[Any]]:
+        """Traduit les filtres d'une MemoryQuery en clause WHERE"""
+        clauses, params = [], []
+        for column, operator, value in query.conditions:
+            col = self._column(column)
+            if operator == "in":
+                clauses.append(f"{col} IN ({', '.join('?' for _ in value) or 'NULL'})")
+                params.extend(value)
+            elif operator == "ilike":
+                clauses.append(f"LOWER({col}) LIKE LOWER(?)")
+                params.append(value)
+            else:
+                clauses.append(f"{col} {self._SQL_OPERATORS[operator]} ?")
+                # json_extract renvoie 1 / 0 pour true / false
+                params.append(int(value) if "->" in column and isinstance(value, bool) else value)
+        if not clauses:
+            return "", []
+        return " WHERE " + " AND ".join(clauses), params
+    
+    def run_delete(self, query: MemoryQuery) -> bool:
+        """
+        Supprime les lignes qui satisfont les filtres
+        
+        Args:
+            query: Requête construite par MemoryQuery (filtres uniquement)
+        
+        Returns:
+            True si succès, False sinon
+        """
+        where, params = self._conditions(query)
+        self._settle(query.table)
+        try:
+            with self._write_lock:
+                self._connection().execute(f"DELETE FROM {self._quote(query.table)}{where}", params)
+            return True
+        except sqlite3.Error as e:
+            UI_SINK.error(f"❌ Erreur suppression dans {query.table}: {e}")
+            return False
+    
+    def run_query(self, query: MemoryQuery, use_cache: bool = True) -> List[Dict]:
+        """
+        Traduit et exécute une requête MemoryQuery en SQL
+        
+        Args:
+            query: Requête construite par MemoryQuery
+            use_cache: Ignoré (lecture locale)
+        
+        Returns:
+            Liste des enregistrements
+        """
+        where, params = self._conditions(query)
+        
+        sql = f"SELECT {self._columns(query.columns)} FROM {self._quote(query.table)}{where}"
+        if query.ordering:
+            sql += " ORDER BY " + ", ".join(f"{self._quote(c)} {'DESC' if d else 'ASC'}" for c, d in query.ordering)
+        sql += " LIMIT ? OFFSET ?"
+        
+        self._settle(query.table)
+        try:
+            return self._query(sql, params + [query.row_limit, query.row_offset])
+        except sqlite3.Error as e:
+            UI_SINK.error(f"❌ Erreur lecture {query.table}: {e}")
+            return []
+    
+    def fetch_page(self, table: str, order_by: str = "id", page_size: int = PAGE_SIZE,
+                   after: Optional[Tuple] = None, filters: Optional[Dict] = None,
+                   columns: str = "*", descending: bool = True,
+                   use_cache: bool = True) -> Tuple[List[Dict], Optional[Tuple]]:
+        """
+        Lit une page triée sur (order_by, id), positionnée par clé
+        
+        Args:
+            table: Table interrogée
+            order_by: Colonne de tri (horodatage ou id)
+            page_size: Nombre de lignes par page
+            after: Curseur renvoyé par la page précédente
+            filters: Filtres d'égalité colonne -> valeur
+            columns: Colonnes à récupérer (order_by et id sont ajoutées si besoin)
+            descending: Tri décroissant (plus récent d'abord)
+            use_cache: Ignoré (lecture locale)
+        
+        Returns:
+            Tuple (lignes, curseur de la page suivante ou None)
+        """
+        if columns != "*":
+            wanted = [c.strip() for c in columns.split(",")]
+            columns = ",".join(wanted + [c for c in (order_by, "id") if c not in wanted])
+        
+        where, params = self._where(filters)
+        op = "<" if descending else ">"
+        direction = "DESC" if descending else "ASC"
+        col = self._quote(order_by)
+        
+        if after is not None:
+            last_value, last_id = after
+            if order_by == "id":
+                keyset, keyset_params = f'"id" {op} ?', [last_id]
+            else:
+                keyset = f'({col} {op} ? OR ({col} = ? AND "id" {op} ?))'
+                keyset_params = [last_value, last_value, last_id]
+            where = f"{where} AND {keyset}" if where else f" WHERE {keyset}"
+            params = params + keyset_params
+        
+        order = f'{col} {direction}' if order_by == "id" else f'{col} {direction}, "id" {direction}'
+        self._settle(table)
+        try:
+            rows = self._query(
+                f"SELECT {self._columns(columns)} FROM {self._quote(table)}{where} ORDER BY {order} LIMIT ?",
+                params + [page_size]
+            )
+        except sqlite3.Error as e:
+            UI_SINK.error(f"❌ Erreur lecture {table}: {e}")
+            return [], None
+        
+        if len(rows) < page_size:
+            return rows, None
+        return rows, (rows[-1].get(order_by), rows[-1].get("id"))
+    
+    def count(self, table: str, filters: Optional[Dict] = None, mode: str = "exact") -> int:
+        """
+        Compte les enregistrements (toujours exact en local)
+        
+        Args:
+            table: Table interrogée
+            filters: Filtres d'égalité colonne -> valeur
+            mode: Ignoré (exact)
+        
+        Returns:
+            Nombre d'enregistrements
+        """
+        where, params = self._where(filters)
+        self._settle(table)
+        try:
+            return self._connection().execute(
+                f"SELECT COUNT(*) FROM {self._quote(table)}{where}", params
+            ).fetchone()[0]
+        except sqlite3.Error as e:
+            UI_SINK.error(f"❌ Erreur comptage {table}: {e}")
+            return 0
+    
+    def count_by(self, table: str, column: str, values: Optional[List[str]] = None) -> Dict[str, int]:
+        """
+        Compte les enregistrements par valeur d'une colonne (GROUP BY)
+        
+        Args:
+            table: Table interrogée
+            column: Colonne de regroupement
+            values: Ignoré (le regroupement est fait en SQL)
+        
+        Returns:
+            Dictionnaire valeur -> nombre d'enregistrements
+        """
+        col = self._quote(column)
+        self._settle(table)
+        try:
+            rows = self._connection().execute(
+                f"SELECT {col}, COUNT(*) FROM {self._quote(table)} GROUP BY {col} ORDER BY 2 DESC"
+            ).fetchall()
+            return {row[0]: row[1] for row in rows}
+        except sqlite3.Error as e:
+            UI_SINK.error(f"❌ Erreur comptage {table}: {e}")
+            return {}
+    
+    def sum_by(self, table: str, column: str, summed: str) -> Dict[str, int]:
+        """
+        Somme d'une colonne numérique par valeur d'une autre colonne (GROUP BY)
+        
+        Args:
+            table: Table interrogée
+            column: Colonne de regroupement
+            summed: Colonne additionnée
+        
+        Returns:
+            Dictionnaire valeur -> somme
+        """
+        col = self._quote(column)
+        self._settle(table)
+        try:
+            rows = self._connection().execute(
+                f"SELECT {col}, SUM({self._quote(summed)}) FROM {self._quote(table)} GROUP BY {col} ORDER BY 2 DESC"
+            ).fetchall()
+            return {row[0]: row[1] or 0 for row in rows}
+        except sqlite3.Error as e:
+            UI_SINK.error(f"❌ Erreur comptage {table}: {e}")
+            return {}
+    
+    def time_range(self, table: str, column: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Valeurs minimale et maximale d'une colonne
+        
+        Args:
+            table: Table interrogée
+            column: Colonne horodatée
+        
+        Returns:
+            Tuple (minimum, maximum)
+        """
+        col = self._quote(column)
+        self._settle(table)
+        try:
+            row = self._connection().execute(f"SELECT MIN({col}), MAX({col}) FROM {self._quote(table)}").fetchone()
+            return row[0], row[1]
+        except sqlite3.Error as e:
+            UI_SINK.error(f"❌ Erreur lecture {table}: {e}")
+            return None, None
+
+
+@st.cache_resource(show_spinner=False)
+def get_sqlite_backend(path: str) -> SQLiteBackend:
+    """Base SQLite unique par processus et par fichier"""
+    return SQLiteBackend(path)
+
+
+def create_storage_backend() -> StorageBackend:
+    """
+    Instancie le moteur de stockage choisi dans les secrets (STORAGE_BACKEND)
+    
+    Returns:
+        SupabaseManager (par défaut) ou SQLiteBackend
+    """
+    backend = str(get_secret("STORAGE_BACKEND", STORAGE_BACKEND)).lower()
+    if backend == "sqlite":
+        return get_sqlite_backend(get_secret("SQLITE_PATH", SQLITE_PATH))
+    return SupabaseManager()
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# SECTION 3 : SYSTÈME DE SÉCURITÉ
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class SecurityLayer:
+    """Couche de sécurité pour toutes les actions sensibles"""
+    
+    @staticmethod
+    def verify_code(input_code: str) -> bool:
+        """Vérifie le code maître"""
+        return input_code == MASTER_CODE
+    
+    @staticmethod
+    def request_auth(action_name: str, key_suffix: str = "") -> bool:
+        """
+        Demande une autorisation pour une action sensible
+        
+        Args:
+            action_name: Nom de l'action (ex: "envoi email")
+            key_suffix: Suffixe unique pour le widget (évite les doublons)
+        
+        Returns:
+            True si autorisé, False sinon
+        """
+        st.warning(f"🔐 Action sensible : **{action_name}**")
+        st.info("⚠️ Code maître requis pour continuer")
+        
+        # Génération d'une clé unique pour le widget
+        widget_key = f"auth_{action_name}_{key_suffix}_{datetime.now().timestamp()}"
+        
+        code_input = st.text_input(
+            "Entrez le code maître",
+            type="password",
+            key=widget_key,
+            help="Code configuré dans le système"
+        )
+        
+        if code_input:
+            if SecurityLayer.verify_code(code_input):
+                st.success("✅ Code correct - Action autorisée")
+                return True
+            else:
+                st.error("❌ Code incorrect - Action refusée")
+                return False
+        
+        return False
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# SECTION 4 : SYSTÈME DE MÉMOIRE COGNITIVE
+# ═══════════════════════════════════════════════════════════════════════════════
+
+@st.cache_resource(show_spinner=False)
+def get_memory_executor() -> ThreadPoolExecutor:
+    """Pool de threads partagé pour les lectures concurrentes des mémoires"""
+    return ThreadPoolExecutor(max_workers=MEMORY_FETCH_WORKERS, thread_name_prefix="delta-memory")
+
+
+@st.cache_resource(show_spinner=False)
+def get_log_executor() -> ThreadPoolExecutor:
+    """Thread unique d'enregistrement des échanges (hors du rendu, dans l'ordre d'arrivée)"""
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="delta-log")
+
+
+class SemanticIndex:
+    """Index en mémoire des faits sémantiques : (catégorie, clé) -> fait"""
+    
+    def __init__(self, ttl: float = QUERY_CACHE_TTL["semantic_memory"]):
+        """
+        Initialisation de l'index (chargé au premier accès)
+        
+        Args:
+            ttl: Durée (secondes) avant rechargement complet depuis la base
+                 (prise en compte des écritures des autres processus)
+        """
+        self.ttl = ttl
+        self._facts: Dict[Tuple[str, str], Dict] = {}
+        self._by_key: Dict[str, List[Tuple[str, str]]] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def normalize(key: str) -> str:
+        """Forme canonique d'une clé ("Email principal" -> "email_principal")"""
+        return re.sub(r"[\s\-]+", "_", key.strip().lower())
+    
+    def _add(self, fact: Dict) -> None:
+        """Ajoute ou remplace un fait (verrou déjà pris)"""
+        slot = (fact["category"], fact["key"])
+        if slot not in self._facts:
+            self._by_key.setdefault(self.normalize(fact["key"]), []).append(slot)
+        self._facts[slot] = fact
+    
+    def ensure_loaded(self, db: StorageBackend) -> None:
+        """
+        Charge (ou recharge après expiration) tous les faits depuis la base
+        
+        Args:
+            db: Moteur de stockage des mémoires
+        """
+        with self._lock:
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl:
+                return
+            if not db.is_connected():
+                return
+            
+            self._facts.clear()
+            self._by_key.clear()
+            # Ordre croissant : en cas de doublons hérités, le plus récent l'emporte
+            for fact in db.iter_rows("semantic_memory", order_by="id", columns=SEMANTIC_COLUMNS,
+                                     descending=False):
+                self._add(fact)
+            self._loaded_at = time.monotonic()
+    
+    def update(self, fact: Dict) -> None:
+        """
+        Répercute une écriture réussie dans l'index
+        
+        Args:
+            fact: Fait écrit (category, key, value, created_at)
+        """
+        with self._lock:
+            if self._loaded_at is not None:
+                self._add(dict(fact))
+    
+    def get(self, category: str, key: str) -> Optional[Dict]:
+        """Fait exact (catégorie, clé), ou None"""
+        with self._lock:
+            fact = self._facts.get((category, key))
+            return dict(fact) if fact else None
+    
+    def find(self, key: str) -> List[Dict]:
+        """Faits de même clé normalisée, toutes catégories confondues"""
+        with self._lock:
+            return [dict(self._facts[slot]) for slot in self._by_key.get(self.normalize(key), [])]
+    
+    def __len__(self) -> int:
+        return len(self._facts)
+
+
+@st.cache_resource(show_spinner=False)
+def get_semantic_index(backend_name: str, location: str) -> SemanticIndex:
+    """Index sémantique unique par processus et par base"""
+    return SemanticIndex()
+
+
+def interaction_key(row: Dict) -> Tuple[str, str]:
+    """
+    Clé d'une interaction avant qu'elle ait un id (horodatage, contenu)
+    
+    L'horodatage est ramené aux microsecondes : PostgreSQL renvoie
+    "…:01.17+00:00" pour "…:01.170000" écrit par l'application.
+    """
+    stamp = str(row.get("timestamp"))
+    match = re.match(r"(\d{4}-\d\d-\d\d)[T ](\d\d:\d\d:\d\d)(?:\.(\d+))?", stamp)
+    if match:
+        stamp = f"{match.group(1)}T{match.group(2)}.{(match.group(3) or '').ljust(6, '0')[:6]}"
+    return stamp, row.get("content", "")
+
+
+class SearchIndex:
+    """Index inversé plein texte (BM25) des faits et des interactions"""
+    
+    def __init__(self):
+        """
+        Initialisation de l'index (construit en arrière-plan au premier accès, puis incrémental)
+        
+        Seuls les termes et les ids des interactions sont gardés en mémoire :
+        le contenu des meilleurs résultats est relu en base à chaque recherche.
+        """
+        self._docs: Dict[int, Tuple] = {}  # ("semantic", catégorie, clé, valeur) ou ("episodic", id, horodatage[, document])
+        self._lengths: Dict[int, int] = {}
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._vocabulary: List[str] = []
+        self._semantic_docs: Dict[Tuple[str, str], int] = {}
+        self._semantic_terms: Dict[int, Dict[str, int]] = {}
+        self._unconfirmed: Dict[Tuple[str, str], int] = {}  # Interactions indexées avant d'avoir un id
+        self._total_length = 0
+        self._next_doc = 0
+        self._last_id = 0
+        self._compacted_day: Optional[str] = None
+        self._synced = 0.0
+        self._db: Optional[StorageBackend] = None
+        self._resolve: Optional[Callable[[Iterator[Dict]], Iterator[Dict]]] = None
+        self._worker: Optional[threading.Thread] = None
+        self._last_error: Optional[str] = None
+        self._loaded = False
+        self._lock = threading.RLock()
+    
+    @staticmethod
+    def tokenize(text: str) -> List[str]:
+        """
+        Découpe un texte en termes : minuscules, accents retirés, mots vides ignorés
+        
+        Args:
+            text: Texte à découper
+        
+        Returns:
+            Termes dans l'ordre du texte ("Réunion à Genève" -> ["reunion", "geneve"])
+        """
+        folded = unicodedata.normalize("NFKD", text.lower())
+        folded = "".join(c for c in folded if not unicodedata.combining(c))
+        return [t for t in SEARCH_TOKEN_PATTERN.findall(folded) if t not in SEARCH_STOPWORDS]
+    
+    @staticmethod
+    def _metadata(row: Dict) -> Dict:
+        """Métadonnées d'une interaction (décodées si elles sont en texte)"""
+        metadata = row.get("metadata") or {}
+        if isinstance(metadata, str):
+            try:
+                metadata = json_loads(metadata)
+            except ValueError:
+                metadata = {}
+        return metadata if isinstance(metadata, dict) else {}
+    
+    # ───────────────────────────────────────────────────────────────────────────
+    # MISE À JOUR - Incrémentale (verrou déjà pris)
+    # ───────────────────────────────────────────────────────────────────────────
+    
+    def _add(self, doc: Tuple, text: str) -> Optional[int]:
+        """Indexe un document et renvoie son numéro (None si aucun terme)"""
+        counts: Dict[str, int] = {}
+        for term in self.tokenize(text):
+            counts[term] = counts.get(term, 0) + 1
+        if not counts:
+            return None
+        
+        doc_id = self._next_doc
+        self._next_doc += 1
+        self._docs[doc_id] = doc
+        self._lengths[doc_id] = sum(counts.values())
+        self._total_length += self._lengths[doc_id]
+        for term, tf in counts.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                if self._loaded:
+                    # Pendant la construction initiale, le vocabulaire est trié une seule fois
+                    bisect.insort(self._vocabulary, term)
+            postings[doc_id] = tf
+        
+        if doc[0] == "semantic":
+            # Termes conservés pour pouvoir retirer le fait s'il est remplacé
+            self._semantic_terms[doc_id] = counts
+        return doc_id
+    
+    def _remove(self, doc_id: int, terms: Iterable[str]) -> None:
+        """Retire un document de l'index"""
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is None or doc_id not in postings:
+                continue
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+                if self._loaded:
+                    del self._vocabulary[bisect.bisect_left(self._vocabulary, term)]
+        self._total_length -= self._lengths.pop(doc_id)
+        del self._docs[doc_id]
+    
+    def _remove_many(self, doc_ids: Set[int]) -> None:
+        """Retire des interactions dont les termes ne sont pas conservés (un parcours des listes)"""
+        if not doc_ids:
+            return
+        for term in list(self._postings):
+            postings = self._postings[term]
+            if len(postings) <= len(doc_ids):
+                for doc_id in [d for d in postings if d in doc_ids]:
+                    del postings[doc_id]
+            else:
+                for doc_id in doc_ids:
+                    postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+        for doc_id in doc_ids:
+            self._total_length -= self._lengths.pop(doc_id)
+            del self._docs[doc_id]
+        self._unconfirmed = {k: d for k, d in self._unconfirmed.items() if d not in doc_ids}
+        if self._loaded:
+            self._vocabulary = sorted(self._postings)
+    
+    def _remove_semantic(self, slot: Tuple[str, str]) -> None:
+        """Retire l'ancienne version d'un fait (upsert)"""
+        doc_id = self._semantic_docs.pop(slot, None)
+        if doc_id is not None:
+            self._remove(doc_id, self._semantic_terms.pop(doc_id, {}))
+    
+    def _add_semantic(self, fact: Dict) -> None:
+        """Indexe un fait (clé et valeur)"""
+        slot = (fact["category"], fact["key"])
+        self._remove_semantic(slot)
+        doc = ("semantic", fact["category"], fact["key"], fact["value"])
+        doc_id = self._add(doc, f"{fact['key'].replace('_', ' ')} {fact['value']}")
+        if doc_id is not None:
+            self._semantic_docs[slot] = doc_id
+    
+    def _add_episodic(self, row: Dict) -> None:
+        """
+        Indexe une interaction (contenu et réponse de DELTA)
+        
+        Une interaction sans id (écriture différée) garde son document jusqu'à
+        ce que la mise à jour suivante la relise en base ; elle n'est alors
+        pas réindexée, seul son id remplace le document.
+        """
+        key = interaction_key(row)
+        stamp = str(row.get("timestamp"))
+        if row.get("id") is None:
+            response = self._metadata(row).get("response", "")
+            doc = {
+                "source": "episodic",
+                "timestamp": row.get("timestamp"),
+                "interaction_type": row.get("interaction_type"),
+                "content": row.get("content", ""),
+                "response": response
+            }
+            doc_id = self._add(("episodic", None, stamp, doc), f"{doc['content']} {response}")
+            if doc_id is not None:
+                self._unconfirmed[key] = doc_id
+            return
+        
+        self._last_id = max(self._last_id, row["id"])
+        known = self._unconfirmed.pop(key, None)
+        if known is not None:
+            self._docs[known] = ("episodic", row["id"], stamp)
+            return
+        response = self._metadata(row).get("response", "")
+        self._add(("episodic", row["id"], stamp), f"{row.get('content', '')} {response}")
+    
+    def forget_range(self, start: str, end: str) -> None:
+        """Retire les interactions horodatées dans [start, end) (compactées par la rétention)"""
+        with self._lock:
+            self._remove_many({
+                doc_id for doc_id, doc in self._docs.items()
+                if doc[0] == "episodic" and start <= doc[2] < end
+            })
+    
+    # ───────────────────────────────────────────────────────────────────────────
+    # SYNCHRONISATION - Construction et mises à jour en arrière-plan
+    # ───────────────────────────────────────────────────────────────────────────
+    
+    def ensure_loaded(self, db: StorageBackend,
+                      resolve: Optional[Callable[[Iterator[Dict]], Iterator[Dict]]] = None) -> None:
+        """
+        Lance la construction de l'index en arrière-plan au premier appel, puis
+        sa mise à jour depuis la base au plus une fois par SEARCH_SYNC_INTERVAL
+        (écritures des autres processus, jours compactés par la rétention)
+        
+        Args:
+            db: Moteur de stockage des mémoires
+            resolve: Résolution des contenus référencés par empreinte (BlobStore.resolve_iter)
+        """
+        with self._lock:
+            self._db, self._resolve = db, resolve
+            if not db.is_connected() or (self._worker is not None and self._worker.is_alive()):
+                return
+            if self._synced and time.monotonic() - self._synced < SEARCH_SYNC_INTERVAL:
+                return
+            self._worker = threading.Thread(target=self._sync, name="delta-search-index", daemon=True)
+            self._worker.start()
+    
+    def ready(self) -> bool:
+        """L'index est construit (sinon la recherche lit directement la base)"""
+        return self._loaded
+    
+    def _sync(self) -> None:
+        """Lit les faits (à la construction), les interactions après le filigrane et les jours compactés"""
+        db = self._db
+        try:
+            if not self._loaded:
+                for fact in db.iter_rows("semantic_memory", order_by="id", page_size=SEARCH_INDEX_PAGE_SIZE,
+                                         columns="id,category,key,value", descending=False):
+                    with self._lock:
+                        self._add_semantic(fact)
+            
+            # Une page à la fois sous le verrou : les recherches restent servies pendant la lecture
+            last_id = self._last_id
+            while True:
+                page = db.query("episodic_memory").select("id,timestamp,interaction_type,content,metadata") \
+                    .gt("id", last_id).order("id").limit(SEARCH_INDEX_PAGE_SIZE).execute(use_cache=False)
+                rows = list(self._resolve(iter(page))) if self._resolve else page
+                with self._lock:
+                    for row in rows:
+                        self._add_episodic(row)
+                if len(page) < SEARCH_INDEX_PAGE_SIZE:
+                    break
+                last_id = page[-1]["id"]
+            
+            # Jours compactés (par ce processus ou un autre) depuis la dernière mise à jour
+            marks = db.query("memory_watermarks").select("value").eq("job", "episodic_retention").limit(1) \
+                .execute(use_cache=False)
+            day = marks[0]["value"] if marks else None
+            if day is not None and day != self._compacted_day:
+                end = f"{(datetime.fromisoformat(day) + timedelta(days=1)).date().isoformat()}T00:00:00"
+                self.forget_range("", end)
+                self._compacted_day = day
+            
+            with self._lock:
+                if not self._loaded:
+                    self._vocabulary = sorted(self._postings)
+                    self._loaded = True
+            self._last_error = None
+        except Exception as e:
+            self._last_error = str(e)
+        finally:
+            self._synced = time.monotonic()
+    
+    def add_fact(self, fact: Dict) -> None:
+        """Indexe un fait écrit (remplace sa version précédente, même pendant la construction)"""
+        with self._lock:
+            self._add_semantic(fact)
+    
+    def add_interaction(self, row: Dict) -> None:
+        """Indexe une interaction enregistrée (celles écrites pendant la construction sont relues en base)"""
+        with self._lock:
+            if self._loaded:
+                self._add_episodic(row)
+    
+    # ───────────────────────────────────────────────────────────────────────────
+    # RECHERCHE - Classement BM25, documents relus en base
+    # ───────────────────────────────────────────────────────────────────────────
+    
+    def _expand(self, term: str) -> List[str]:
+        """Termes du vocabulaire commençant par un préfixe"""
+        start = bisect.bisect_left(self._vocabulary, term)
+        end = bisect.bisect_left(self._vocabulary, term + "\uffff")
+        return self._vocabulary[start:end][:SEARCH_PREFIX_EXPANSIONS]
+    
+    def _fetch(self, ids: List[int]) -> Dict[int, Dict]:
+        """Documents des interactions trouvées (une requête)"""
+        if not ids or self._db is None:
+            return {}
+        return self._documents(self._db.query("episodic_memory").select("id,timestamp,interaction_type,content,metadata")
+                               .in_("id", ids).limit(len(ids)).execute())
+    
+    def _documents(self, rows: List[Dict]) -> Dict[int, Dict]:
+        """Documents de résultat des interactions lues (contenus référencés résolus), par id"""
+        if self._resolve:
+            rows = list(self._resolve(iter(rows)))
+        return {
+            row["id"]: {
+                "source": "episodic",
+                "timestamp": row.get("timestamp"),
+                "interaction_type": row.get("interaction_type"),
+                "content": row.get("content", ""),
+                "response": self._metadata(row).get("response", "")
+            }
+            for row in rows
+        }
+    
+    def _scan(self, query: str, limit: int, source: Optional[str]) -> List[Dict]:
+        """Recherche simple en base (sous-chaîne) tant que l'index est en construction"""
+        text = query.replace("*", "").strip()
+        if not text or self._db is None or source == "semantic":
+            return []
+        rows = self._db.query("episodic_memory").select("id,timestamp,interaction_type,content,metadata") \
+            .ilike("content", f"%{text}%").order("id", desc=True).limit(limit).execute()
+        return [{**doc, "score": 0.0} for doc in self._documents(rows).values()]
+    
+    def search(self, query: str, limit: int = SEARCH_RESULTS_LIMIT,
+               source: Optional[str] = None) -> List[Dict]:
+        """
+        Recherche classée par pertinence (BM25)
+        
+        Un terme suivi de * est un préfixe ("répon*" trouve "réponse", "répondre").
+        Tant que l'index est en construction, les interactions dont le contenu
+        contient le texte sont lues en base (sans classement).
+        
+        Args:
+            query: Texte recherché
+            limit: Nombre maximum de résultats
+            source: "semantic" ou "episodic" pour restreindre la recherche
+        
+        Returns:
+            Documents trouvés (avec "score"), du plus pertinent au moins pertinent
+        """
+        if not self._loaded:
+            return self._scan(query, limit, source)
+        
+        words = re.findall(r"\S+", query)
+        with self._lock:
+            count = len(self._docs)
+            if not count:
+                return []
+            average_length = self._total_length / count
+            
+            scores: Dict[int, float] = {}
+            for word in words:
+                for token in self.tokenize(word.rstrip("*")):
+                    terms = self._expand(token) if word.endswith("*") else [token]
+                    for term in terms:
+                        postings = self._postings.get(term)
+                        if not postings:
+                            continue
+                        idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                        for doc_id, tf in postings.items():
+                            norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[doc_id] / average_length)
+                            scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+            
+            if source is not None:
+                scores = {d: s for d, s in scores.items() if self._docs[d][0] == source}
+            best = [(self._docs[doc_id], score)
+                    for doc_id, score in heapq.nlargest(limit, scores.items(), key=lambda item: item[1])]
+        
+        # Contenus relus hors verrou ; une interaction supprimée entre-temps est ignorée
+        documents = self._fetch([doc[1] for doc, _ in best if doc[0] == "episodic" and doc[1] is not None])
+        results = []
+        for doc, score in best:
+            if doc[0] == "semantic":
+                found = {"source": "semantic", "category": doc[1], "key": doc[2], "value": doc[3]}
+            else:
+                found = doc[3] if doc[1] is None else documents.get(doc[1])
+            if found is not None:
+                results.append({**found, "score": round(score, 3)})
+        return results
+    
+    def stats(self) -> Dict[str, Any]:
+        """Nombre de documents et de termes indexés, état de la construction et dernière erreur"""
+        with self._lock:
+            return {"documents": len(self._docs), "terms": len(self._postings), "ready": self._loaded,
+                    "last_error": self._last_error}
+
+
+@st.cache_resource(show_spinner=False)
+def get_search_index(backend_name: str, location: str) -> SearchIndex:
+    """Index de recherche unique par processus et par base"""
+    return SearchIndex()
+
+
+class VectorIndex:
+    """Vecteurs n-grammes hachés des faits et interactions, rappel par similarité cosinus"""
+    
+    def __init__(self, path: str, dim: int = VECTOR_DIM, chunk_rows: int = VECTOR_CHUNK_ROWS):
+        """
+        Initialisation de l'index (construit ou rouvert en arrière-plan au premier accès)
+        
+        Seuls les vecteurs et l'id (ou la clé du fait) de chaque ligne sont
+        gardés : le texte des meilleurs résultats est relu en base au rappel.
+        
+        Args:
+            path: Préfixe des fichiers (matrice .f32 et descriptions .jsonl)
+            dim: Dimension des vecteurs
+            chunk_rows: Lignes ajoutées à la matrice quand elle est pleine
+        """
+        self.path = path
+        self.dim = dim
+        self.chunk_rows = chunk_rows
+        
+        self._matrix = None
+        self._capacity = 0
+        self._docs: List[Tuple] = []  # ("semantic", catégorie, clé), ("episodic", id, horodatage) ou (None,)
+        self._kinds = bytearray()  # Source de chaque ligne (masque numpy sans copie)
+        self._semantic_rows: Dict[Tuple[str, str], int] = {}
+        self._unconfirmed: Dict[Tuple[str, str], int] = {}  # Interactions vectorisées avant d'avoir un id
+        self._pending: Dict[int, Dict] = {}  # Documents de ces interactions, jusqu'à leur relecture en base
+        self._last_id = 0  # Dernière interaction de la base vectorisée (ids journalisés)
+        self._synced = 0.0
+        self._db: Optional[StorageBackend] = None
+        self._resolve: Optional[Callable[[Iterator[Dict]], Iterator[Dict]]] = None
+        self._worker: Optional[threading.Thread] = None
+        self._last_error: Optional[str] = None
+        self._journal = None
+        self._lock_file = None
+        self._private = False
+        self._loaded = False
+        self._lock = threading.RLock()
+    
+    # ───────────────────────────────────────────────────────────────────────────
+    # VECTORISATION - Locale, sans modèle
+    # ───────────────────────────────────────────────────────────────────────────
+    
+    def embed(self, text: str) -> np.ndarray:
+        """
+        Vecteur normalisé d'un texte (mots et trigrammes de caractères hachés)
+        
+        Args:
+            text: Texte à vectoriser
+        
+        Returns:
+            Vecteur float32 de norme 1 (nul si le texte n'a aucun terme)
+        """
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in SearchIndex.tokenize(text):
+            padded = f"#{word}#"
+            features = [(word, 1.0)] + [(padded[i:i + 3], 0.5) for i in range(len(padded) - 2)]
+            for feature, weight in features:
+                # crc32 : hachage stable d'un processus à l'autre (contrairement à hash())
+                h = zlib.crc32(feature.encode())
+                vector[h % self.dim] += weight if h & 0x80000000 else -weight
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+    
+    # ───────────────────────────────────────────────────────────────────────────
+    # STOCKAGE - Matrice contiguë np.memmap, agrandie par blocs
+    # ───────────────────────────────────────────────────────────────────────────
+    
+    def _grow(self, rows: int) -> None:
+        """Agrandit le fichier de la matrice par blocs pour contenir au moins rows lignes"""
+        if rows <= self._capacity:
+            return
+        capacity = -(-rows // self.chunk_rows) * self.chunk_rows
+        if self._matrix is not None:
+            self._matrix.flush()
+            self._matrix = None
+        with open(f"{self.path}.f32", "ab") as f:
+            f.truncate(capacity * self.dim * 4)
+        self._matrix = np.memmap(f"{self.path}.f32", dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        self._capacity = capacity
+    
+    @staticmethod
+    def _describe(doc: Tuple) -> Dict:
+        """Ligne du journal décrivant un document (sans son texte)"""
+        if doc[0] == "semantic":
+            return {"source": "semantic", "category": doc[1], "key": doc[2]}
+        if doc[0] == "episodic":
+            return {"source": "episodic", "id": doc[1], "timestamp": doc[2]}
+        return {"source": None}
+    
+    def _put(self, row: int, doc: Tuple, vector: np.ndarray, journal: bool = True) -> None:
+        """Écrit un vecteur et journalise sa description (verrou déjà pris)"""
+        self._grow(row + 1)
+        self._matrix[row] = vector
+        if row == len(self._docs):
+            self._docs.append(doc)
+            self._kinds.append(VECTOR_SOURCES[doc[0]])
+        else:
+            self._docs[row] = doc
+            self._kinds[row] = VECTOR_SOURCES[doc[0]]
+        if journal and self._journal is not None:
+            self._journal.write(json_dumps({"row": row, **self._describe(doc)}) + "\n")
+    
+    def _add_fact(self, fact: Dict) -> None:
+        """Vectorise un fait (remplace sa version précédente)"""
+        slot = (fact["category"], fact["key"])
+        row = self._semantic_rows.get(slot, len(self._docs))
+        self._put(row, ("semantic", fact["category"], fact["key"]),
+                  self.embed(f"{fact['key'].replace('_', ' ')} {fact['value']}"))
+        self._semantic_rows[slot] = row
+    
+    def _add_interaction(self, row: Dict) -> None:
+        """
+        Vectorise une interaction (le contenu seul : c'est lui qui est comparé aux commandes)
+        
+        Une interaction sans id (écriture différée) est vectorisée tout de suite
+        et garde son document ; elle n'est journalisée qu'au rattrapage qui la
+        relit en base, avec son id : le filigrane du journal ne compte ainsi que
+        des lignes écrites.
+        """
+        key = interaction_key(row)
+        stamp = str(row.get("timestamp"))
+        if row.get("id") is None:
+            metadata = SearchIndex._metadata(row)
+            position = len(self._docs)
+            self._unconfirmed[key] = position
+            self._pending[position] = {
+                "source": "episodic",
+                "timestamp": row.get("timestamp"),
+                "interaction_type": row.get("interaction_type"),
+                "content": row.get("content", ""),
+                "response": metadata.get("response", "")
+            }
+            self._put(position, ("episodic", None, stamp), self.embed(row.get("content", "")), journal=False)
+            return
+        
+        self._last_id = max(self._last_id, row["id"])
+        known = self._unconfirmed.pop(key, None)
+        if known is not None:
+            self._pending.pop(known, None)
+            self._docs[known] = ("episodic", row["id"], stamp)
+            if self._journal is not None:
+                self._journal.write(json_dumps({"row": known, **self._describe(self._docs[known])}) + "\n")
+            return
+        self._put(len(self._docs), ("episodic", row["id"], stamp), self.embed(row.get("content", "")))
+    
+    # ───────────────────────────────────────────────────────────────────────────
+    # SYNCHRONISATION - Ouverture, construction et rattrapage en arrière-plan
+    # ───────────────────────────────────────────────────────────────────────────
+    
+    def _claim_files(self) -> None:
+        """
+        Verrouille les fichiers de l'index ; s'ils sont déjà utilisés par un autre
+        processus (application et mode batch), l'index prend des fichiers propres
+        à ce processus, supprimés à sa sortie
+        """
+        if fcntl is None or self._lock_file is not None or self._private:
+            return
+        lock_file = open(f"{self.path}.lock", "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            self.path = f"{self.path}.{os.getpid()}"
+            self._private = True
+            atexit.register(self.reset)
+            return
+        self._lock_file = lock_file
+    
+    def _open(self) -> bool:
+        """
+        Relit le journal des descriptions (verrou déjà pris)
+        
+        Returns:
+            True si un journal utilisable a été relu, False s'il faut construire l'index
+        """
+        journal_path = f"{self.path}.jsonl"
+        if not (os.path.exists(journal_path) and os.path.exists(f"{self.path}.f32")):
+            return False
+        with open(journal_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json_loads(line)
+                except ValueError:
+                    continue  # Dernière ligne tronquée par un arrêt brutal
+                source = entry.get("source")
+                if source == "episodic" and entry.get("id") is None:
+                    return False  # Journal d'une version précédente (interactions sans id)
+                row = entry["row"]
+                missing = max(row + 1 - len(self._docs), 0)
+                self._docs.extend([(None,)] * missing)
+                self._kinds.extend(bytes(missing))
+                if source == "semantic":
+                    self._docs[row] = ("semantic", entry["category"], entry["key"])
+                    self._semantic_rows[(entry["category"], entry["key"])] = row
+                elif source == "episodic":
+                    self._docs[row] = ("episodic", entry["id"], str(entry.get("timestamp")))
+                    self._last_id = max(self._last_id, entry["id"])
+                else:
+                    self._docs[row] = (None,)
+                self._kinds[row] = VECTOR_SOURCES.get(source, 0)
+        self._grow(max(len(self._docs), 1))
+        return True
+    
+    def _clear(self) -> None:
+        """Vide l'index en mémoire et supprime ses fichiers (verrou déjà pris)"""
+        if self._journal is not None:
+            self._journal.close()
+        self._matrix = None
+        self._capacity = 0
+        self._docs = []
+        self._kinds = bytearray()
+        self._semantic_rows = {}
+        self._unconfirmed = {}
+        self._pending = {}
+        self._last_id = 0
+        self._journal = None
+        self._loaded = False
+        for suffix in (".f32", ".jsonl"):
+            if os.path.exists(f"{self.path}{suffix}"):
+                os.remove(f"{self.path}{suffix}")
+    
+    def _sync(self) -> None:
+        """Ouvre ou construit l'index, puis vectorise les interactions écrites après le filigrane"""
+        db = self._db
+        try:
+            if not self._loaded and self._journal is None:
+                with self._lock:
+                    self._claim_files()
+                    build = not self._open()
+                    if build:
+                        self._clear()
+                    # Journal écrit au fil de la construction : une construction
+                    # interrompue reprend à son dernier id au démarrage suivant
+                    self._journal = open(f"{self.path}.jsonl", "a", encoding="utf-8", buffering=1)
+                if build:
+                    for fact in db.iter_rows("semantic_memory", order_by="id", page_size=SEARCH_INDEX_PAGE_SIZE,
+                                             columns="id,category,key,value", descending=False):
+                        with self._lock:
+                            self._add_fact(fact)
+            
+            # Une page à la fois sous le verrou : le rappel reste servi pendant la lecture
+            last_id = self._last_id
+            while True:
+                page = db.query("episodic_memory").select("id,timestamp,content") \
+                    .gt("id", last_id).order("id").limit(SEARCH_INDEX_PAGE_SIZE).execute(use_cache=False)
+                with self._lock:
+                    for row in page:
+                        self._add_interaction(row)
+                if len(page) < SEARCH_INDEX_PAGE_SIZE:
+                    break
+                last_id = page[-1]["id"]
+            
+            self._loaded = True
+            self._last_error = None
+        except Exception as e:
+            self._last_error = str(e)
+        finally:
+            self._synced = time.monotonic()
+    
+    def ensure_loaded(self, db: StorageBackend,
+                      resolve: Optional[Callable[[Iterator[Dict]], Iterator[Dict]]] = None) -> None:
+        """
+        Lance l'ouverture (ou la construction) de l'index en arrière-plan au premier
+        appel, puis le rattrapage des interactions écrites ailleurs (application
+        arrêtée, mode batch) au plus une fois par VECTOR_SYNC_INTERVAL
+        
+        Args:
+            db: Moteur de stockage des mémoires
+            resolve: Résolution des contenus référencés par empreinte (BlobStore.resolve_iter)
+        """
+        with self._lock:
+            self._db, self._resolve = db, resolve
+            if not db.is_connected() or (self._worker is not None and self._worker.is_alive()):
+                return
+            if self._synced and time.monotonic() - self._synced < VECTOR_SYNC_INTERVAL:
+                return
+            self._worker = threading.Thread(target=self._sync, name="delta-vector-index", daemon=True)
+            self._worker.start()
+    
+    def ready(self) -> bool:
+        """L'index est ouvert ou construit (sinon le rappel ne renvoie rien)"""
+        return self._loaded
+    
+    def add_fact(self, fact: Dict) -> None:
+        """Vectorise un fait écrit (dès que les fichiers sont ouverts, même pendant la construction)"""
+        with self._lock:
+            if self._journal is not None:
+                self._add_fact(fact)
+    
+    def add_interaction(self, row: Dict) -> None:
+        """Vectorise une interaction enregistrée (celles écrites pendant la construction sont relues en base)"""
+        with self._lock:
+            if self._loaded:
+                self._add_interaction(row)
+    
+    def forget_range(self, start: str, end: str) -> None:
+        """Efface les interactions horodatées dans [start, end) (lignes vidées, journalisées)"""
+        with self._lock:
+            for row, doc in enumerate(self._docs):
+                if doc[0] == "episodic" and start <= doc[2] < end:
+                    self._matrix[row] = 0.0
+                    self._docs[row] = (None,)
+                    self._kinds[row] = 0
+                    self._pending.pop(row, None)
+                    if self._journal is not None:
+                        self._journal.write(json_dumps({"row": row, "source": None}) + "\n")
+    
+    # ───────────────────────────────────────────────────────────────────────────
+    # RAPPEL - Un produit matriciel, top-k par argpartition, textes relus en base
+    # ───────────────────────────────────────────────────────────────────────────
+    
+    def _fetch(self, docs: List[Tuple]) -> Dict[Tuple, Dict]:
+        """Documents des lignes retenues (une requête par source, contenus référencés résolus)"""
+        found: Dict[Tuple, Dict] = {}
+        if self._db is None:
+            return found
+        ids = sorted({doc[1] for doc in docs if doc[0] == "episodic" and doc[1] is not None})
+        if ids:
+            rows = self._db.query("episodic_memory").select("id,timestamp,interaction_type,content,metadata") \
+                .in_("id", ids).limit(len(ids)).execute()
+            for row in self._resolve(iter(rows)) if self._resolve else rows:
+                found[("episodic", row["id"])] = {
+                    "source": "episodic",
+                    "timestamp": row.get("timestamp"),
+                    "interaction_type": row.get("interaction_type"),
+                    "content": row.get("content", ""),
+                    "response": SearchIndex._metadata(row).get("response", "")
+                }
+        keys = sorted({doc[2] for doc in docs if doc[0] == "semantic"})
+        if keys:
+            for fact in self._db.query("semantic_memory").select("category,key,value").in_("key", keys) \
+                    .limit(len(keys) * len(SEMANTIC_CATEGORIES)).execute():
+                found[("semantic", fact["category"], fact["key"])] = {
+                    "source": "semantic", "category": fact["category"], "key": fact["key"], "value": fact["value"]
+                }
+        return found
+    
+    def recall_many(self, queries: List[str], limit: int = RECALL_RESULTS_LIMIT,
+                    source: Optional[str] = None, min_score: float = 0.0) -> List[List[Dict]]:
+        """
+        Documents les plus similaires à plusieurs textes (un seul produit matriciel)
+        
+        Args:
+            queries: Textes recherchés
+            limit: Nombre maximum de résultats par texte
+            source: "semantic" ou "episodic" pour restreindre le rappel
+            min_score: Similarité cosinus minimale
+        
+        Returns:
+            Une liste de résultats (avec "score") par texte, du plus similaire au moins
+            similaire ; aucun tant que l'index n'est pas prêt
+        """
+        with self._lock:
+            count = len(self._docs)
+            if not self._loaded or not count or not queries:
+                return [[] for _ in queries]
+            
+            query_matrix = np.stack([self.embed(q) for q in queries])
+            scores = self._matrix[:count] @ query_matrix.T
+            kinds = np.frombuffer(self._kinds, dtype=np.uint8, count=count)
+            scores[kinds == 0] = -np.inf
+            if source is not None:
+                scores[kinds != VECTOR_SOURCES[source]] = -np.inf
+            
+            k = min(limit, count)
+            hits = []
+            for column in scores.T:
+                top = np.argpartition(-column, k - 1)[:k]
+                top = top[np.argsort(-column[top])]
+                hits.append([(self._docs[row], self._pending.get(row), round(float(column[row]), 3))
+                             for row in top if column[row] > min_score])
+        
+        # Textes relus hors verrou ; une ligne supprimée entre-temps est ignorée
+        documents = self._fetch([doc for column in hits for doc, _, _ in column])
+        results = []
+        for column in hits:
+            found = []
+            for doc, pending, score in column:
+                document = pending if pending is not None else documents.get(doc[:2] if doc[0] == "episodic" else doc)
+                if document is not None:
+                    found.append({**document, "score": score})
+            results.append(found)
+        return results
+    
+    def stats(self) -> Dict[str, Any]:
+        """Nombre de vecteurs, capacité de la matrice, état et dernière erreur"""
+        with self._lock:
+            return {"vectors": len(self._docs), "capacity": self._capacity, "dim": self.dim,
+                    "ready": self._loaded, "last_error": self._last_error}
+    
+    def reset(self) -> None:
+        """Supprime les fichiers de l'index : il sera reconstruit depuis la base au prochain accès"""
+        with self._lock:
+            self._clear()
+            self._synced = 0.0
+
+
+@st.cache_resource(show_spinner=False)
+def get_vector_index(backend_name: str, location: str) -> VectorIndex:
+    """Index vectoriel unique par processus et par base (fichiers propres à chaque base)"""
+    suffix = hashlib.md5(f"{backend_name}:{location}".encode()).hexdigest()[:8]
+    return VectorIndex(f"{VECTOR_STORE_PATH}_{suffix}")
+
+
+class RetentionEngine:
+    """Rétention par paliers de l'historique : brut récent, résumés et archives compressées"""
+    
+    def __init__(self, db: StorageBackend, hot_days: Optional[int] = None,
+                 interval: float = RETENTION_INTERVAL, enabled: Optional[bool] = None):
+        """
+        Initialisation et démarrage du compactage périodique en arrière-plan
+        
+        Le compactage supprime des lignes brutes : il ne tourne que si
+        RETENTION_ENABLED est activé (secrets ou environnement).
+        
+        Args:
+            db: Moteur de stockage des mémoires
+            hot_days: Jours d'historique conservés en entier (RETENTION_HOT_DAYS si None)
+            interval: Intervalle (secondes) entre deux passes
+            enabled: Active le compactage (RETENTION_ENABLED si None)
+        """
+        self.db = db
+        if enabled is None:
+            enabled = str(get_secret("RETENTION_ENABLED", RETENTION_ENABLED)).lower() in ("1", "true", "oui")
+        self.enabled = enabled
+        self.hot_days = int(get_secret("RETENTION_HOT_DAYS", RETENTION_HOT_DAYS)) if hot_days is None else hot_days
+        self.interval = interval
+        
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._listeners: List[Callable[[str, str], None]] = []
+        self._stats = {"runs": 0, "days": 0, "compacted_rows": 0, "last_run": None, "last_error": None}
+        
+        if self.enabled:
+            self._thread = threading.Thread(target=self._run, name="delta-retention", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+    
+    def add_listener(self, callback: Callable[[str, str], None]) -> None:
+        """
+        Abonne un index aux suppressions (appelé avec les bornes [début, fin) du jour compacté)
+        
+        Args:
+            callback: Fonction (début, fin) appelée après chaque suppression
+        """
+        with self._lock:
+            if callback not in self._listeners:
+                self._listeners.append(callback)
+    
+    # ───────────────────────────────────────────────────────────────────────────
+    # FILIGRANE - Dernier jour compacté
+    # ───────────────────────────────────────────────────────────────────────────
+    
+    def watermark(self) -> Optional[str]:
+        """Dernier jour (AAAA-MM-JJ) entièrement compacté, ou None"""
+        rows = self.db.query("memory_watermarks").select("value").eq("job", "episodic_retention").limit(1) \
+            .execute(use_cache=False)
+        return rows[0]["value"] if rows else None
+    
+    def _set_watermark(self, day: str) -> bool:
+        """Enregistre le dernier jour compacté"""
+        return self.db.upsert(
+            "memory_watermarks",
+            {"job": "episodic_retention", "value": day, "updated_at": datetime.now().isoformat()},
+            on_conflict=["job"]
+        )
+    
+    # ───────────────────────────────────────────────────────────────────────────
+    # COMPACTAGE - Un jour à la fois
+    # ───────────────────────────────────────────────────────────────────────────
+    
+    def _day_rows(self, start: str, end: str) -> List[Dict]:
+        """Lignes brutes d'un jour, lues par pages sur l'id"""
+        rows: List[Dict] = []
+        last_id = 0
+        while True:
+            page = self.db.query("episodic_memory").gte("timestamp", start).lt("timestamp", end) \
+                .gt("id", last_id).order("id").limit(RETENTION_PAGE_ROWS).execute(use_cache=False)
+            rows.extend(page)
+            if len(page) < RETENTION_PAGE_ROWS:
+                return rows
+            last_id = page[-1]["id"]
+    
+    def compact_day(self, day: str) -> int:
+        """
+        Résume et archive les interactions d'un jour, puis les retire de la table chaude
+        
+        L'archive et le résumé sont écrits avant la suppression, par upsert sur
+        (jour, type) : une passe interrompue peut être rejouée sans perte.
+        
+        Args:
+            day: Jour à compacter (AAAA-MM-JJ)
+        
+        Returns:
+            Nombre de lignes brutes compactées
+        
+        Raises:
+            RuntimeError: si une écriture échoue (le jour sera retenté)
+        """
+        start = f"{day}T00:00:00"
+        end = f"{(datetime.fromisoformat(day) + timedelta(days=1)).date().isoformat()}T00:00:00"
+        rows = self._day_rows(start, end)
+        if not rows:
+            return 0
+        
+        by_type: Dict[str, List[Dict]] = {}
+        for row in rows:
+            by_type.setdefault(row["interaction_type"], []).append(row)
+        
+        for interaction_type, group in by_type.items():
+            timestamps = [str(row["timestamp"]) for row in group]
+            payload = "\n".join(json_dumps(row) for row in group)
+            archive = {
+                "day": day,
+                "interaction_type": interaction_type,
+                "row_count": len(group),
+                "first_id": group[0]["id"],
+                "last_id": group[-1]["id"],
+                "payload": base64.b64encode(zlib.compress(payload.encode("utf-8"), 9)).decode("ascii"),
+                "created_at": datetime.now().isoformat()
+            }
+            summary = {
+                "day": day,
+                "interaction_type": interaction_type,
+                "interaction_count": len(group),
+                "first_timestamp": min(timestamps),
+                "last_timestamp": max(timestamps),
+                "sample": " · ".join(row["content"][:80] for row in group[:RETENTION_SUMMARY_SAMPLES])
+            }
+            if not (self.db.upsert("episodic_archive", archive, on_conflict=["day", "interaction_type"])
+                    and self.db.upsert("episodic_summary", summary, on_conflict=["day", "interaction_type"])):
+                raise RuntimeError(f"écriture du résumé du {day} ({interaction_type}) impossible")
+        
+        # Seules les lignes lues (id <= dernier id) sont supprimées
+        deleted = self.db.query("episodic_memory").gte("timestamp", start).lt("timestamp", end) \
+            .lte("id", max(row["id"] for row in rows)).delete()
+        if not deleted:
+            raise RuntimeError(f"suppression des lignes du {day} impossible")
+        for callback in self._listeners:
+            callback(start, end)
+        return len(rows)
+    
+    def run_once(self, max_days: int = RETENTION_MAX_DAYS_PER_RUN) -> int:
+        """
+        Compacte les jours plus anciens que la fenêtre chaude, à partir du filigrane
+        
+        Args:
+            max_days: Nombre maximum de jours traités par passe
+        
+        Returns:
+            Nombre de lignes brutes compactées
+        """
+        with self._lock:
+            if not self.enabled or not self.db.is_connected():
+                return 0
+            
+            # Les interactions encore dans le tampon d'écriture doivent être en base
+            self.db.flush("episodic_memory")
+            
+            cutoff = (datetime.now() - timedelta(days=self.hot_days)).date()
+            oldest, _ = self.db.time_range("episodic_memory", "timestamp")
+            if oldest is None:
+                return 0
+            day = datetime.fromisoformat(str(oldest)[:10]).date()
+            watermark = self.watermark()
+            if watermark is not None:
+                day = max(day, datetime.fromisoformat(watermark).date() + timedelta(days=1))
+            
+            compacted = 0
+            try:
+                for _ in range(max_days):
+                    if day >= cutoff:
+                        break
+                    compacted += self.compact_day(day.isoformat())
+                    if not self._set_watermark(day.isoformat()):
+                        raise RuntimeError("filigrane non enregistré")
+                    self._stats["days"] += 1
+                    day += timedelta(days=1)
+                self._stats["last_error"] = None
+            except Exception as e:
+                self._stats["last_error"] = str(e)
+            
+            self._stats["runs"] += 1
+            self._stats["compacted_rows"] += compacted
+            self._stats["last_run"] = datetime.now().isoformat(timespec="seconds")
+            return compacted
+    
+    def _run(self) -> None:
+        """Boucle du thread : une passe au démarrage, puis à chaque intervalle"""
+        delay = RETENTION_STARTUP_DELAY
+        while not self._stop.wait(delay):
+            try:
+                self.run_once()
+            except Exception as e:
+                self._stats["last_error"] = str(e)
+            delay = self.interval
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Statistiques du compactage
+        
+        Returns:
+            Passes, jours et lignes compactés, dernière passe et dernière erreur
+        """
+        return dict(self._stats, hot_days=self.hot_days, enabled=self.enabled)
+    
+    def close(self) -> None:
+        """Arrête le thread de compactage"""
+        self._stop.set()
+
+
+@st.cache_resource(show_spinner=False)
+def get_retention_engine(backend_name: str, location: str, _db: StorageBackend) -> RetentionEngine:
+    """Moteur de rétention unique par processus et par base"""
+    return RetentionEngine(_db)
+
+
+class HabitMiner:
+    """Détection des routines à partir des horodatages de l'historique (calcul NumPy)"""
+    
+    def __init__(self, db: StorageBackend, interval: float = HABIT_MINING_INTERVAL):
+        """
+        Initialisation et démarrage de l'analyse périodique en arrière-plan
+        
+        Args:
+            db: Moteur de stockage des mémoires
+            interval: Intervalle (secondes) entre deux analyses
+        """
+        self.db = db
+        self.interval = interval
+        
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._stats = {"runs": 0, "events": 0, "routines": 0, "last_run": None,
+                       "last_duration": None, "last_error": None}
+        
+        self._thread = threading.Thread(target=self._run, name="delta-habits", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+    
+    @staticmethod
+    def action_of(interaction_type: str, content: str) -> str:
+        """
+        Action (nom de routine) correspondant à une interaction
+        
+        Le texte libre est normalisé pour borner l'espace des actions : une
+        commande se réduit à son premier mot (hors sudo), un email à son
+        premier destinataire.
+        """
+        if interaction_type == "command_executed":
+            words = [word for word in content.split() if word != "sudo"]
+            return f"Commande : {os.path.basename(words[0]).lower()}" if words else "Commande"
+        if interaction_type == "email_sent":
+            addresses = [address for _, address in email.utils.getaddresses([content.rsplit(" à ", 1)[-1]])
+                         if "@" in address]
+            return f"Email envoyé à {addresses[0].lower()}" if addresses else "Email envoyé"
+        return HABIT_ACTION_LABELS.get(interaction_type, interaction_type)
+    
+    # ───────────────────────────────────────────────────────────────────────────
+    # LECTURE - Historique depuis le filigrane, une page à la fois, en tableaux
+    # ───────────────────────────────────────────────────────────────────────────
+    
+    def _read_page(self, last_id: int, after: Optional[str]) -> List[Dict]:
+        """
+        Lit une page d'interactions postérieures au filigrane (ordre des ids)
+        
+        Args:
+            last_id: Dernier id déjà analysé
+            after: Horodatage d'un filigrane antérieur (None sinon)
+        
+        Returns:
+            Au plus HABIT_PAGE_ROWS interactions
+        """
+        query = self.db.query("episodic_memory").select("id,timestamp,interaction_type,content")
+        if after is not None:
+            query.gt("timestamp", after)
+        return query.gt("id", last_id).order("id").limit(HABIT_PAGE_ROWS).execute(use_cache=False)
+    
+    def _encode(self, page: List[Dict]) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """
+        Convertit une page d'interactions en tableaux
+        
+        action_of n'est appelé qu'une fois par type, ou par contenu distinct
+        pour les types dont l'action dépend du texte (HABIT_FREE_TEXT_TYPES).
+        
+        Args:
+            page: Interactions lues
+        
+        Returns:
+            Tuple (actions distinctes, numéro d'action de chaque événement,
+            secondes depuis l'époque)
+        """
+        action_codes: Dict[str, int] = {}
+        codes = np.empty(len(page), dtype=np.int64)
+        types = np.array([row["interaction_type"] for row in page], dtype=object)
+        kinds, kind_of = np.unique(types, return_inverse=True)
+        for k, interaction_type in enumerate(kinds):
+            members = np.flatnonzero(kind_of == k)
+            if interaction_type in HABIT_FREE_TEXT_TYPES:
+                contents = np.array([page[i]["content"] for i in members], dtype=object)
+                distinct, inverse = np.unique(contents, return_inverse=True)
+                actions = [self.action_of(interaction_type, content) for content in distinct]
+            else:
+                inverse = np.zeros(len(members), dtype=np.int64)
+                actions = [self.action_of(interaction_type, "")]
+            local = np.array([action_codes.setdefault(action, len(action_codes)) for action in actions])
+            codes[members] = local[inverse]
+        
+        # Horodatages tronqués à la seconde (et sans fuseau) en bloc
+        stamps = np.array([str(row["timestamp"]) for row in page]).astype("U19")
+        seconds = stamps.astype("datetime64[s]").astype(np.int64)
+        return list(action_codes), codes, seconds
+    
+    def _load_profiles(self, names: List[str]) -> Dict[str, Dict]:
+        """Profils cumulés lors des passes précédentes pour ces actions"""
+        profiles = {}
+        for start in range(0, len(names), HABIT_PAGE_ROWS):
+            chunk = names[start:start + HABIT_PAGE_ROWS]
+            for row in self.db.query("habit_profiles").select("action,profile").in_("action", chunk) \
+                    .limit(len(chunk)).execute(use_cache=False):
+                profiles[row["action"]] = json.loads(row["profile"])
+        return profiles
+    
+    # ───────────────────────────────────────────────────────────────────────────
+    # ANALYSE - Histogrammes heure-de-semaine et périodicité, vectorisés
+    # ───────────────────────────────────────────────────────────────────────────
+    
+    @staticmethod
+    def analyze(codes: np.ndarray, seconds: np.ndarray, n_actions: int,
+                seed_seconds: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """
+        Statistiques par action, calculées en bloc
+        
+        Args:
+            codes: Numéro d'action de chaque événement
+            seconds: Horodatage (secondes depuis l'époque) de chaque événement
+            n_actions: Nombre d'actions distinctes
+            seed_seconds: Dernier horodatage connu par action (NaN si aucun), pour
+                          raccorder les intervalles à la passe précédente
+        
+        Returns:
+            Dictionnaire de tableaux : counts, first, last, hours (n_actions x 168),
+            gap_n, gap_sum, gap_sumsq (intervalles entre deux occurrences)
+        """
+        counts = np.bincount(codes, minlength=n_actions)
+        
+        # Heure de la semaine (0 = lundi 0 h) : le 1er janvier 1970 était un jeudi
+        days = seconds // 86400
+        hour_of_week = ((days + 3) % 7) * 24 + (seconds // 3600) % 24
+        hours = np.bincount(codes * 168 + hour_of_week, minlength=n_actions * 168).reshape(n_actions, 168)
+        
+        first = np.full(n_actions, np.iinfo(np.int64).max)
+        np.minimum.at(first, codes, seconds)
+        last = np.full(n_actions, np.iinfo(np.int64).min)
+        np.maximum.at(last, codes, seconds)
+        
+        # Intervalles entre occurrences successives d'une même action
+        all_codes, all_seconds = codes, seconds
+        if seed_seconds is not None:
+            known = ~np.isnan(seed_seconds)
+            all_codes = np.concatenate([np.flatnonzero(known), codes])
+            all_seconds = np.concatenate([seed_seconds[known].astype(np.int64), seconds])
+        order = np.lexsort((all_seconds, all_codes))
+        sorted_codes, sorted_seconds = all_codes[order], all_seconds[order]
+        gaps = np.diff(sorted_seconds).astype(np.float64)
+        valid = (sorted_codes[1:] == sorted_codes[:-1]) & (gaps >= HABIT_MIN_GAP)
+        gap_codes, gaps = sorted_codes[1:][valid], gaps[valid] / 3600.0
+        
+        return {
+            "counts": counts,
+            "first": first,
+            "last": last,
+            "hours": hours,
+            "gap_n": np.bincount(gap_codes, minlength=n_actions),
+            "gap_sum": np.bincount(gap_codes, weights=gaps, minlength=n_actions),
+            "gap_sumsq": np.bincount(gap_codes, weights=gaps ** 2, minlength=n_actions)
+        }
+    
+    @staticmethod
+    def describe(profile: Dict) -> Tuple[int, str]:
+        """
+        Fréquence hebdomadaire et description lisible d'un profil
+        
+        Args:
+            profile: Profil cumulé (count, first, last, hours, gaps)
+        
+        Returns:
+            Tuple (fois par semaine, contexte)
+        """
+        weeks = max((profile["last"] - profile["first"]) / (7 * 86400), 1.0)
+        frequency = max(int(round(profile["count"] / weeks)), 1)
+        
+        week = np.asarray(profile["hours"]).reshape(7, 24)
+        total = max(week.sum(), 1)
+        by_day, by_hour = week.sum(axis=1), week.sum(axis=0)
+        day = int(by_day.argmax())
+        if by_day[day] / total >= HABIT_WEEKDAY_SHARE:
+            hour = int(week[day].argmax())
+            parts = [f"{HABIT_CONTEXT_PREFIX} : surtout le {WEEKDAYS_FR[day]} vers {hour} h ({by_day[day] / total:.0%})"]
+        else:
+            hour = int(by_hour.argmax())
+            parts = [f"{HABIT_CONTEXT_PREFIX} : surtout vers {hour} h ({by_hour[hour] / total:.0%})"]
+        
+        n, gap_total, squares = profile["gaps"]
+        if n >= HABIT_MIN_EVENTS - 1:
+            mean = gap_total / n
+            std = math.sqrt(max(squares / n - mean ** 2, 0.0))
+            if std / mean <= HABIT_MAX_PERIOD_CV:
+                parts.append(f"environ toutes les {mean:.0f} h" if mean < 48 else f"environ tous les {mean / 24:.0f} jours")
+        return frequency, " · ".join(parts)
+    
+    # ───────────────────────────────────────────────────────────────────────────
+    # PASSE INCRÉMENTALE
+    # ───────────────────────────────────────────────────────────────────────────
+    
+    def _fold(self, page: List[Dict], profiles: Dict[str, Dict]) -> List[Dict]:
+        """
+        Cumule une page d'interactions dans les profils et les enregistre
+        
+        Args:
+            page: Interactions lues
+            profiles: Profils déjà relus pendant la passe (complétés et mis à jour)
+        
+        Returns:
+            Routines à écrire (actions dont le profil atteint HABIT_MIN_EVENTS)
+        """
+        names, codes, seconds = self._encode(page)
+        profiles.update(self._load_profiles([name for name in names if name not in profiles]))
+        seed = np.array([profiles[name]["last"] if name in profiles else np.nan for name in names])
+        stats = self.analyze(codes, seconds, len(names), seed)
+        
+        updated_profiles, routines = [], []
+        now = datetime.now().isoformat()
+        for i, name in enumerate(names):
+            previous = profiles.get(name, {"count": 0, "first": int(stats["first"][i]),
+                                           "last": int(stats["last"][i]), "hours": [0] * 168,
+                                           "gaps": [0, 0.0, 0.0]})
+            profile = {
+                "count": previous["count"] + int(stats["counts"][i]),
+                "first": min(previous["first"], int(stats["first"][i])),
+                "last": max(previous["last"], int(stats["last"][i])),
+                "hours": (np.asarray(previous["hours"]) + stats["hours"][i]).tolist(),
+                "gaps": [previous["gaps"][0] + int(stats["gap_n"][i]),
+                         previous["gaps"][1] + float(stats["gap_sum"][i]),
+                         previous["gaps"][2] + float(stats["gap_sumsq"][i])]
+            }
+            profiles[name] = profile
+            updated_profiles.append({"action": name, "profile": json.dumps(profile), "updated_at": now})
+            
+            # En dessous du seuil, le profil est seulement cumulé pour les passes suivantes
+            if profile["count"] >= HABIT_MIN_EVENTS:
+                frequency, context = self.describe(profile)
+                routines.append({
+                    "action": name,
+                    "frequency": frequency,
+                    "context": context,
+                    "last_executed": str(np.datetime64(profile["last"], "s"))
+                })
+        
+        if not self.db.upsert("habit_profiles", updated_profiles, on_conflict=["action"]):
+            raise RuntimeError("profils d'habitudes non enregistrés")
+        return routines
+    
+    def _write_routines(self, routines: List[Dict]) -> Set[str]:
+        """
+        Écrit les routines détectées dans procedural_memory
+        
+        Une habitude de même action enregistrée par l'utilisateur (contexte
+        sans HABIT_CONTEXT_PREFIX) n'est jamais remplacée.
+        
+        Args:
+            routines: Routines détectées
+        
+        Returns:
+            Actions des routines écrites
+        """
+        names = [routine["action"] for routine in routines]
+        owned = set()
+        for start in range(0, len(names), HABIT_PAGE_ROWS):
+            chunk = names[start:start + HABIT_PAGE_ROWS]
+            for row in self.db.query("procedural_memory").select("action,context").in_("action", chunk) \
+                    .limit(len(chunk)).execute(use_cache=False):
+                if not str(row.get("context") or "").startswith(HABIT_CONTEXT_PREFIX):
+                    owned.add(row["action"])
+        
+        routines = [routine for routine in routines if routine["action"] not in owned]
+        if routines and self.db.upsert("procedural_memory", routines, on_conflict=["action"]):
+            return {routine["action"] for routine in routines}
+        return set()
+    
+    def run_once(self) -> int:
+        """
+        Analyse les nouvelles interactions et met à jour les routines détectées
+        
+        L'historique est lu page par page : chaque page est cumulée dans les
+        profils, ses routines écrites et le filigrane avancé avant la suivante.
+        
+        Returns:
+            Nombre de routines écrites dans procedural_memory
+        """
+        with self._lock:
+            if not self.db.is_connected():
+                return 0
+            
+            start = time.perf_counter()
+            self.db.flush("episodic_memory")
+            rows = self.db.query("memory_watermarks").select("value").eq("job", "habit_mining").limit(1) \
+                .execute(use_cache=False)
+            since = rows[0]["value"] if rows else None
+            
+            last_id, after = 0, None
+            if since is not None and str(since).isdigit():
+                last_id = int(since)
+            elif since is not None:
+                # Ancien filigrane : la seconde entière a déjà été comptée
+                after = f"{since}.999999" if len(since) == 19 else since
+            
+            profiles: Dict[str, Dict] = {}
+            written: Set[str] = set()
+            events = 0
+            while True:
+                page = self._read_page(last_id, after)
+                if page:
+                    written |= self._write_routines(self._fold(page, profiles))
+                    events += len(page)
+                    last_id = page[-1]["id"]
+                    self.db.upsert(
+                        "memory_watermarks",
+                        {"job": "habit_mining", "value": str(last_id), "updated_at": datetime.now().isoformat()},
+                        on_conflict=["job"]
+                    )
+                if len(page) < HABIT_PAGE_ROWS:
+                    break
+            
+            self._stats["runs"] += 1
+            self._stats["events"] += events
+            self._stats["routines"] += len(written)
+            self._stats["last_run"] = datetime.now().isoformat(timespec="seconds")
+            self._stats["last_duration"] = time.perf_counter() - start
+            return len(written)
+    
+    def _run(self) -> None:
+        """Boucle du thread : une analyse au démarrage, puis à chaque intervalle"""
+        delay = HABIT_MINING_STARTUP_DELAY
+        while not self._stop.wait(delay):
+            try:
+                self.run_once()
+                self._stats["last_error"] = None
+            except Exception as e:
+                self._stats["last_error"] = str(e)
+            delay = self.interval
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Statistiques de l'analyse
+        
+        Returns:
+            Passes, événements analysés, routines écrites, durée et dernière erreur
+        """
+        return dict(self._stats)
+    
+    def close(self) -> None:
+        """Arrête le thread d'analyse"""
+        self._stop.set()
+
+
+@st.cache_resource(show_spinner=False)
+def get_habit_miner(backend_name: str, location: str, _db: StorageBackend) -> HabitMiner:
+    """Analyse des habitudes unique par processus et par base"""
+    return HabitMiner(_db)
+
+
+def approximate_size(value: Any, _seen: Optional[set] = None) -> int:
+    """
+    Taille mémoire approximative d'un objet et de son contenu (octets)
+    
+    Args:
+        value: Objet mesuré (conteneurs parcourus récursivement)
+    
+    Returns:
+        Nombre d'octets estimé
+    """
+    seen = _seen if _seen is not None else set()
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(approximate_size(k, seen) + approximate_size(v, seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset, deque)):
+        size += sum(approximate_size(item, seen) for item in value)
+    elif hasattr(value, "__dict__"):
+        size += approximate_size(vars(value), seen)
+    return size
+
+
+class SpillStore:
+    """Stockage local (SQLite) des entrées évincées de la mémoire de travail"""
+    
+    def __init__(self, path: str = WORK_MEMORY_SPILL_PATH):
+        """
+        Ouverture (ou création) du fichier de débordement
+        
+        Args:
+            path: Chemin du fichier SQLite
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._last_purge = time.monotonic()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS spill (
+                session TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value BLOB NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (session, key)
+            )
+        """)
+        # Fichier partagé entre processus : seules les entrées expirées sont retirées
+        self._conn.execute("DELETE FROM spill WHERE expires_at <= ?", (time.time(),))
+    
+    def put(self, session: str, key: str, value: Any, expires_at: float) -> bool:
+        """
+        Écrit une entrée évincée (ignorée si elle n'est pas sérialisable)
+        
+        Returns:
+            True si l'entrée a été écrite
+        """
+        try:
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return False
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO spill (session, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (session, key, blob, expires_at)
+            )
+        return True
+    
+    def pop(self, session: str, key: str) -> Optional[Tuple[Any, float]]:
+        """
+        Retire et renvoie une entrée encore valide
+        
+        Returns:
+            Tuple (valeur, expiration), ou None si absente ou expirée
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM spill WHERE session = ? AND key = ?", (session, key)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("DELETE FROM spill WHERE session = ? AND key = ?", (session, key))
+        if row[1] <= time.time():
+            return None
+        return pickle.loads(row[0]), row[1]
+    
+    def discard(self, session: str, key: Optional[str] = None) -> None:
+        """Supprime une entrée (ou toutes celles d'une session)"""
+        with self._lock:
+            if key is None:
+                self._conn.execute("DELETE FROM spill WHERE session = ?", (session,))
+            else:
+                self._conn.execute("DELETE FROM spill WHERE session = ? AND key = ?", (session, key))
+    
+    def purge_expired(self, force: bool = False) -> None:
+        """
+        Supprime les entrées expirées de toutes les sessions (sessions fermées comprises)
+        
+        Args:
+            force: Ignore l'intervalle minimal entre deux purges
+        """
+        with self._lock:
+            if not force and time.monotonic() - self._last_purge < WORK_MEMORY_PURGE_INTERVAL:
+                return
+            self._last_purge = time.monotonic()
+            self._conn.execute("DELETE FROM spill WHERE expires_at <= ?", (time.time(),))
+    
+    def usage(self, session: str) -> Tuple[int, int]:
+        """
+        Occupation d'une session sur disque
+        
+        Returns:
+            Tuple (nombre d'entrées, octets)
+        """
+        with self._lock:
+            count, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM spill WHERE session = ?", (session,)
+            ).fetchone()
+        return count, size
+
+
+@st.cache_resource(show_spinner=False)
+def get_spill_store(path: str) -> SpillStore:
+    """Fichier de débordement unique pour le processus"""
+    return SpillStore(path)
+
+
+class WorkingMemory:
+    """Mémoire de travail d'une session : durée de vie par entrée et budget d'octets (LRU)"""
+    
+    def __init__(self, session: str, max_bytes: int = WORK_MEMORY_MAX_BYTES,
+                 default_ttl: float = WORK_MEMORY_DEFAULT_TTL, spill: Optional[SpillStore] = None):
+        """
+        Initialisation d'une mémoire de travail vide
+        
+        Args:
+            session: Identifiant de la session (clé du débordement sur disque)
+            max_bytes: Budget mémoire de la session
+            default_ttl: Durée de vie (secondes) par défaut d'une entrée
+            spill: Stockage des entrées évincées (None : elles sont perdues)
+        """
+        self.session = session
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.spill = spill
+        
+        self._entries: "OrderedDict[str, Tuple[Any, int, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "spilled": 0, "spill_hits": 0}
+    
+    def _drop(self, key: str) -> None:
+        """Retire une entrée et libère son budget (verrou déjà pris)"""
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+    
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Stocke une valeur (évince les moins récemment utilisées au-delà du budget)
+        
+        Args:
+            key: Clé de la valeur
+            value: Valeur à stocker
+            ttl: Durée de vie (secondes), default_ttl si None
+        """
+        size = approximate_size(value)
+        expires_at = time.time() + (self.default_ttl if ttl is None else ttl)
+        evicted = []
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, size, expires_at)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                old_key = next(iter(self._entries))
+                old_value, _, old_expires = self._entries[old_key]
+                evicted.append((old_key, old_value, old_expires))
+                self._drop(old_key)
+                self._stats["evictions"] += 1
+        
+        if self.spill is not None:
+            self.spill.discard(self.session, key)
+            for old_key, old_value, old_expires in evicted:
+                if self.spill.put(self.session, old_key, old_value, old_expires):
+                    self._stats["spilled"] += 1
+            self.spill.purge_expired()
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Récupère une valeur encore valide (relue sur disque si elle a été évincée)
+        
+        Args:
+            key: Clé de la valeur
+            default: Valeur par défaut si absente ou expirée
+        
+        Returns:
+            Valeur stockée ou default
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[2] > time.time():
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return entry[0]
+                self._drop(key)
+                self._stats["expired"] += 1
+        
+        if self.spill is not None:
+            spilled = self.spill.pop(self.session, key)
+            if spilled is not None:
+                value, expires_at = spilled
+                self._stats["spill_hits"] += 1
+                self.set(key, value, ttl=expires_at - time.time())
+                return value
+        
+        self._stats["misses"] += 1
+        return default
+    
+    def delete(self, key: str) -> None:
+        """Supprime une valeur (en mémoire et sur disque)"""
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+        if self.spill is not None:
+            self.spill.discard(self.session, key)
+    
+    def purge_expired(self) -> int:
+        """
+        Supprime les entrées expirées
+        
+        Returns:
+            Nombre d'entrées supprimées de la mémoire
+        """
+        now = time.time()
+        with self._lock:
+            expired = [k for k, (_, _, expires_at) in self._entries.items() if expires_at <= now]
+            for key in expired:
+                self._drop(key)
+            self._stats["expired"] += len(expired)
+        if self.spill is not None:
+            self.spill.purge_expired(force=True)
+        return len(expired)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Occupation et compteurs de la session
+        
+        Returns:
+            Entrées, octets utilisés, budget, occupation disque et compteurs
+        """
+        with self._lock:
+            stats = dict(self._stats, entries=len(self._entries), bytes=self._bytes, max_bytes=self.max_bytes)
+        stats["spill_entries"], stats["spill_bytes"] = self.spill.usage(self.session) if self.spill else (0, 0)
+        return stats
+
+
+class BlobStore:
+    """Contenus volumineux des métadonnées, stockés une seule fois et référencés par empreinte"""
+    
+    def __init__(self, db: StorageBackend, min_bytes: int = BLOB_MIN_BYTES,
+                 cache_size: int = BLOB_CACHE_MAX_ENTRIES):
+        """
+        Initialisation du magasin et de son cache d'empreintes
+        
+        Args:
+            db: Moteur de stockage des mémoires
+            min_bytes: Taille minimale (caractères) d'une valeur externalisée
+            cache_size: Empreintes (et contenus) gardées en mémoire (LRU)
+        """
+        self.db = db
+        self.min_bytes = min_bytes
+        self.cache_size = cache_size
+        
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._pending: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"stored": 0, "reused": 0, "bytes_saved": 0, "fetched": 0, "missing": 0}
+    
+    @staticmethod
+    def digest(content: str) -> str:
+        """Empreinte SHA-256 (hexadécimale) d'un contenu"""
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+    
+    def _remember(self, digest: str, content: str) -> None:
+        """Ajoute un contenu au cache et évince les plus anciens (verrou déjà pris)"""
+        self._pending.pop(digest, None)
+        self._cache[digest] = content
+        self._cache.move_to_end(digest)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+    
+    def _reuse(self, digest: str, content: str) -> str:
+        """Compte la réutilisation d'un contenu déjà stocké (verrou déjà pris)"""
+        self._stats["reused"] += 1
+        self._stats["bytes_saved"] += len(content) - len(digest)
+        return digest
+    
+    def _queued(self) -> bool:
+        """Des contenus sont encore dans le tampon d'écriture différée"""
+        return bool(self.db.write_stats().get("pending_by_table", {}).get("memory_blobs"))
+    
+    # ───────────────────────────────────────────────────────────────────────────
+    # ÉCRITURE - Un contenu déjà connu n'est jamais renvoyé
+    # ───────────────────────────────────────────────────────────────────────────
+    
+    def put(self, content: str) -> Optional[str]:
+        """
+        Stocke un contenu (s'il n'est pas déjà connu du processus)
+        
+        Args:
+            content: Texte à stocker
+        
+        Returns:
+            Empreinte du contenu, ou None si l'écriture a échoué
+        """
+        digest = self.digest(content)
+        with self._lock:
+            if digest in self._cache:
+                self._cache.move_to_end(digest)
+                return self._reuse(digest, content)
+            pending = digest in self._pending
+        
+        # Écriture différée non confirmée : la ligne en file la portera encore,
+        # sinon on vérifie qu'elle a bien été écrite avant de réutiliser l'empreinte
+        if pending:
+            if self._queued():
+                with self._lock:
+                    return self._reuse(digest, content)
+            rows = self.db.query("memory_blobs").select("digest").eq("digest", digest).limit(1) \
+                .execute(use_cache=False)
+            with self._lock:
+                self._pending.pop(digest, None)
+                if rows:
+                    self._remember(digest, content)
+                    return self._reuse(digest, content)
+        
+        # Écriture différée et sans effet si un autre processus l'a déjà stocké
+        row = {"digest": digest, "content": content, "size": len(content), "created_at": datetime.now().isoformat()}
+        if not self.db.insert("memory_blobs", row, deferred=True):
+            return None
+        queued = self._queued()
+        with self._lock:
+            self._stats["stored"] += 1
+            if not queued:
+                self._remember(digest, content)
+                return digest
+            self._pending[digest] = content
+            while len(self._pending) > self.cache_size:
+                self._pending.popitem(last=False)
+        return digest
+    
+    def externalize(self, metadata: Dict) -> Dict:
+        """
+        Remplace les valeurs volumineuses des métadonnées par leur empreinte
+        
+        Args:
+            metadata: Métadonnées d'une interaction
+        
+        Returns:
+            Métadonnées à enregistrer ({"blobs": {clé: empreinte}} pour les valeurs externalisées)
+        """
+        stored, refs = {}, {}
+        for key, value in metadata.items():
+            if isinstance(value, str) and len(value) >= self.min_bytes:
+                digest = self.put(value)
+                if digest is not None:
+                    refs[key] = digest
+                    continue
+            stored[key] = value
+        if refs:
+            stored["blobs"] = refs
+        return stored
+    
+    # ───────────────────────────────────────────────────────────────────────────
+    # LECTURE - Résolution des empreintes par lots
+    # ───────────────────────────────────────────────────────────────────────────
+    
+    def fetch(self, digests: List[str]) -> Dict[str, str]:
+        """
+        Contenus de plusieurs empreintes (cache, puis une requête par lot)
+        
+        Args:
+            digests: Empreintes recherchées
+        
+        Returns:
+            Dictionnaire empreinte -> contenu (empreintes inconnues absentes)
+        """
+        found, missing = {}, []
+        with self._lock:
+            for digest in digests:
+                if digest in self._cache:
+                    found[digest] = self._cache[digest]
+                elif digest in self._pending:
+                    found[digest] = self._pending[digest]
+                else:
+                    missing.append(digest)
+        
+        for start in range(0, len(missing), BLOB_RESOLVE_BATCH):
+            chunk = missing[start:start + BLOB_RESOLVE_BATCH]
+            rows = self.db.query("memory_blobs").select("digest,content").in_("digest", chunk) \
+                .limit(len(chunk)).execute()
+            with self._lock:
+                for row in rows:
+                    found[row["digest"]] = row["content"]
+                    self._remember(row["digest"], row["content"])
+                self._stats["fetched"] += len(rows)
+        return found
+    
+    @staticmethod
+    def _refs(row: Dict) -> Optional[Dict[str, str]]:
+        """Empreintes référencées par les métadonnées d'une ligne"""
+        metadata = row.get("metadata")
+        refs = metadata.get("blobs") if isinstance(metadata, dict) else None
+        return refs if isinstance(refs, dict) else None
+    
+    def resolve(self, rows: List[Dict]) -> List[Dict]:
+        """
+        Remplace les empreintes des métadonnées par leur contenu
+        
+        Args:
+            rows: Interactions lues en base
+        
+        Returns:
+            Interactions aux métadonnées complètes (copies des lignes modifiées) ;
+            les empreintes introuvables restent sous "blobs"
+        """
+        wanted = {digest for row in rows for digest in (self._refs(row) or {}).values()}
+        if not wanted:
+            return rows
+        contents = self.fetch(list(wanted))
+        
+        resolved = []
+        for row in rows:
+            refs = self._refs(row)
+            if refs:
+                metadata = {k: v for k, v in row["metadata"].items() if k != "blobs"}
+                metadata.update({key: contents[digest] for key, digest in refs.items() if digest in contents})
+                lost = {key: digest for key, digest in refs.items() if digest not in contents}
+                if lost:
+                    metadata["blobs"] = lost
+                    with self._lock:
+                        self._stats["missing"] += len(lost)
+                row = dict(row, metadata=metadata)
+            resolved.append(row)
+        return resolved
+    
+    def resolve_iter(self, rows: Iterator[Dict], batch: int = SEARCH_INDEX_PAGE_SIZE) -> Iterator[Dict]:
+        """Résout un parcours de table par lots de lignes (mémoire bornée)"""
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= batch:
+                yield from self.resolve(chunk)
+                chunk = []
+        yield from self.resolve(chunk)
+    
+    def stats(self) -> Dict[str, int]:
+        """
+        Statistiques du magasin
+        
+        Returns:
+            Contenus écrits, réutilisés, octets évités, contenus lus, empreintes
+            introuvables et taille du cache
+        """
+        with self._lock:
+            return dict(self._stats, cached=len(self._cache), unconfirmed=len(self._pending))
+
+
+@st.cache_resource(show_spinner=False)
+def get_blob_store(backend_name: str, location: str, _db: StorageBackend) -> BlobStore:
+    """Magasin de contenus unique par processus et par base (cache d'empreintes partagé)"""
+    return BlobStore(_db)
+
+
+class MemorySystem:
+    """Système de mémoire quadruple de DELTA"""
+    
+    def __init__(self, db: StorageBackend):
+        """
+        Initialisation du système de mémoire
+        
+        Args:
+            db: Moteur de stockage (Supabase ou SQLite)
+        """
+        self.db = db
+        self.semantic_index = get_semantic_index(db.name, db.location)
+        self.search_index = get_search_index(db.name, db.location)
+        self.vector_index = get_vector_index(db.name, db.location)
+        self.retention = get_retention_engine(db.name, db.location, db)
+        self.retention.add_listener(self.search_index.forget_range)
+        self.retention.add_listener(self.vector_index.forget_range)
+        self.habit_miner = get_habit_miner(db.name, db.location, db)
+        self.blobs = get_blob_store(db.name, db.location, db)
+        self._work_memory: Optional[WorkingMemory] = None
+    
+    # ───────────────────────────────────────────────────────────────────────────
+    # MÉMOIRE SÉMANTIQUE - Faits permanents
+    # ───────────────────────────────────────────────────────────────────────────
+    
+    def store_semantic(self, category: str, key: str, value: str) -> bool:
+        """
+        Stocke un fait permanent (remplace la valeur si la clé existe déjà
+        dans la catégorie)
+        
+        Args:
+            category: Catégorie du fait (Personnel, Projet, Contact, Préférence)
+            key: Clé unique du fait
+            value: Valeur du fait
+        
+        Returns:
+            True si succès, False sinon
+        """
+        data = {
+            "category": category,
+            "key": key,
+            "value": value,
+            "created_at": datetime.now().isoformat()
+        }
+        if not self.db.upsert("semantic_memory", data, on_conflict=["category", "key"]):
+            return False
+        self.semantic_index.update(data)
+        self.search_index.add_fact(data)
+        self.vector_index.add_fact(data)
+        return True
+    
+    def get_fact(self, category: str, key: str) -> Optional[Dict]:
+        """
+        Récupère un fait par (catégorie, clé) depuis l'index en mémoire
+        
+        Args:
+            category: Catégorie du fait
+            key: Clé du fait
+        
+        Returns:
+            Le fait, ou None s'il n'existe pas
+        """
+        self.semantic_index.ensure_loaded(self.db)
+        return self.semantic_index.get(category, key)
+    
+    def find_facts(self, key: str) -> List[Dict]:
+        """
+        Recherche un fait par clé dans toutes les catégories (index en mémoire)
+        
+        Args:
+            key: Clé du fait, sans tenir compte de la casse ni des espaces
+                 ("email principal" trouve "email_principal")
+        
+        Returns:
+            Faits correspondants (vide si aucun)
+        """
+        self.semantic_index.ensure_loaded(self.db)
+        return self.semantic_index.find(key)
+    
+    def get_semantic(self, category: Optional[str] = None) -> List[Dict]:
+        """
+        Récupère les faits permanents
+        
+        Args:
+            category: Filtre optionnel par catégorie
+        
+        Returns:
+            Liste des faits
+        """
+        query = self.db.query("semantic_memory").select(SEMANTIC_COLUMNS)
+        if category:
+            query.eq("category", category)
+        return query.order("category").order("key").execute()
+    
+    # ───────────────────────────────────────────────────────────────────────────
+    # MÉMOIRE ÉPISODIQUE - Historique des interactions
+    # ───────────────────────────────────────────────────────────────────────────
+    
+    def log_interaction(self, interaction_type: str, content: str, metadata: Optional[Dict] = None) -> bool:
+        """
+        Enregistre une interaction dans l'historique
+        
+        Args:
+            interaction_type: Type d'interaction (conversation, action, etc.)
+            content: Contenu de l'interaction
+            metadata: Métadonnées additionnelles
+        
+        Returns:
+            True si succès, False sinon
+        """
+        data = {
+            "interaction_type": interaction_type,
+            "content": content,
+            "metadata": self.blobs.externalize(metadata or {}),
+            "timestamp": datetime.now().isoformat()
+        }
+        # Écriture différée : le log ne bloque pas le rendu de la conversation
+        if not self.db.insert("episodic_memory", data, deferred=True):
+            return False
+        # Les index reçoivent les métadonnées complètes (réponse comprise)
+        indexed = dict(data, metadata=metadata or {})
+        self.search_index.add_interaction(indexed)
+        self.vector_index.add_interaction(indexed)
+        return True
+    
+    def get_history(self, limit: int = 50, interaction_type: Optional[str] = None,
+                    since: Optional[str] = None) -> List[Dict]:
+        """
+        Récupère l'historique des interactions (plus récentes d'abord)
+        
+        Args:
+            limit: Nombre maximum d'interactions à récupérer
+            interaction_type: Filtre optionnel par type d'interaction
+            since: Horodatage ISO minimal (inclus)
+        
+        Returns:
+            Liste des interactions (colonnes de la timeline, sans métadonnées)
+        """
+        query = self.db.query("episodic_memory").select(HISTORY_COLUMNS)
+        if interaction_type:
+            query.eq("interaction_type", interaction_type)
+        if since:
+            query.gte("timestamp", since)
+        return query.order("timestamp", desc=True).order("id", desc=True).limit(limit).execute()
+    
+    def find_interactions(self, metadata_filter: Any, interaction_type: Optional[str] = None,
+                          limit: int = 50) -> List[Dict]:
+        """
+        Récupère les interactions dont les métadonnées satisfont un filtre (exécuté en base)
+        
+        Args:
+            metadata_filter: Expression ("success=false, return_code!=0"), dictionnaire
+                             d'égalités ({"success": False}) ou liste de tuples (clé, opérateur, valeur)
+            interaction_type: Filtre optionnel par type d'interaction
+            limit: Nombre maximum d'interactions
+        
+        Returns:
+            Liste des interactions (plus récentes d'abord), métadonnées décodées
+        
+        Raises:
+            ValueError: si le filtre est mal formé
+        """
+        if isinstance(metadata_filter, str):
+            conditions = parse_metadata_filter(metadata_filter)
+        elif isinstance(metadata_filter, dict):
+            conditions = [(key, "eq", value) for key, value in metadata_filter.items()]
+        else:
+            conditions = list(metadata_filter or [])
+        
+        query = self.db.query("episodic_memory").select(f"{HISTORY_COLUMNS},metadata")
+        if interaction_type:
+            query.eq("interaction_type", interaction_type)
+        for key, operator, value in conditions:
+            query.json_field("metadata", key, operator, value)
+        return self.blobs.resolve(query.order("timestamp", desc=True).order("id", desc=True).limit(limit).execute())
+    
+    def get_summaries(self, limit: int = 30, interaction_type: Optional[str] = None) -> List[Dict]:
+        """
+        Récupère les résumés journaliers de l'historique compacté (plus récents d'abord)
+        
+        Args:
+            limit: Nombre maximum de résumés
+            interaction_type: Filtre optionnel par type d'interaction
+        
+        Returns:
+            Liste des résumés (jour, type, nombre, bornes, extraits)
+        """
+        query = self.db.query("episodic_summary").select(
+            "day,interaction_type,interaction_count,first_timestamp,last_timestamp,sample"
+        )
+        if interaction_type:
+            query.eq("interaction_type", interaction_type)
+        return query.order("day", desc=True).order("interaction_type").limit(limit).execute()
+    
+    def read_archive(self, day: str, interaction_type: str) -> List[Dict]:
+        """
+        Décompresse les interactions brutes archivées d'un jour
+        
+        Args:
+            day: Jour compacté (AAAA-MM-JJ)
+            interaction_type: Type d'interaction
+        
+        Returns:
+            Interactions d'origine (vide si aucune archive)
+        """
+        rows = self.db.query("episodic_archive").select("payload").eq("day", day) \
+            .eq("interaction_type", interaction_type).limit(1).execute()
+        if not rows:
+            return []
+        payload = zlib.decompress(base64.b64decode(rows[0]["payload"])).decode("utf-8")
+        return self.blobs.resolve([json_loads(line) for line in payload.splitlines()])
+    
+    def get_history_page(self, page_size: int = TIMELINE_PAGE_SIZE, cursor: Optional[Tuple] = None,
+                         interaction_type: Optional[str] = None) -> Tuple[List[Dict], Optional[Tuple]]:
+        """
+        Récupère une page de l'historique (défilement infini de la timeline)
+        
+        Args:
+            page_size: Nombre d'interactions par page
+            cursor: Curseur renvoyé par la page précédente
+            interaction_type: Filtre optionnel par type d'interaction
+        
+        Returns:
+            Tuple (interactions, curseur suivant ou None)
+        """
+        filters = {"interaction_type": interaction_type} if interaction_type else None
+        return self.db.fetch_page(
+            "episodic_memory", order_by="timestamp", page_size=page_size, after=cursor,
+            filters=filters, columns=HISTORY_COLUMNS
+        )
+    
+    def iter_history(self, interaction_type: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Parcourt tout l'historique, plus récent d'abord (exports complets)
+        
+        Args:
+            interaction_type: Filtre optionnel par type d'interaction
+        
+        Yields:
+            Interactions une par une
+        """
+        filters = {"interaction_type": interaction_type} if interaction_type else None
+        return self.blobs.resolve_iter(self.db.iter_rows("episodic_memory", order_by="timestamp", filters=filters))
+    
+    # ───────────────────────────────────────────────────────────────────────────
+    # MÉMOIRE PROCÉDURALE - Habitudes et routines
+    # ───────────────────────────────────────────────────────────────────────────
+    
+    def store_habit(self, action: str, frequency: int, context: str) -> bool:
+        """
+        Enregistre une habitude ou routine (remplace l'habitude de même action)
+        
+        Args:
+            action: Description de l'action
+            frequency: Fréquence d'exécution
+            context: Contexte de l'action
         
         Returns:
             True si succès, False sinon
         """
         data = {
-            "category": category,
-            "key": key,
-            "value": value,
-            "created_at": datetime.now().isoformat()
+            "action": action,
+            "frequency": frequency,
+            "context": context,
+            "last_executed": datetime.now().isoformat()
         }
-        return self.db.insert("semantic_memory", data)
+        return self.db.upsert("procedural_memory", data, on_conflict=["action"])
     
-    def get_semantic(self, category: Optional[str] = None) -> List[Dict]:
+    def get_habits(self) -> List[Dict]:
         """
-        Récupère les faits permanents
-        
-        Args:
-            category: Filtre optionnel par catégorie
+        Récupère les habitudes enregistrées
         
         Returns:
-            Liste des faits
+            Liste des habitudes
         """
-        filters = {"category": category} if category else None
-        return self.db.select("semantic_memory", filters)
+        return self.db.query("procedural_memory").select(HABIT_COLUMNS).order("frequency", desc=True).execute()
     
     # ───────────────────────────────────────────────────────────────────────────
-    # MÉMOIRE ÉPISODIQUE - Historique des interactions
+    # RECHERCHE - Plein texte sur les faits et l'historique
     # ───────────────────────────────────────────────────────────────────────────
     
-    def log_interaction(self, interaction_type: str, content: str, metadata: Optional[Dict] = None) -> bool:
+    def search(self, query: str, limit: int = SEARCH_RESULTS_LIMIT,
+               source: Optional[str] = None) -> List[Dict]:
         """
-        Enregistre une interaction dans l'historique
+        Recherche plein texte classée (BM25), accents et casse ignorés
+        
+        L'index est construit en arrière-plan au premier appel du processus,
+        puis tenu à jour à chaque écriture et relu périodiquement en base.
         
         Args:
-            interaction_type: Type d'interaction (conversation, action, etc.)
-            content: Contenu de l'interaction
-            metadata: Métadonnées additionnelles
+            query: Texte recherché (mot* pour une recherche par préfixe)
+            limit: Nombre maximum de résultats
+            source: "semantic" ou "episodic" pour restreindre la recherche
         
         Returns:
-            True si succès, False sinon
+            Faits et interactions trouvés, du plus pertinent au moins pertinent
         """
-        data = {
-            "interaction_type": interaction_type,
-            "content": content,
-            "metadata": json.dumps(metadata) if metadata else "{}",
-            "timestamp": datetime.now().isoformat()
-        }
-        return self.db.insert("episodic_memory", data)
+        self.search_index.ensure_loaded(self.db, self.blobs.resolve_iter)
+        return self.search_index.search(query, limit, source)
     
-    def get_history(self, limit: int = 50) -> List[Dict]:
+    def recall(self, text: str, limit: int = RECALL_RESULTS_LIMIT, source: Optional[str] = None,
+               min_score: float = 0.0) -> List[Dict]:
         """
-        Récupère l'historique des interactions
+        Souvenirs les plus proches d'un texte (similarité cosinus, sans réseau)
         
         Args:
-            limit: Nombre maximum d'interactions à récupérer
+            text: Texte de référence
+            limit: Nombre maximum de résultats
+            source: "semantic" ou "episodic" pour restreindre le rappel
+            min_score: Similarité minimale (0 à 1)
         
         Returns:
-            Liste des interactions
+            Faits et interactions similaires, du plus proche au moins proche
         """
-        return self.db.select("episodic_memory", limit=limit)
+        self.vector_index.ensure_loaded(self.db, self.blobs.resolve_iter)
+        return self.vector_index.recall_many([text], limit, source, min_score)[0]
     
     # ───────────────────────────────────────────────────────────────────────────
-    # MÉMOIRE PROCÉDURALE - Habitudes et routines
+    # LECTURE CONCURRENTE - Les trois mémoires en parallèle
     # ───────────────────────────────────────────────────────────────────────────
     
-    def store_habit(self, action: str, frequency: int, context: str) -> bool:
+    def fetch_all(self, category: Optional[str] = None, history_limit: int = TIMELINE_PAGE_SIZE,
+                  interaction_type: Optional[str] = None,
+                  timeout: float = MEMORY_FETCH_TIMEOUT) -> Dict[str, Any]:
         """
-        Enregistre une habitude ou routine
+        Lit les mémoires sémantique, épisodique et procédurale en parallèle
+        
+        La durée totale est celle de la requête la plus lente ; une requête en
+        échec ou hors délai donne un résultat vide et une entrée dans "errors".
         
         Args:
-            action: Description de l'action
-            frequency: Fréquence d'exécution
-            context: Contexte de l'action
+            category: Filtre optionnel des faits par catégorie
+            history_limit: Taille de la première page d'historique
+            interaction_type: Filtre optionnel de l'historique par type
+            timeout: Délai maximal (secondes) par requête
         
         Returns:
-            True si succès, False sinon
+            Dictionnaire avec "semantic", "history", "history_cursor",
+            "habits", "errors" (nom -> message) et "elapsed" (secondes)
         """
-        data = {
-            "action": action,
-            "frequency": frequency,
-            "context": context,
-            "last_executed": datetime.now().isoformat()
+        tasks = {
+            "semantic": (lambda: self.get_semantic(category), []),
+            "history": (lambda: self.get_history_page(history_limit, interaction_type=interaction_type), ([], None)),
+            "habits": (self.get_habits, [])
         }
-        return self.db.insert("procedural_memory", data)
+        
+        # Les threads reçoivent le contexte du script pour pouvoir afficher leurs erreurs
+        ctx = get_script_run_ctx()
+        
+        def run(fn):
+            thread = threading.current_thread()
+            previous = getattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME, None)
+            if ctx is not None:
+                add_script_run_ctx(thread, ctx)
+            try:
+                return fn()
+            finally:
+                # Thread partagé : il ne garde pas le contexte de cette exécution du script
+                setattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME, previous)
+        
+        start = time.monotonic()
+        executor = get_memory_executor()
+        futures = {name: executor.submit(run, fn) for name, (fn, _) in tasks.items()}
+        
+        results: Dict[str, Any] = {"errors": {}}
+        for name, future in futures.items():
+            remaining = max(timeout - (time.monotonic() - start), 0)
+            try:
+                results[name] = future.result(timeout=remaining)
+            except FutureTimeoutError:
+                # La requête continue dans son thread ; son résultat tardif est ignoré
+                results[name] = tasks[name][1]
+                results["errors"][name] = f"délai dépassé ({timeout:g} s)"
+            except Exception as e:
+                results[name] = tasks[name][1]
+                results["errors"][name] = str(e)
+        
+        results["history"], results["history_cursor"] = results["history"]
+        results["elapsed"] = time.monotonic() - start
+        return results
     
-    def get_habits(self) -> List[Dict]:
+    # ───────────────────────────────────────────────────────────────────────────
+    # STATISTIQUES - Calculées par la base
+    # ───────────────────────────────────────────────────────────────────────────
+    
+    def get_stats(self) -> Dict[str, Any]:
         """
-        Récupère les habitudes enregistrées
+        Statistiques exactes des trois mémoires persistantes
         
         Returns:
-            Liste des habitudes
+            Dictionnaire avec comptages par table, par catégorie,
+            par type d'interaction et bornes temporelles de l'historique
+            (interactions compactées comprises)
         """
-        return self.db.select("procedural_memory")
+        first_ts, last_ts = self.db.time_range("episodic_memory", "timestamp")
+        by_type = self.db.count_by("episodic_memory", "interaction_type", INTERACTION_TYPES)
+        episodic_count = self.db.count("episodic_memory")
+        
+        # Jours compactés : additionnés en base depuis leurs résumés (une ligne par jour et par type)
+        compacted_days = self.db.count("episodic_summary")
+        if compacted_days:
+            for interaction_type, total in self.db.sum_by("episodic_summary", "interaction_type",
+                                                          "interaction_count").items():
+                episodic_count += total
+                by_type[interaction_type] = by_type.get(interaction_type, 0) + total
+            first_compacted, _ = self.db.time_range("episodic_summary", "first_timestamp")
+            _, last_compacted = self.db.time_range("episodic_summary", "last_timestamp")
+            first_ts = min((str(ts) for ts in (first_ts, first_compacted) if ts is not None), default=None)
+            last_ts = max((str(ts) for ts in (last_ts, last_compacted) if ts is not None), default=None)
+        
+        return {
+            "semantic_count": self.db.count("semantic_memory"),
+            "episodic_count": episodic_count,
+            "procedural_count": self.db.count("procedural_memory"),
+            "by_category": self.db.count_by("semantic_memory", "category", SEMANTIC_CATEGORIES),
+            "by_interaction_type": by_type,
+            "first_interaction": first_ts,
+            "last_interaction": last_ts,
+            "compacted_days": compacted_days
+        }
     
     # ───────────────────────────────────────────────────────────────────────────
     # MÉMOIRE DE TRAVAIL - Contexte de session
     # ───────────────────────────────────────────────────────────────────────────
     
-    def set_context(self, key: str, value: Any) -> None:
+    def working_memory(self) -> WorkingMemory:
+        """
+        Mémoire de travail de la session courante (créée au premier accès)
+        
+        Returns:
+            WorkingMemory bornée de la session
+        """
+        ctx = get_script_run_ctx()
+        if ctx is None:
+            # Hors de Streamlit (mode batch) : pas de session, une mémoire par MemorySystem
+            if self._work_memory is None:
+                self._work_memory = WorkingMemory(uuid.uuid4().hex)
+            return self._work_memory
+        
+        work_memory = st.session_state.get("work_memory")
+        if not isinstance(work_memory, WorkingMemory):
+            session = ctx.session_id
+            spill = get_spill_store(WORK_MEMORY_SPILL_PATH) if WORK_MEMORY_SPILL else None
+            previous = work_memory or {}
+            work_memory = WorkingMemory(session, spill=spill)
+            for key, value in previous.items():
+                work_memory.set(key, value)
+            st.session_state.work_memory = work_memory
+        return work_memory
+    
+    def set_context(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
         """
         Stocke une valeur dans le contexte de session
         
         Args:
             key: Clé de la valeur
             value: Valeur à stocker
+            ttl: Durée de vie (secondes), WORK_MEMORY_DEFAULT_TTL si None
         """
-        if "work_memory" not in st.session_state:
-            st.session_state.work_memory = {}
-        st.session_state.work_memory[key] = value
+        self.working_memory().set(key, value, ttl)
     
     def get_context(self, key: str, default: Any = None) -> Any:
         """
@@ -289,17 +4914,223 @@ class MemorySystem:
         Returns:
             Valeur stockée ou default
         """
-        if "work_memory" not in st.session_state:
-            st.session_state.work_memory = {}
-        return st.session_state.work_memory.get(key, default)
+        return self.working_memory().get(key, default)
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # SECTION 5 : MODULE DE PERCEPTION
 # ═══════════════════════════════════════════════════════════════════════════════
 
+class PerceptionCache:
+    """Valeurs perçues partagées par le processus : calculées une fois, ou rafraîchies après une durée de vie"""
+    
+    def __init__(self):
+        """Initialisation d'un cache vide"""
+        self._values: Dict[str, Tuple[Optional[float], Any]] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+    
+    def get(self, key: str, loader: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """
+        Valeur en cache, ou calculée (et mémorisée) si absente ou expirée
+        
+        Args:
+            key: Clé de la valeur
+            loader: Calcul de la valeur
+            ttl: Durée de vie (secondes) ; None pour une valeur statique (calculée une fois)
+        
+        Returns:
+            Valeur (partagée : à copier avant modification)
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is not None and (entry[0] is None or entry[0] > now):
+                self._stats["hits"] += 1
+                return entry[1]
+        
+        value = loader()
+        with self._lock:
+            self._values[key] = (None if ttl is None else now + ttl, value)
+            self._stats["misses"] += 1
+        return value
+    
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """Oublie une valeur (ou toutes)"""
+        with self._lock:
+            if key is None:
+                self._values.clear()
+            else:
+                self._values.pop(key, None)
+    
+    def stats(self) -> Dict[str, int]:
+        """Valeurs en cache, lectures servies par le cache et calculs"""
+        with self._lock:
+            return dict(self._stats, entries=len(self._values))
+
+
+@st.cache_resource(show_spinner=False)
+def get_perception_cache() -> PerceptionCache:
+    """Cache des perceptions unique pour le processus"""
+    return PerceptionCache()
+
+
+class SystemSampler:
+    """Mesures périodiques de /proc (CPU, mémoire, charge) dans un tampon circulaire NumPy"""
+    
+    def __init__(self, interval: float = METRICS_SAMPLE_INTERVAL, history: int = METRICS_HISTORY,
+                 proc: str = "/proc"):
+        """
+        Initialisation du tampon et démarrage des mesures en arrière-plan
+        
+        Args:
+            interval: Intervalle (secondes) entre deux mesures
+            history: Nombre de mesures conservées (les plus anciennes sont écrasées)
+            proc: Racine du système de fichiers /proc
+        """
+        self.interval = interval
+        self.proc = proc
+        self.memory_total = 0.0
+        
+        # Ligne i : mesure i modulo history ; NaN tant qu'elle n'a pas été écrite
+        self._times = np.zeros(history)
+        self._values = np.full((history, len(METRICS_FIELDS)), np.nan)
+        self._next = 0
+        self._count = 0
+        self._cpu: Optional[Tuple[int, int]] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._stats = {"samples": 0, "last_duration": None, "last_error": None}
+        
+        # Sans /proc (macOS, Windows), pas de mesures : l'interface masque les courbes
+        self.available = os.path.exists(os.path.join(proc, "stat"))
+        if self.available:
+            self._cpu = self._read_cpu()
+            self._thread = threading.Thread(target=self._run, name="delta-metrics", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+    
+    # ───────────────────────────────────────────────────────────────────────────
+    # LECTURE DE /proc
+    # ───────────────────────────────────────────────────────────────────────────
+    
+    def _read(self, name: str) -> str:
+        """Contenu d'un fichier de /proc"""
+        with open(os.path.join(self.proc, name), "r") as f:
+            return f.read()
+    
+    def _read_cpu(self) -> Tuple[int, int]:
+        """Compteurs cumulés du processeur (jiffies) : (occupé, total)"""
+        fields = [int(v) for v in self._read("stat").split("\n", 1)[0].split()[1:]]
+        idle = fields[3] + (fields[4] if len(fields) > 4 else 0)  # idle + iowait
+        total = sum(fields[:8])  # guest est déjà compté dans user
+        return total - idle, total
+    
+    def _read_memory(self) -> Tuple[float, float]:
+        """Mémoire (octets) : (totale, disponible)"""
+        values = {}
+        for line in self._read("meminfo").splitlines():
+            key, _, rest = line.partition(":")
+            if key in ("MemTotal", "MemAvailable", "MemFree"):
+                values[key] = int(rest.split()[0]) * 1024
+        return values["MemTotal"], values.get("MemAvailable", values.get("MemFree", 0))
+    
+    def sample(self) -> np.ndarray:
+        """
+        Effectue une mesure et l'écrit dans le tampon
+        
+        Returns:
+            Valeurs mesurées, dans l'ordre de METRICS_FIELDS
+        """
+        start = time.perf_counter()
+        busy, total = self._read_cpu()
+        previous, self._cpu = self._cpu, (busy, total)
+        cpu = np.nan
+        if previous is not None and total > previous[1]:
+            cpu = 100.0 * (busy - previous[0]) / (total - previous[1])
+        
+        memory_total, memory_available = self._read_memory()
+        self.memory_total = memory_total / 1024 ** 3
+        used = memory_total - memory_available
+        loads = [float(v) for v in self._read("loadavg").split()[:3]]
+        row = np.array([cpu, 100.0 * used / memory_total, used / 1024 ** 3, *loads])
+        
+        with self._lock:
+            self._times[self._next] = time.time()
+            self._values[self._next] = row
+            self._next = (self._next + 1) % len(self._times)
+            self._count = min(self._count + 1, len(self._times))
+        self._stats["samples"] += 1
+        self._stats["last_duration"] = time.perf_counter() - start
+        return row
+    
+    def _run(self) -> None:
+        """Boucle du thread : une mesure à chaque intervalle"""
+        while not self._stop.wait(self.interval):
+            try:
+                self.sample()
+                self._stats["last_error"] = None
+            except (OSError, ValueError, KeyError, IndexError) as e:
+                self._stats["last_error"] = str(e)
+    
+    # ───────────────────────────────────────────────────────────────────────────
+    # CONSULTATION - Sans nouvelle mesure
+    # ───────────────────────────────────────────────────────────────────────────
+    
+    def history(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Mesures du tampon, de la plus ancienne à la plus récente (copie)
+        
+        Returns:
+            Tuple (horodatages en secondes depuis l'époque, valeurs : une ligne par
+            mesure, une colonne par champ de METRICS_FIELDS)
+        """
+        with self._lock:
+            if self._count < len(self._times):
+                return self._times[:self._count].copy(), self._values[:self._count].copy()
+            order = np.roll(np.arange(len(self._times)), -self._next)
+            return self._times[order], self._values[order]
+    
+    def latest(self) -> Optional[Dict[str, float]]:
+        """
+        Dernière mesure
+        
+        Returns:
+            Dictionnaire champ -> valeur, ou None si aucune mesure
+        """
+        with self._lock:
+            if not self._count:
+                return None
+            row = self._values[(self._next - 1) % len(self._times)]
+            return dict(zip(METRICS_FIELDS, row.tolist()))
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Statistiques de l'échantillonneur
+        
+        Returns:
+            Disponibilité, mesures effectuées et en tampon, durée et dernière erreur
+        """
+        return dict(self._stats, available=self.available, buffered=self._count, interval=self.interval)
+    
+    def close(self) -> None:
+        """Arrête le thread de mesure"""
+        self._stop.set()
+
+
+@st.cache_resource(show_spinner=False)
+def get_system_sampler() -> SystemSampler:
+    """Échantillonneur unique pour le processus (tampon partagé par les sessions)"""
+    return SystemSampler()
+
+
 class PerceptionModule:
     """Module de perception de l'environnement"""
     
+    def __init__(self):
+        """Initialisation (cache des perceptions et métriques système partagés par le processus)"""
+        self.cache = get_perception_cache()
+        self.sampler = get_system_sampler()
+    
     @staticmethod
     def get_time() -> Dict[str, str]:
         """
@@ -316,29 +5147,23 @@ class PerceptionModule:
             "iso": now.isoformat()
         }
     
-    @staticmethod
-    def get_location() -> Dict[str, str]:
+    def get_location(self) -> Dict[str, str]:
         """
-        Retourne la localisation
+        Retourne la localisation (constante : construite une fois par processus)
         
         Returns:
             Dictionnaire avec ville, région, pays
         """
-        return {
+        return dict(self.cache.get("location", lambda: {
             "city": "Annecy",
             "region": "Rhône-Alpes",
             "country": "France",
             "full": LOCATION
-        }
+        }))
     
     @staticmethod
-    def get_system_info() -> Dict[str, str]:
-        """
-        Retourne les informations système
-        
-        Returns:
-            Dictionnaire avec OS, version, architecture
-        """
+    def _static_system_info() -> Dict[str, str]:
+        """Faits système fixes pour la vie du processus (platform.processor() peut lancer un sous-processus)"""
         return {
             "os": platform.system(),
             "os_version": platform.version(),
@@ -346,21 +5171,334 @@ class PerceptionModule:
             "processor": platform.processor(),
             "python_version": platform.python_version()
         }
+    
+    @staticmethod
+    def _host_status() -> Dict[str, str]:
+        """Faits système qui changent lentement (nom d'hôte, espace disque)"""
+        disk = shutil.disk_usage(os.getcwd())
+        return {
+            "hostname": platform.node(),
+            "disk_free": f"{disk.free / 1024 ** 3:.1f} Go libres sur {disk.total / 1024 ** 3:.1f} Go"
+        }
+    
+    def get_system_info(self) -> Dict[str, str]:
+        """
+        Retourne les informations système (statiques en cache, les autres rafraîchies après PERCEPTION_TTL)
+        
+        Returns:
+            Dictionnaire avec OS, version, architecture, hôte et espace disque
+        """
+        return {
+            **self.cache.get("system", self._static_system_info),
+            **self.cache.get("host", self._host_status, ttl=PERCEPTION_TTL)
+        }
+    
+    def get_load(self, window: float = 300.0) -> Optional[Dict[str, float]]:
+        """
+        Charge système, lue dans le tampon de l'échantillonneur (aucune nouvelle mesure)
+        
+        Args:
+            window: Durée (secondes) sur laquelle calculer moyenne et maximum du CPU
+        
+        Returns:
+            Dernières valeurs de METRICS_FIELDS, mémoire totale (Go), "cpu_mean" et
+            "cpu_max" sur la fenêtre ; None si aucune mesure n'est disponible
+        """
+        latest = self.sampler.latest()
+        if latest is None:
+            return None
+        times, values = self.sampler.history()
+        cpu = values[times >= time.time() - window, METRICS_FIELDS.index("cpu")]
+        cpu = cpu[~np.isnan(cpu)]
+        return dict(
+            latest,
+            memory_total=self.sampler.memory_total,
+            cpu_mean=float(cpu.mean()) if cpu.size else float("nan"),
+            cpu_max=float(cpu.max()) if cpu.size else float("nan")
+        )
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # SECTION 6 : MODULE DE COMMUNICATION
 # ═══════════════════════════════════════════════════════════════════════════════
 
+class SMTPPool:
+    """Connexions SMTP authentifiées réutilisées : maintien par NOOP, reconnexion si coupées"""
+    
+    def __init__(self, host: str, port: int, username: str = "", password: str = "",
+                 starttls: bool = True, size: int = SMTP_POOL_SIZE, timeout: float = SMTP_TIMEOUT,
+                 keepalive: float = SMTP_KEEPALIVE_INTERVAL, max_idle: float = SMTP_MAX_IDLE):
+        """
+        Initialisation du pool (aucune connexion avant le premier envoi)
+        
+        Args:
+            host: Serveur SMTP
+            port: Port (465 : TLS implicite, sinon STARTTLS si starttls)
+            username: Compte (vide : pas d'authentification)
+            password: Mot de passe du compte
+            starttls: Chiffre la connexion par STARTTLS (ports 25 et 587)
+            size: Connexions simultanées maximales
+            timeout: Délai maximal (secondes) d'une opération
+            keepalive: Inactivité (secondes) après laquelle une connexion est vérifiée par NOOP
+            max_idle: Inactivité (secondes) après laquelle une connexion est fermée
+        """
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.size = size
+        self.timeout = timeout
+        self.keepalive = keepalive
+        self.max_idle = max_idle
+        
+        self._idle: deque = deque()  # (connexion, dernier envoi, dernière vérification), la plus récente à droite
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._stats = {"connections": 0, "reused": 0, "reconnections": 0, "noops": 0,
+                       "expired": 0, "sent": 0, "failed": 0, "last_error": None}
+        
+        self._thread = threading.Thread(target=self._run, name="delta-smtp-keepalive", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+    
+    # ───────────────────────────────────────────────────────────────────────────
+    # CONNEXIONS
+    # ───────────────────────────────────────────────────────────────────────────
+    
+    def _connect(self) -> smtplib.SMTP:
+        """Ouvre, chiffre et authentifie une connexion"""
+        if self.port == 465:
+            server = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout)
+        else:
+            server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.starttls:
+                server.starttls()
+        try:
+            if self.username:
+                server.login(self.username, self.password)
+        except Exception:
+            self._discard(server)
+            raise
+        with self._lock:
+            self._stats["connections"] += 1
+        return server
+    
+    @staticmethod
+    def _alive(server: smtplib.SMTP) -> bool:
+        """Vérifie par NOOP qu'une connexion répond encore"""
+        try:
+            return server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+    
+    @staticmethod
+    def _discard(server: smtplib.SMTP) -> None:
+        """Ferme une connexion sans lever d'erreur"""
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+    
+    def _acquire(self) -> smtplib.SMTP:
+        """Connexion libre (réutilisée si possible ; emplacement du pool déjà réservé)"""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                server, _, last_checked = self._idle.pop()
+            # Une connexion restée inactive a pu être fermée par le serveur
+            if time.monotonic() - last_checked < self.keepalive or self._alive(server):
+                with self._lock:
+                    self._stats["reused"] += 1
+                return server
+            self._discard(server)
+        return self._connect()
+    
+    def _release(self, server: smtplib.SMTP) -> None:
+        """Remet une connexion en état de servir dans le pool"""
+        now = time.monotonic()
+        with self._lock:
+            self._idle.append((server, now, now))
+    
+    def _run(self) -> None:
+        """Boucle du thread : NOOP sur les connexions inactives, fermeture des trop anciennes"""
+        while not self._stop.wait(self.keepalive / 2):
+            now = time.monotonic()
+            with self._lock:
+                due = [entry for entry in self._idle if now - entry[2] >= self.keepalive]
+                for entry in due:
+                    self._idle.remove(entry)
+            for server, last_used, _ in due:
+                if now - last_used >= self.max_idle:
+                    self._discard(server)
+                    with self._lock:
+                        self._stats["expired"] += 1
+                elif self._alive(server):
+                    with self._lock:
+                        self._stats["noops"] += 1
+                        self._idle.appendleft((server, last_used, now))
+                else:
+                    self._discard(server)
+    
+    # ───────────────────────────────────────────────────────────────────────────
+    # ENVOI
+    # ───────────────────────────────────────────────────────────────────────────
+    
+    @staticmethod
+    def _recipients(message: Any) -> List[str]:
+        """Adresses des destinataires d'un message (To, Cc, Bcc)"""
+        fields = [v for key in ("To", "Cc", "Bcc") for v in message.get_all(key, [])]
+        return [address for _, address in email.utils.getaddresses(fields) if address]
+    
+    def _send_chunk(self, messages: List[Tuple[int, Any]]) -> List[Dict[str, Any]]:
+        """
+        Envoie des messages l'un après l'autre sur une même connexion
+        
+        Une connexion coupée en cours de route est rouverte, et le message renvoyé une fois.
+        """
+        results = []
+        with self._slots:
+            server = None
+            unreachable = None  # Serveur injoignable : les messages suivants ne sont pas tentés
+            try:
+                for index, message in messages:
+                    recipients = self._recipients(message)
+                    result = {"index": index, "to": recipients, "sent": False, "accepted": [],
+                              "refused": {}, "error": unreachable}
+                    for attempt in range(0 if unreachable else 2):
+                        try:
+                            if server is None:
+                                # Après une coupure, les autres connexions inactives sont suspectes
+                                server = self._acquire() if attempt == 0 else self._connect()
+                            refused = server.send_message(message)
+                            result["refused"] = {a: f"{code} {reason.decode(errors='replace')}"
+                                                 for a, (code, reason) in refused.items()}
+                            result["sent"] = True
+                            break
+                        except smtplib.SMTPRecipientsRefused as e:
+                            result["refused"] = {a: f"{code} {reason.decode(errors='replace')}"
+                                                 for a, (code, reason) in e.recipients.items()}
+                            result["error"] = "tous les destinataires ont été refusés"
+                            break
+                        except (smtplib.SMTPSenderRefused, smtplib.SMTPDataError, smtplib.SMTPNotSupportedError) as e:
+                            # Refus du message : la connexion reste utilisable
+                            result["error"] = str(e)
+                            break
+                        except (smtplib.SMTPException, OSError) as e:
+                            result["error"] = str(e)
+                            if server is None:
+                                # Ouverture impossible : une seule nouvelle tentative pour tout le lot
+                                if isinstance(e, smtplib.SMTPAuthenticationError):
+                                    unreachable = result["error"] = f"authentification refusée : {e}"
+                                    break
+                                if attempt == 1:
+                                    unreachable = result["error"] = f"serveur injoignable : {e}"
+                                continue
+                            # Connexion perdue : le message est renvoyé sur une nouvelle connexion
+                            self._discard(server)
+                            server = None
+                            if attempt == 0:
+                                with self._lock:
+                                    self._stats["reconnections"] += 1
+                    if result["sent"]:
+                        result["error"] = None
+                    result["accepted"] = [a for a in recipients if result["sent"] and a not in result["refused"]]
+                    with self._lock:
+                        self._stats["sent" if result["sent"] else "failed"] += 1
+                        if result["error"]:
+                            self._stats["last_error"] = result["error"]
+                    results.append(result)
+            finally:
+                if server is not None:
+                    self._release(server)
+        return results
+    
+    def send_bulk(self, messages: List[Any]) -> List[Dict[str, Any]]:
+        """
+        Envoie des messages sur une ou plusieurs connexions du pool
+        
+        Les messages sont répartis par blocs de SMTP_BULK_CHUNK, chaque bloc envoyé
+        à la suite sur une même connexion (sans nouvelle poignée de main TLS ni login).
+        
+        Args:
+            messages: Messages (email.message.Message) avec leurs en-têtes From et To
+        
+        Returns:
+            Un résultat par message, dans l'ordre : index, to, sent, accepted,
+            refused (adresse -> réponse du serveur) et error
+        """
+        indexed = list(enumerate(messages))
+        if not indexed:
+            return []
+        workers = max(1, min(self.size, math.ceil(len(indexed) / SMTP_BULK_CHUNK)))
+        chunks = [indexed[i::workers] for i in range(workers)]
+        if workers == 1:
+            return self._send_chunk(chunks[0])
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="delta-smtp") as executor:
+            results = [r for chunk in executor.map(self._send_chunk, chunks) for r in chunk]
+        return sorted(results, key=lambda r: r["index"])
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Statistiques du pool
+        
+        Returns:
+            Connexions ouvertes, réutilisées, rouvertes, NOOP, envois et dernière erreur
+        """
+        with self._lock:
+            return dict(self._stats, idle=len(self._idle), size=self.size)
+    
+    def close(self) -> None:
+        """Arrête le maintien et ferme les connexions inactives"""
+        self._stop.set()
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for server, _, _ in idle:
+            self._discard(server)
+
+
+@st.cache_resource(show_spinner=False)
+def get_smtp_pool(host: str, port: int, username: str, password: str, starttls: bool) -> SMTPPool:
+    """Pool SMTP unique par processus et par compte"""
+    return SMTPPool(host, port, username, password, starttls)
+
+
 class CommunicationModule:
     """Module de gestion des communications (Email)"""
     
     def __init__(self):
         """Initialisation avec configuration email depuis secrets"""
-        self.smtp_server = st.secrets.get("SMTP_SERVER", "smtp.gmail.com")
-        self.smtp_port = int(st.secrets.get("SMTP_PORT", 587))
-        self.imap_server = st.secrets.get("IMAP_SERVER", "imap.gmail.com")
-        self.email_address = st.secrets.get("EMAIL_ADDRESS", "")
-        self.email_password = st.secrets.get("EMAIL_PASSWORD", "")
+        self.smtp_server = get_secret("SMTP_SERVER", "smtp.gmail.com")
+        self.smtp_port = int(get_secret("SMTP_PORT", 587))
+        self.imap_server = get_secret("IMAP_SERVER", "imap.gmail.com")
+        self.email_address = get_secret("EMAIL_ADDRESS", "")
+        self.email_password = get_secret("EMAIL_PASSWORD", "")
+        self.smtp_starttls = str(get_secret("SMTP_STARTTLS", "true")).lower() not in ("0", "false", "non")
+    
+    def smtp_pool(self) -> SMTPPool:
+        """Pool SMTP du compte configuré (créé au premier envoi)"""
+        return get_smtp_pool(self.smtp_server, self.smtp_port, self.email_address, self.email_password,
+                             self.smtp_starttls)
+    
+    def build_message(self, to: str, subject: str, body: str) -> MIMEMultipart:
+        """
+        Construit un email texte depuis l'adresse configurée
+        
+        Args:
+            to: Destinataire(s), séparés par des virgules
+            subject: Sujet de l'email
+            body: Corps de l'email
+        
+        Returns:
+            Message prêt à envoyer
+        """
+        msg = MIMEMultipart()
+        msg['From'] = self.email_address
+        msg['To'] = to
+        msg['Subject'] = subject
+        msg.attach(MIMEText(body, 'plain'))
+        return msg
     
     def send_email(self, to: str, subject: str, body: str) -> bool:
         """
@@ -375,28 +5513,104 @@ class CommunicationModule:
             True si envoyé, False sinon
         """
         if not self.email_address or not self.email_password:
-            st.error("❌ Configuration email manquante dans les secrets")
+            UI_SINK.error("❌ Configuration email manquante dans les secrets")
+            return False
+        
+        try:
+            result = self.smtp_pool().send_bulk([self.build_message(to, subject, body)])[0]
+        except Exception as e:
+            UI_SINK.error(f"❌ Erreur envoi email: {e}")
+            return False
+        
+        if not result["sent"]:
+            UI_SINK.error(f"❌ Erreur envoi email: {result['error']}")
             return False
+        if result["refused"]:
+            UI_SINK.warning(f"⚠️ Destinataire(s) refusé(s) : {', '.join(result['refused'])}")
+        UI_SINK.success(f"✅ Email envoyé à {to}")
+        return True
+    
+    def send_bulk(self, messages: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+        """
+        Envoie une série d'emails sur les connexions du pool (NÉCESSITE AUTORISATION)
+        
+        Args:
+            messages: Emails à envoyer, chacun avec "to", "subject" et "body"
+        
+        Returns:
+            Un résultat par email, dans l'ordre (voir SMTPPool.send_bulk)
+        """
+        if not self.email_address or not self.email_password:
+            UI_SINK.error("❌ Configuration email manquante dans les secrets")
+            return []
+        
+        try:
+            results = self.smtp_pool().send_bulk(
+                [self.build_message(m["to"], m["subject"], m["body"]) for m in messages]
+            )
+        except Exception as e:
+            UI_SINK.error(f"❌ Erreur envoi email: {e}")
+            return []
+        
+        sent = sum(r["sent"] for r in results)
+        if sent == len(results):
+            UI_SINK.success(f"✅ {sent} email(s) envoyé(s)")
+        else:
+            UI_SINK.warning(f"⚠️ {sent} email(s) envoyé(s) sur {len(results)}")
+        return results
+    
+    @staticmethod
+    def header_text(headers: Any, name: str, default: str) -> str:
+        """
+        Texte d'un en-tête, mots encodés RFC 2047 (=?utf-8?q?...?=) décodés
+        
+        Args:
+            headers: En-têtes analysés avec email.policy.default (UTF-8 brut toléré)
+            name: Nom de l'en-tête
+            default: Valeur si l'en-tête est absent
+        
+        Returns:
+            Texte décodé sur une ligne (brut s'il est mal formé)
+        """
+        try:
+            value = headers.get(name)
+        except (ValueError, IndexError, TypeError, email.errors.MessageError):
+            value = next((v for k, v in headers.raw_items() if k.lower() == name.lower()), None)
+        return " ".join(str(value).split()) if value else default
+    
+    @classmethod
+    def parse_header_fetch(cls, msg_data: List[Any]) -> List[Dict]:
+        """
+        Traduit la réponse d'un FETCH (UID FLAGS RFC822.SIZE BODY.PEEK[HEADER.FIELDS ...])
+        
+        Chaque message arrive en un tuple (attributs, en-têtes) éventuellement suivi
+        des attributs envoyés après les en-têtes (b' FLAGS (\\Seen))').
+        
+        Args:
+            msg_data: Réponse de imaplib pour la plage de messages
         
-        try:
-            msg = MIMEMultipart()
-            msg['From'] = self.email_address
-            msg['To'] = to
-            msg['Subject'] = subject
-            msg.attach(MIMEText(body, 'plain'))
-            
-            server = smtplib.SMTP(self.smtp_server, self.smtp_port)
-            server.starttls()
-            server.login(self.email_address, self.email_password)
-            server.send_message(msg)
-            server.quit()
-            
-            st.success(f"✅ Email envoyé à {to}")
-            return True
-            
-        except Exception as e:
-            st.error(f"❌ Erreur envoi email: {e}")
-            return False
+        Returns:
+            Emails (from, subject, date, uid, size, seen) dans l'ordre de la boîte
+        """
+        emails = []
+        for i, part in enumerate(msg_data):
+            if not isinstance(part, tuple):
+                continue
+            trailer = msg_data[i + 1] if i + 1 < len(msg_data) and isinstance(msg_data[i + 1], bytes) else b""
+            attributes = (part[0] + b" " + trailer).decode("ascii", errors="replace")
+            uid = re.search(r"\bUID (\d+)", attributes)
+            size = re.search(r"\bRFC822\.SIZE (\d+)", attributes)
+            flags = re.search(r"\bFLAGS \(([^)]*)\)", attributes)
+            headers = email.message_from_bytes(part[1], policy=email.policy.default)
+            emails.append({
+                "from": cls.header_text(headers, 'From', 'Inconnu'),
+                "subject": cls.header_text(headers, 'Subject', 'Sans sujet'),
+                "date": cls.header_text(headers, 'Date', 'Date inconnue'),
+                "uid": int(uid.group(1)) if uid else None,
+                "size": int(size.group(1)) if size else None,
+                "seen": bool(flags and "\\Seen" in flags.group(1).split())
+            })
+        return emails
     
     def read_inbox(self, max_emails: int = 10) -> List[Dict]:
         """
@@ -409,37 +5623,33 @@ class CommunicationModule:
             Liste des emails
         """
         if not self.email_address or not self.email_password:
-            st.error("❌ Configuration email manquante dans les secrets")
+            UI_SINK.error("❌ Configuration email manquante dans les secrets")
             return []
         
         try:
             mail = imaplib.IMAP4_SSL(self.imap_server)
             mail.login(self.email_address, self.email_password)
-            mail.select('inbox')
-            
-            _, messages = mail.search(None, 'ALL')
-            email_ids = messages[0].split()
-            
-            emails = []
-            for email_id in email_ids[-max_emails:]:
-                _, msg_data = mail.fetch(email_id, '(RFC822)')
-                email_body = msg_data[0][1]
-                email_message = email.message_from_bytes(email_body)
-                
-                emails.append({
-                    "from": email_message.get('From', 'Inconnu'),
-                    "subject": email_message.get('Subject', 'Sans sujet'),
-                    "date": email_message.get('Date', 'Date inconnue')
-                })
-            
-            mail.close()
-            mail.logout()
+            try:
+                # Lecture seule : la liste ne marque aucun message comme lu
+                _, data = mail.select('inbox', readonly=True)
+                total = int(data[0] or 0)
+                emails = []
+                if total and max_emails > 0:
+                    # Un seul FETCH pour la plage des derniers messages : en-têtes utiles,
+                    # taille et drapeaux, sans SEARCH préalable ni téléchargement des corps
+                    _, msg_data = mail.fetch(
+                        f"{max(total - max_emails + 1, 1)}:{total}",
+                        f"(UID FLAGS RFC822.SIZE BODY.PEEK[HEADER.FIELDS ({INBOX_HEADER_FIELDS})])"
+                    )
+                    emails = self.parse_header_fetch(msg_data)
+            finally:
+                mail.logout()
             
-            st.success(f"✅ {len(emails)} email(s) récupéré(s)")
+            UI_SINK.success(f"✅ {len(emails)} email(s) récupéré(s)")
             return emails
             
         except Exception as e:
-            st.error(f"❌ Erreur lecture emails: {e}")
+            UI_SINK.error(f"❌ Erreur lecture emails: {e}")
             return []
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -472,9 +5682,9 @@ class SystemModule:
             success = result.returncode == 0
             
             if success:
-                st.success(f"✅ Commande exécutée avec succès")
+                UI_SINK.success(f"✅ Commande exécutée avec succès")
             else:
-                st.error(f"❌ Commande échouée (code {result.returncode})")
+                UI_SINK.error(f"❌ Commande échouée (code {result.returncode})")
             
             return {
                 "success": success,
@@ -484,7 +5694,7 @@ class SystemModule:
             }
             
         except subprocess.TimeoutExpired:
-            st.error("❌ Timeout : la commande a pris trop de temps")
+            UI_SINK.error("❌ Timeout : la commande a pris trop de temps")
             return {
                 "success": False,
                 "output": "",
@@ -492,7 +5702,7 @@ class SystemModule:
                 "return_code": -1
             }
         except Exception as e:
-            st.error(f"❌ Erreur exécution : {e}")
+            UI_SINK.error(f"❌ Erreur exécution : {e}")
             return {
                 "success": False,
                 "output": "",
@@ -513,23 +5723,303 @@ class SystemModule:
         """
         try:
             files = os.listdir(path)
-            st.success(f"✅ {len(files)} fichier(s) trouvé(s)")
+            UI_SINK.success(f"✅ {len(files)} fichier(s) trouvé(s)")
             return files
         except Exception as e:
-            st.error(f"❌ Erreur lecture répertoire: {e}")
+            UI_SINK.error(f"❌ Erreur lecture répertoire: {e}")
             return []
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # SECTION 8 : CERVEAU DELTA (ORCHESTRATEUR PRINCIPAL)
 # ═══════════════════════════════════════════════════════════════════════════════
 
+class IntentRouter:
+    """Aiguillage des commandes : tous les mots-clés compilés en un seul automate"""
+    
+    def __init__(self):
+        """Initialisation d'un registre vide (compilé au premier aiguillage)"""
+        self._intents: List[Dict] = []
+        self._keywords: Dict[str, List[int]] = {}
+        self._patterns: List[int] = []
+        self._automaton: Optional[re.Pattern] = None
+        self._compiled = False
+        self._lock = threading.Lock()
+    
+    def register(self, name: str, handler: Callable[..., Optional[str]], keywords: Optional[List[str]] = None,
+                 pattern: Any = None, priority: int = 0, memoize: Optional[float] = None,
+                 volatile: bool = False) -> None:
+        """
+        Enregistre une intention (le registre est recompilé au prochain aiguillage)
+        
+        Args:
+            name: Nom de l'intention
+            handler: Gestionnaire (delta, commande, correspondance) -> réponse, ou None pour
+                     laisser la main à l'intention suivante ; un générateur (synchrone ou
+                     asynchrone) produit la réponse par fragments, et ne rien produire
+                     laisse aussi la main
+            keywords: Mots-clés (mots entiers, en minuscules)
+            pattern: Expression régulière (texte ou compilée) cherchée dans la commande
+            priority: Les intentions de priorité plus haute passent en premier
+            memoize: Durée de vie (secondes) de la réponse mémorisée, pour un gestionnaire
+                     déterministe qui ne dépend pas du texte de la commande (None : jamais)
+            volatile: Réponse valable seulement à l'instant (heure, charge) : jamais
+                      resservie par le rappel des commandes non reconnues
+        """
+        if not keywords and pattern is None:
+            raise ValueError(f"Intention {name} sans mot-clé ni motif")
+        with self._lock:
+            self._intents.append({
+                "name": name,
+                "handler": handler,
+                "keywords": [k.lower() for k in keywords or []],
+                "pattern": re.compile(pattern) if isinstance(pattern, str) else pattern,
+                "priority": priority,
+                "memoize": memoize,
+                "volatile": volatile
+            })
+            self._compiled = False
+    
+    def intent(self, name: str, keywords: Optional[List[str]] = None, pattern: Any = None,
+               priority: int = 0, memoize: Optional[float] = None, volatile: bool = False) -> Callable:
+        """Décorateur équivalent à register (méthodes de DELTA ou fonctions d'un module)"""
+        def decorator(handler: Callable) -> Callable:
+            self.register(name, handler, keywords, pattern, priority, memoize, volatile)
+            return handler
+        return decorator
+    
+    def is_volatile(self, command: str) -> bool:
+        """Une intention à réponse instantanée (volatile) reconnaît cette commande"""
+        return any(intent["volatile"] for intent, _ in self.route(command))
+    
+    @staticmethod
+    def chunks(result: Any) -> Optional[Iterator[str]]:
+        """
+        Fragments d'une réponse de gestionnaire (texte, générateur ou générateur asynchrone)
+        
+        Le premier fragment est lu ici : un générateur qui ne produit rien
+        laisse la main, comme un gestionnaire qui renvoie None.
+        
+        Returns:
+            Itérateur des fragments, ou None si le gestionnaire laisse la main
+        """
+        if result is None:
+            return None
+        if isinstance(result, str):
+            return iter([result])
+        fragments = iterate_async(result) if inspect.isasyncgen(result) else iter(result)
+        first = next(fragments, None)
+        if first is None:
+            return None
+        return itertools.chain([first], fragments)
+    
+    @classmethod
+    def respond(cls, intent: Dict, delta: Any, command: str, match: Optional[re.Match],
+                cache: Optional["PerceptionCache"] = None) -> Optional[str]:
+        """
+        Appelle le gestionnaire d'une intention et assemble sa réponse
+        
+        Args:
+            intent: Intention renvoyée par route
+            delta: Instance passée au gestionnaire
+            command: Commande saisie
+            match: Correspondance renvoyée par route
+            cache: Cache des réponses mémorisées (intentions avec memoize)
+        
+        Returns:
+            Réponse, ou None si le gestionnaire laisse la main
+        """
+        def answer() -> Optional[str]:
+            fragments = cls.chunks(intent["handler"](delta, command, match))
+            return None if fragments is None else "".join(fragments)
+        
+        if intent["memoize"] is None or cache is None:
+            return answer()
+        return cache.get(f"intent:{intent['name']}", answer, ttl=intent["memoize"])
+    
+    @classmethod
+    def stream(cls, intent: Dict, delta: Any, command: str, match: Optional[re.Match],
+               cache: Optional["PerceptionCache"] = None) -> Optional[Iterator[str]]:
+        """
+        Appelle le gestionnaire d'une intention sans attendre la fin de sa réponse
+        
+        Args:
+            intent: Intention renvoyée par route
+            delta: Instance passée au gestionnaire
+            command: Commande saisie
+            match: Correspondance renvoyée par route
+            cache: Cache des réponses mémorisées (servies d'un bloc)
+        
+        Returns:
+            Itérateur des fragments, ou None si le gestionnaire laisse la main
+        """
+        if intent["memoize"] is not None and cache is not None:
+            return cls.chunks(cls.respond(intent, delta, command, match, cache))
+        return cls.chunks(intent["handler"](delta, command, match))
+    
+    @staticmethod
+    def _trie_pattern(words: List[str]) -> str:
+        """
+        Alternative factorisée en arbre de préfixes ("inf(?:o|ormatique)")
+        
+        Le moteur ne compare chaque position qu'aux branches qui partagent le
+        préfixe déjà lu : le coût ne croît pas avec le nombre de mots-clés.
+        """
+        trie: Dict[str, Dict] = {}
+        for word in words:
+            node = trie
+            for char in word:
+                node = node.setdefault(char, {})
+            node[""] = {}
+        
+        def build(node: Dict[str, Dict]) -> str:
+            branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+            if not branches:
+                return ""
+            body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+            # Fin de mot possible ici : branche optionnelle (la plus longue est essayée d'abord)
+            return f"(?:{body})?" if "" in node else body
+        
+        return build(trie)
+    
+    def _compile(self) -> None:
+        """Construit l'automate des mots-clés (verrou déjà pris)"""
+        keywords: Dict[str, List[int]] = {}
+        for i, intent in enumerate(self._intents):
+            for keyword in intent["keywords"]:
+                keywords.setdefault(keyword, []).append(i)
+        self._keywords = keywords
+        self._patterns = [i for i, intent in enumerate(self._intents) if intent["pattern"] is not None]
+        # Mots entiers : "info" ne correspond pas dans "information"
+        self._automaton = re.compile(rf"(?<!\w){self._trie_pattern(list(keywords))}(?!\w)") if keywords else None
+        self._compiled = True
+    
+    def route(self, command: str) -> List[Tuple[Dict, Optional[re.Match]]]:
+        """
+        Intentions correspondant à une commande, de la plus à la moins prioritaire
+        
+        Les mots-clés sont trouvés en une seule passe ; à priorité égale, l'intention
+        qui a le plus de mots-clés dans la commande passe d'abord, puis la plus tôt citée.
+        
+        Args:
+            command: Commande saisie
+        
+        Returns:
+            Liste de tuples (intention, correspondance)
+        """
+        text = command.lower().strip()
+        with self._lock:
+            if not self._compiled:
+                self._compile()
+            intents, keywords, patterns, automaton = self._intents, self._keywords, self._patterns, self._automaton
+        
+        hits: Dict[int, List] = {}  # Intention -> [nombre de mots-clés, première correspondance]
+        if automaton is not None:
+            for match in automaton.finditer(text):
+                for i in keywords[match.group(0)]:
+                    if i in hits:
+                        hits[i][0] += 1
+                    else:
+                        hits[i] = [1, match]
+        for i in patterns:
+            if i not in hits:
+                match = intents[i]["pattern"].search(text)
+                if match:
+                    hits[i] = [1, match]
+        
+        ranked = sorted(hits, key=lambda i: (-intents[i]["priority"], -hits[i][0], hits[i][1].start(), i))
+        return [(intents[i], hits[i][1]) for i in ranked]
+    
+    def names(self) -> List[str]:
+        """Noms des intentions enregistrées"""
+        return [intent["name"] for intent in self._intents]
+
+
+# Registre partagé : les modules y ajoutent leurs intentions avec @INTENT_ROUTER.intent(...)
+INTENT_ROUTER = IntentRouter()
+
+
+def iterate_async(generator: Any) -> Iterator[Any]:
+    """
+    Parcourt un générateur asynchrone depuis du code synchrone (st.write_stream, mode batch)
+    
+    Chaque étape tourne dans une boucle d'événements propre au parcours,
+    fermée (générateur compris) à la fin ou à l'abandon du parcours.
+    
+    Args:
+        generator: Générateur asynchrone
+    
+    Yields:
+        Valeurs produites par le générateur
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(generator.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        loop.run_until_complete(generator.aclose())
+        loop.run_until_complete(loop.shutdown_default_executor())
+        loop.close()
+
+
+class ResponseStream:
+    """Réponse de DELTA parcourue fragment par fragment, avec ses temps de réponse"""
+    
+    def __init__(self, fragments: Iterator[str]):
+        """
+        Démarre la mesure (le traitement commence au premier fragment demandé)
+        
+        Args:
+            fragments: Fragments de la réponse
+        """
+        self._fragments = fragments
+        self.parts: List[str] = []
+        self.start = time.perf_counter()
+        self.first_fragment: Optional[float] = None
+        self.total: Optional[float] = None
+    
+    def __iter__(self) -> Iterator[str]:
+        """Fragments de la réponse, mesurés au passage"""
+        for fragment in self._fragments:
+            if self.first_fragment is None:
+                self.first_fragment = time.perf_counter() - self.start
+            self.parts.append(fragment)
+            yield fragment
+        self.total = time.perf_counter() - self.start
+    
+    @property
+    def text(self) -> str:
+        """Réponse reçue jusqu'ici"""
+        return "".join(self.parts)
+    
+    def timings(self) -> Dict[str, Optional[float]]:
+        """
+        Temps de réponse
+        
+        Returns:
+            Secondes jusqu'au premier fragment ("ttft") et jusqu'au dernier ("total")
+        """
+        return {"ttft": self.first_fragment, "total": self.total}
+
+
+def percentile_ms(latencies: List[float], q: float) -> float:
+    """Percentile (0-100) d'une série de durées en secondes, en millisecondes"""
+    return float(np.percentile(latencies, q)) * 1000 if latencies else 0.0
+
 class DELTA:
     """Intelligence Artificielle Cognitive - Système de Supervision"""
     
-    def __init__(self):
-        """Initialisation de tous les modules de DELTA"""
+    def __init__(self, db: Optional[StorageBackend] = None):
+        """
+        Initialisation de tous les modules de DELTA
+        
+        Args:
+            db: Moteur de stockage (None : celui choisi dans les secrets)
+        """
         self.name = "DELTA"
-        self.db = SupabaseManager()
+        self.db = db if db is not None else create_storage_backend()
         self.memory = MemorySystem(self.db)
         self.perception = PerceptionModule()
         self.communication = CommunicationModule()
@@ -555,54 +6045,157 @@ class DELTA:
         
         return f"{greeting}, Monsieur Sezer. DELTA est opérationnel et à votre service."
     
-    def process_command(self, command: str) -> str:
+    def stream_command(self, command: str) -> ResponseStream:
         """
-        Traite une commande utilisateur
+        Traite une commande utilisateur, réponse produite par fragments
+        
+        Les intentions candidates sont trouvées en une passe par INTENT_ROUTER ;
+        la première dont le gestionnaire répond l'emporte. Les gestionnaires lents
+        sont des générateurs : le premier fragment s'affiche sans attendre la suite.
         
         Args:
             command: Commande saisie par l'utilisateur
         
         Returns:
-            Réponse de DELTA
+            ResponseStream à parcourir (st.write_stream), avec ses temps de réponse
         """
-        command_lower = command.lower()
-        
-        # Commande : Heure et date
-        if any(word in command_lower for word in ["heure", "date", "jour"]):
-            info = self.perception.get_time()
-            return f"Nous sommes le **{info['day']} {info['date']}** et il est **{info['time']}**, Monsieur Sezer."
-        
-        # Commande : Localisation
-        elif any(word in command_lower for word in ["où", "localisation", "position"]):
-            loc = self.perception.get_location()
-            return f"Vous êtes à **{loc['full']}**, Monsieur Sezer."
+        return ResponseStream(self._response_fragments(command))
+    
+    def _response_fragments(self, command: str) -> Iterator[str]:
+        """Fragments de la réponse à une commande (voir stream_command)"""
+        for intent, match in INTENT_ROUTER.route(command):
+            fragments = INTENT_ROUTER.stream(intent, self, command, match, self.perception.cache)
+            if fragments is not None:
+                yield from fragments
+                return
         
-        # Commande : Informations système
-        elif any(word in command_lower for word in ["système", "info", "ordinateur"]):
-            sys_info = self.perception.get_system_info()
-            return f"**Système** : {sys_info['os']} {sys_info['os_version']}\n**Architecture** : {sys_info['architecture']}\n**Python** : {sys_info['python_version']}"
+        # Commande non reconnue : réponse la plus proche déjà donnée, s'il y en a une
+        for memory in self.memory.recall(command, source="episodic", min_score=RECALL_MIN_SCORE):
+            if (memory["response"] and not memory["response"].startswith(UNKNOWN_COMMAND_RESPONSE[:20])
+                    and not INTENT_ROUTER.is_volatile(memory["content"])):
+                yield (f"Je n'ai pas compris exactement, mais vous m'avez déjà demandé "
+                       f"« {memory['content']} » :\n\n{memory['response']}")
+                return
+        yield UNKNOWN_COMMAND_RESPONSE
+    
+    def process_command(self, command: str) -> str:
+        """
+        Traite une commande utilisateur (réponse complète, voir stream_command)
         
-        # Commande : Salutation
-        elif any(word in command_lower for word in ["bonjour", "salut", "hello", "hey"]):
-            return self.greet_user()
+        Args:
+            command: Commande saisie par l'utilisateur
         
-        # Commande non reconnue
-        else:
-            return "Je n'ai pas compris votre commande, Monsieur Sezer. Essayez : 'quelle heure est-il ?', 'où suis-je ?' ou 'info système'."
+        Returns:
+            Réponse de DELTA
+        """
+        return "".join(self.stream_command(command))
     
-    def log_interaction(self, user_input: str, delta_response: str) -> None:
+    # ───────────────────────────────────────────────────────────────────────────
+    # INTENTIONS - Gestionnaires enregistrés auprès d'INTENT_ROUTER
+    # ───────────────────────────────────────────────────────────────────────────
+    
+    @INTENT_ROUTER.intent("fait", pattern=FACT_QUESTION_PATTERN, priority=30)
+    def _intent_fact(self, command: str, match: re.Match) -> Optional[str]:
+        """Question sur un fait mémorisé ("quel est mon email principal ?")"""
+        facts = self.memory.find_facts(match.group(1))
+        if not facts:
+            return None
+        fact = facts[0]
+        return f"Votre **{fact['key'].replace('_', ' ')}** est **{fact['value']}**, Monsieur Sezer."
+    
+    @INTENT_ROUTER.intent("recherche", pattern=SEARCH_COMMAND_PATTERN, priority=30)
+    def _intent_search(self, command: str, match: re.Match) -> Iterator[str]:
+        """Recherche dans les mémoires ("cherche réunion genève"), un résultat par fragment"""
+        hits = self.memory.search(match.group(1), limit=5)
+        if not hits:
+            yield f"Je n'ai rien trouvé pour « {match.group(1)} », Monsieur Sezer."
+            return
+        yield "Voici ce que j'ai trouvé, Monsieur Sezer :"
+        for hit in hits:
+            if hit["source"] == "semantic":
+                yield f"\n- 📚 **{hit['key']}** ({hit['category']}) : {hit['value']}"
+            else:
+                yield f"\n- 📜 {hit['timestamp'][:16]} — {hit['content'][:120]}"
+    
+    @INTENT_ROUTER.intent("commandes_echouees", pattern=FAILED_COMMANDS_PATTERN, priority=20)
+    async def _intent_failed_commands(self, command: str, match: re.Match) -> AsyncIterator[str]:
+        """Commandes échouées ("montre les commandes échouées") : filtre jsonb en base"""
+        yield "Voici les dernières commandes échouées, Monsieur Sezer :"
+        # Lecture en base dans un thread : le premier fragment est déjà affiché
+        failures = await asyncio.to_thread(
+            self.memory.find_interactions, {"success": False}, "command_executed", 10
+        )
+        if not failures:
+            yield "\n\nAucune dans l'historique récent."
+        for row in failures:
+            yield (f"\n- 💻 {str(row['timestamp'])[:16]} — `{row['content'][:100]}` "
+                   f"(code {(row.get('metadata') or {}).get('return_code', '?')})")
+    
+    @INTENT_ROUTER.intent("heure", keywords=["heure", "heures", "date", "jour"], priority=10, volatile=True)
+    def _intent_time(self, command: str, match: re.Match) -> str:
+        """Heure et date"""
+        info = self.perception.get_time()
+        return f"Nous sommes le **{info['day']} {info['date']}** et il est **{info['time']}**, Monsieur Sezer."
+    
+    @INTENT_ROUTER.intent("localisation", keywords=["où", "localisation", "position"], priority=10,
+                          memoize=INTENT_MEMO_TTL)
+    def _intent_location(self, command: str, match: re.Match) -> str:
+        """Localisation"""
+        loc = self.perception.get_location()
+        return f"Vous êtes à **{loc['full']}**, Monsieur Sezer."
+    
+    @INTENT_ROUTER.intent("systeme", keywords=["système", "systeme", "info", "infos", "ordinateur"], priority=10,
+                          memoize=INTENT_MEMO_TTL)
+    def _intent_system(self, command: str, match: re.Match) -> str:
+        """Informations système"""
+        sys_info = self.perception.get_system_info()
+        return f"**Système** : {sys_info['os']} {sys_info['os_version']}\n**Architecture** : {sys_info['architecture']}\n**Python** : {sys_info['python_version']}"
+    
+    @INTENT_ROUTER.intent("charge_systeme", keywords=["charge", "cpu", "load"], priority=15, volatile=True)
+    def _intent_load(self, command: str, match: re.Match) -> str:
+        """Charge système ("charge système") : dernières mesures de l'échantillonneur"""
+        load = self.perception.get_load()
+        if load is None:
+            if not self.perception.sampler.available:
+                return "Les métriques système ne sont pas disponibles sur cette machine (/proc absent), Monsieur Sezer."
+            return "Les premières mesures sont en cours, Monsieur Sezer. Réessayez dans quelques secondes."
+        cpu = "—" if math.isnan(load["cpu"]) else f"{load['cpu']:.0f} %"
+        text = (f"**Processeur** : {cpu}\n"
+                f"**Mémoire** : {load['memory']:.0f} % ({load['memory_used']:.1f} Go sur {load['memory_total']:.1f} Go)\n"
+                f"**Charge moyenne** : {load['load1']:.2f} · {load['load5']:.2f} · {load['load15']:.2f} (1, 5, 15 min)")
+        if not math.isnan(load["cpu_mean"]):
+            text += f"\n**Sur 5 minutes** : processeur {load['cpu_mean']:.0f} % en moyenne, {load['cpu_max']:.0f} % au plus"
+        return text
+    
+    @INTENT_ROUTER.intent("salutation", keywords=["bonjour", "salut", "hello", "hey"], priority=5)
+    def _intent_greeting(self, command: str, match: re.Match) -> str:
+        """Salutation (cède la place à toute autre intention de la même phrase)"""
+        return self.greet_user()
+    
+    def log_interaction(self, user_input: str, delta_response: str, background: bool = False) -> Optional[Future]:
         """
         Enregistre l'interaction dans la mémoire épisodique
         
         Args:
             user_input: Entrée utilisateur
             delta_response: Réponse de DELTA
+            background: Si True, l'enregistrement (métadonnées, index) se fait dans le
+                        thread d'enregistrement, après le rendu de la réponse
+        
+        Returns:
+            Future du succès de l'enregistrement si background, None sinon
         """
-        self.memory.log_interaction(
-            interaction_type="conversation",
-            content=user_input,
-            metadata={"response": delta_response}
-        )
+        def log() -> bool:
+            return self.memory.log_interaction(
+                interaction_type="conversation",
+                content=user_input,
+                metadata={"response": delta_response}
+            )
+        
+        if background:
+            return get_log_executor().submit(log)
+        log()
+        return None
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # SECTION 9 : INTERFACE UTILISATEUR STREAMLIT
@@ -648,14 +6241,37 @@ def main():
         st.metric("📅 Date", time_info['date'])
         st.metric("🕐 Heure", time_info['time'])
         
+        # Courbes lues dans le tampon de l'échantillonneur (aucune mesure à l'affichage)
+        load = delta.perception.get_load()
+        if load is not None:
+            _, values = delta.perception.sampler.history()
+            col1, col2 = st.columns(2)
+            col1.metric("🧮 CPU", "—" if math.isnan(load["cpu"]) else f"{load['cpu']:.0f} %")
+            col2.metric("🧠 Mémoire", f"{load['memory']:.0f} %")
+            st.line_chart(
+                {"CPU %": values[:, METRICS_FIELDS.index("cpu")],
+                 "Mémoire %": values[:, METRICS_FIELDS.index("memory")]},
+                height=120
+            )
+            st.caption(f"Charge moyenne : {load['load1']:.2f} · {load['load5']:.2f} · {load['load15']:.2f}")
+        
         st.divider()
         
         # Statut connexions
         st.subheader("🔌 Connexions")
-        if delta.db.is_connected():
-            st.success("✅ Supabase")
+        if not delta.db.is_connected():
+            st.error(f"❌ {delta.db.name}")
+        elif delta.db.health_check():
+            st.success(f"✅ {delta.db.name}")
         else:
-            st.error("❌ Supabase")
+            st.warning(f"⚠️ {delta.db.name} injoignable")
+        
+        # Disjoncteur : lectures servies par le cache, écritures mises en attente
+        breaker = delta.db.pool_status().get("breaker", {})
+        if breaker.get("state") == "open":
+            st.error(f"🔴 Disjoncteur ouvert — mode dégradé (nouvel essai dans {breaker['retry_in']:.0f} s)")
+        elif breaker.get("state") == "half_open":
+            st.warning("🟠 Disjoncteur semi-ouvert — appel d'essai en cours")
         
         st.divider()
         
@@ -685,9 +6301,19 @@ def main():
             st.info(delta.greet_user())
             st.session_state.greeted = True
         
-        # Initialisation de l'historique de conversation
-        if "conversation_history" not in st.session_state:
-            st.session_state.conversation_history = []
+        # Initialisation de l'historique de conversation (borné : l'historique complet est en base)
+        if not isinstance(st.session_state.get("conversation_history"), deque):
+            st.session_state.conversation_history = deque(
+                st.session_state.get("conversation_history", []),
+                maxlen=CONVERSATION_HISTORY_MAX_MESSAGES
+            )
+        
+        # Enregistrement de l'échange précédent (fait en arrière-plan après le rendu)
+        last_log = st.session_state.get("last_log")
+        if last_log is not None and last_log.done():
+            if last_log.exception() is not None or not last_log.result():
+                st.warning("⚠️ Le dernier échange n'a pas pu être enregistré dans l'historique")
+            st.session_state.last_log = None
         
         # Affichage de l'historique
         for msg in st.session_state.conversation_history:
@@ -707,21 +6333,26 @@ def main():
                 "role": "user",
                 "content": user_input
             })
+            with st.chat_message("user"):
+                st.write(f"**Monsieur Sezer** : {user_input}")
             
-            # Traiter la commande
-            response = delta.process_command(user_input)
+            # Traiter la commande : la réponse s'affiche au fil des fragments
+            stream = delta.stream_command(user_input)
+            with st.chat_message("assistant"):
+                st.write_stream(itertools.chain(["**DELTA** : "], stream))
+            response = stream.text
             
             # Ajouter la réponse de DELTA
             st.session_state.conversation_history.append({
                 "role": "assistant",
                 "content": response
             })
+            if not isinstance(st.session_state.get("response_timings"), deque):
+                st.session_state.response_timings = deque(maxlen=RESPONSE_TIMINGS_MAX)
+            st.session_state.response_timings.append(stream.timings())
             
-            # Logger l'interaction
-            delta.log_interaction(user_input, response)
-            
-            # Rafraîchir pour afficher
-            st.rerun()
+            # Logger l'interaction, hors du chemin de la réponse
+            st.session_state.last_log = delta.log_interaction(user_input, response, background=True)
         
         # Instructions
         with st.expander("ℹ️ Commandes disponibles"):
@@ -730,6 +6361,7 @@ def main():
             - `quelle heure est-il ?` → Affiche la date et l'heure
             - `où suis-je ?` → Affiche votre localisation
             - `info système` → Affiche les informations système
+            - `charge système` → Processeur, mémoire et charge moyenne
             - `bonjour` → Salutation personnalisée
             """)
     
@@ -740,6 +6372,39 @@ def main():
     elif page == "🧠 Mémoire":
         st.header("🧠 Système de Mémoire Cognitive")
         
+        # Lecture concurrente des trois mémoires (durée = requête la plus lente)
+        filter_category = st.session_state.get("filter_semantic", "Toutes")
+        filter_type = st.session_state.get("filter_episodic", "Tous")
+        snapshot = delta.memory.fetch_all(
+            category=None if filter_category == "Toutes" else filter_category,
+            history_limit=TIMELINE_PAGE_SIZE,
+            interaction_type=None if filter_type == "Tous" else filter_type
+        )
+        for store_name, error in snapshot["errors"].items():
+            st.warning(f"⚠️ Lecture partielle ({store_name}) : {error}")
+        
+        # Recherche plein texte dans les faits et l'historique
+        search_query = st.text_input(
+            "🔎 Rechercher dans les mémoires",
+            placeholder="Ex: genève, email*, réunion projet...",
+            key="memory_search"
+        )
+        if search_query:
+            start = time.perf_counter()
+            hits = delta.memory.search(search_query)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            index_note = "" if delta.memory.search_index.ready() else " · index en construction (recherche simple)"
+            st.caption(f"{len(hits)} résultat(s) en {elapsed_ms:.1f} ms{index_note}")
+            for hit in hits:
+                if hit["source"] == "semantic":
+                    st.markdown(f"📚 **{hit['key']}** ({hit['category']}) : {hit['value']} · _score {hit['score']}_")
+                else:
+                    st.markdown(
+                        f"📜 `{hit['timestamp'][:19]}` **{hit['interaction_type']}** — "
+                        f"{hit['content'][:200]} · _score {hit['score']}_"
+                    )
+            st.divider()
+        
         tab1, tab2, tab3 = st.tabs(["📚 Sémantique", "📜 Épisodique", "🔄 Procédurale"])
         
         # ─────────────────────────────────────────────────────────────────────
@@ -756,7 +6421,7 @@ def main():
                 
                 category = st.selectbox(
                     "Catégorie",
-                    ["Personnel", "Projet", "Contact", "Préférence"],
+                    SEMANTIC_CATEGORIES,
                     help="Type de fait à enregistrer"
                 )
                 
@@ -772,10 +6437,12 @@ def main():
                     help="Contenu du fait"
                 )
                 
+                fact_saved = False
                 if st.button("💾 Enregistrer le Fait", type="primary"):
                     if key and value:
                         success = delta.memory.store_semantic(category, key, value)
                         if success:
+                            fact_saved = True
                             st.success(f"✅ Fait '{key}' enregistré avec succès !")
                             st.balloons()
                         else:
@@ -789,15 +6456,14 @@ def main():
                 # Filtrage par catégorie
                 filter_category = st.selectbox(
                     "Filtrer par catégorie",
-                    ["Toutes", "Personnel", "Projet", "Contact", "Préférence"],
+                    ["Toutes"] + SEMANTIC_CATEGORIES,
                     key="filter_semantic"
                 )
                 
-                # Récupération des faits
-                if filter_category == "Toutes":
-                    facts = delta.memory.get_semantic()
-                else:
-                    facts = delta.memory.get_semantic(filter_category)
+                # Récupération des faits (lus en tête de page, relus après un ajout)
+                facts = snapshot["semantic"]
+                if fact_saved:
+                    facts = delta.memory.get_semantic(None if filter_category == "Toutes" else filter_category)
                 
                 # Affichage
                 if facts:
@@ -821,14 +6487,32 @@ def main():
         with tab2:
             st.subheader("📜 Mémoire Épisodique - Historique des Interactions")
             
-            # Récupération de l'historique
-            history = delta.memory.get_history(limit=50)
+            # Filtrage par type (exécuté par la base)
+            st.selectbox(
+                "Filtrer par type",
+                ["Tous"] + INTERACTION_TYPES,
+                key="filter_episodic"
+            )
+            
+            # Récupération de l'historique : pages successives (plus récentes d'abord)
+            if "timeline_pages" not in st.session_state:
+                st.session_state.timeline_pages = 1
+            
+            history = list(snapshot["history"])
+            cursor = snapshot["history_cursor"]
+            for _ in range(st.session_state.timeline_pages - 1):
+                if cursor is None:
+                    break
+                page_rows, cursor = delta.memory.get_history_page(
+                    TIMELINE_PAGE_SIZE, cursor, None if filter_type == "Tous" else filter_type
+                )
+                history.extend(page_rows)
             
             if history:
-                st.info(f"📊 **{len(history)} interaction(s)** enregistrée(s)")
+                st.info(f"📊 **{len(history)} interaction(s)** affichée(s)")
                 
                 # Affichage sous forme de timeline
-                for entry in reversed(history):  # Ordre chronologique inverse
+                for entry in history:  # Ordre chronologique inverse
                     timestamp = entry.get('timestamp', 'N/A')
                     interaction_type = entry.get('interaction_type', 'N/A')
                     content = entry.get('content', 'N/A')
@@ -839,8 +6523,67 @@ def main():
                         💬 {content}
                         """)
                         st.divider()
+                
+                # Défilement infini : chargement de la page suivante
+                if cursor is not None and st.button("⬇️ Charger plus", key="timeline_more"):
+                    st.session_state.timeline_pages += 1
+                    st.rerun()
+                
+                # Export complet : parcours paginé écrit au fil de l'eau dans un fichier compressé
+                if st.button("📦 Préparer l'export complet", key="timeline_export"):
+                    with st.spinner("Préparation de l'export..."):
+                        export_file = tempfile.NamedTemporaryFile(prefix="delta_episodic_", suffix=".ndjson.gz",
+                                                                  delete=False)
+                        with export_file, gzip.open(export_file, "wt", encoding="utf-8") as f:
+                            for row in delta.memory.iter_history():
+                                f.write(json_dumps(row) + "\n")
+                    try:
+                        with open(export_file.name, "rb") as f:
+                            st.download_button(
+                                "💾 Télécharger l'historique (NDJSON compressé)",
+                                data=f,
+                                file_name=f"delta_episodic_{datetime.now().strftime('%Y%m%d_%H%M%S')}.ndjson.gz",
+                                mime="application/gzip"
+                            )
+                    finally:
+                        os.remove(export_file.name)
+                    st.caption("Pour un très gros historique : `python -m delta_os export DOSSIER`")
             else:
                 st.warning("Aucune interaction enregistrée pour le moment")
+            
+            # Filtre sur les métadonnées (exécuté par la base : jsonb / json_extract)
+            with st.expander("🔎 Filtrer par métadonnées"):
+                metadata_filter = st.text_input(
+                    "Conditions",
+                    placeholder="success=false, return_code!=0",
+                    key="metadata_filter"
+                )
+                if metadata_filter:
+                    try:
+                        matches = delta.memory.find_interactions(
+                            metadata_filter, None if filter_type == "Tous" else filter_type
+                        )
+                    except ValueError as e:
+                        st.error(f"❌ {e}")
+                        matches = []
+                    st.caption(f"{len(matches)} interaction(s) trouvée(s)")
+                    for row in matches:
+                        st.caption(f"⏰ {row.get('timestamp')} — {row.get('content')} · `{json_dumps(row.get('metadata'))}`")
+            
+            # Historique ancien : résumés journaliers et archives compressées
+            with st.expander(f"🗄️ Historique compacté (au-delà de {delta.memory.retention.hot_days} jours)"):
+                summaries = delta.memory.get_summaries(interaction_type=None if filter_type == "Tous" else filter_type)
+                if summaries:
+                    for summary in summaries:
+                        st.markdown(
+                            f"**{summary['day']}** · `{summary['interaction_type']}` · "
+                            f"{summary['interaction_count']} interaction(s)  \n_{summary['sample']}_"
+                        )
+                        if st.button("📂 Restaurer le détail", key=f"archive_{summary['day']}_{summary['interaction_type']}"):
+                            for row in delta.memory.read_archive(summary["day"], summary["interaction_type"]):
+                                st.caption(f"⏰ {row.get('timestamp')} — {row.get('content')}")
+                else:
+                    st.caption("Aucun jour compacté pour le moment")
         
         # ─────────────────────────────────────────────────────────────────────
         # TAB 3 : Mémoire Procédurale
@@ -874,10 +6617,12 @@ def main():
                     help="Dans quel contexte cette action est effectuée"
                 )
                 
+                habit_saved = False
                 if st.button("💾 Enregistrer l'Habitude", type="primary"):
                     if action and context:
                         success = delta.memory.store_habit(action, frequency, context)
                         if success:
+                            habit_saved = True
                             st.success(f"✅ Habitude '{action}' enregistrée !")
                         else:
                             st.error("❌ Erreur lors de l'enregistrement")
@@ -887,8 +6632,8 @@ def main():
             with col2:
                 st.markdown("### 📋 Habitudes Stockées")
                 
-                # Récupération des habitudes
-                habits = delta.memory.get_habits()
+                # Récupération des habitudes (lues en tête de page, relues après un ajout)
+                habits = delta.memory.get_habits() if habit_saved else snapshot["habits"]
                 
                 if habits:
                     st.info(f"📊 **{len(habits)} habitude(s)** enregistrée(s)")
@@ -903,6 +6648,22 @@ def main():
                             st.divider()
                 else:
                     st.warning("Aucune habitude enregistrée pour le moment")
+                
+                # Routines détectées automatiquement dans l'historique
+                miner_stats = delta.memory.habit_miner.stats()
+                if miner_stats["last_run"]:
+                    st.caption(
+                        f"🤖 Dernière analyse : {miner_stats['last_run']} · "
+                        f"{miner_stats['events']} interaction(s) analysée(s) en "
+                        f"{miner_stats['last_duration']:.2f} s"
+                    )
+                if miner_stats["last_error"]:
+                    st.warning(f"⚠️ Dernière erreur d'analyse : {miner_stats['last_error']}")
+                if st.button("🔍 Détecter les routines maintenant"):
+                    with st.spinner("Analyse de l'historique..."):
+                        routines = delta.memory.habit_miner.run_once()
+                    st.success(f"✅ {routines} routine(s) mise(s) à jour")
+                    st.rerun()
     
     # ═══════════════════════════════════════════════════════════════════════════
     # PAGE 3 : COMMUNICATION
@@ -988,11 +6749,13 @@ def main():
                         
                         # Affichage des emails
                         for i, email_data in enumerate(emails, 1):
-                            with st.expander(f"📧 Email {i} : {email_data.get('subject', 'Sans sujet')}"):
+                            unread = "🔵 " if not email_data.get('seen', True) else ""
+                            with st.expander(f"📧 Email {i} : {unread}{email_data.get('subject', 'Sans sujet')}"):
                                 st.markdown(f"""
                                 **De** : {email_data.get('from', 'Inconnu')}  
                                 **Sujet** : {email_data.get('subject', 'Sans sujet')}  
-                                **Date** : {email_data.get('date', 'Date inconnue')}
+                                **Date** : {email_data.get('date', 'Date inconnue')}  
+                                **Taille** : {(email_data.get('size') or 0) / 1024:.1f} Ko
                                 """)
                         
                         # Logger l'action
@@ -1137,24 +6900,105 @@ def main():
         st.subheader("🗄️ Base de Données")
         
         if delta.db.is_connected():
-            st.success("✅ Connexion Supabase active")
+            st.success(f"✅ Connexion {delta.db.name} active")
             
-            # Statistiques
-            semantic_count = len(delta.memory.get_semantic())
-            episodic_count = len(delta.memory.get_history())
-            procedural_count = len(delta.memory.get_habits())
+            # Statistiques (comptages exécutés par la base)
+            stats = delta.memory.get_stats()
             
             col1, col2, col3 = st.columns(3)
             
             with col1:
-                st.metric("📚 Faits Sémantiques", semantic_count)
+                st.metric("📚 Faits Sémantiques", stats["semantic_count"])
+                for category_name, count in stats["by_category"].items():
+                    st.caption(f"{category_name} : {count}")
             with col2:
-                st.metric("📜 Interactions", episodic_count)
+                st.metric("📜 Interactions", stats["episodic_count"])
+                for type_name, count in stats["by_interaction_type"].items():
+                    st.caption(f"`{type_name}` : {count}")
             with col3:
-                st.metric("🔄 Habitudes", procedural_count)
+                st.metric("🔄 Habitudes", stats["procedural_count"])
+            
+            if stats["first_interaction"]:
+                st.caption(f"📅 Historique du {stats['first_interaction']} au {stats['last_interaction']}")
+            
+            # Rétention de l'historique (compactage en arrière-plan)
+            retention = delta.memory.retention.stats()
+            retention_mode = (f"{retention['hot_days']} jours en entier" if retention["enabled"]
+                              else "désactivée (RETENTION_ENABLED)")
+            st.caption(
+                f"🧹 Rétention : {retention_mode} · "
+                f"{stats['compacted_days']} résumé(s) journalier(s) · "
+                f"{retention['compacted_rows']} ligne(s) compactée(s) · "
+                f"Dernière passe : {retention['last_run'] or 'jamais'}"
+            )
+            if retention["last_error"]:
+                st.warning(f"⚠️ Dernière erreur de compactage : {retention['last_error']}")
+            if st.button("🧹 Compacter maintenant", disabled=not retention["enabled"]):
+                with st.spinner("Compactage de l'historique..."):
+                    compacted = delta.memory.retention.run_once()
+                st.success(f"✅ {compacted} interaction(s) compactée(s)")
+            
+            # Mémoire de travail de la session
+            work_stats = delta.memory.working_memory().stats()
+            st.caption(
+                f"🧠 Mémoire de travail : {work_stats['entries']} entrée(s) · "
+                f"{work_stats['bytes'] / 1024:.0f} / {work_stats['max_bytes'] / 1024:.0f} Ko · "
+                f"Évictions : {work_stats['evictions']} · "
+                f"Sur disque : {work_stats['spill_entries']} ({work_stats['spill_bytes'] / 1024:.0f} Ko) · "
+                f"Conversation : {len(st.session_state.get('conversation_history', []))}"
+                f"/{CONVERSATION_HISTORY_MAX_MESSAGES} message(s)"
+            )
+            # Contenus volumineux dédupliqués (réponses répétées)
+            blob_stats = delta.memory.blobs.stats()
+            st.caption(
+                f"🧬 Contenus dédupliqués : {blob_stats['stored']} écrit(s) · "
+                f"{blob_stats['reused']} réutilisé(s) · "
+                f"{blob_stats['bytes_saved'] / 1024:.0f} Ko non renvoyés · "
+                f"{blob_stats['cached']} en cache"
+            )
+            if blob_stats["missing"]:
+                st.warning(f"⚠️ {blob_stats['missing']} contenu(s) référencé(s) introuvable(s) en base")
+            
+            # Tampon d'écriture différée
+            write_stats = delta.db.write_stats()
+            if write_stats:
+                st.caption(
+                    f"⏳ Écritures en attente : {write_stats['pending']} · "
+                    f"Lots envoyés : {write_stats['batches']} ({write_stats['flushed_rows']} lignes) · "
+                    f"Échecs : {write_stats['failed_batches']} · "
+                    f"Lignes écartées : {write_stats['dropped_rows']}"
+                )
+                if write_stats["last_error"]:
+                    st.warning(f"⚠️ Dernière erreur d'écriture : {write_stats['last_error']}")
+            
+            # Pool de connexions partagé
+            pool_status = delta.db.pool_status()
+            if pool_status:
+                st.caption(
+                    f"🔗 Pool partagé : {pool_status['pool_size']} connexion(s) max · "
+                    f"Reconnexions : {pool_status['reconnections']} · "
+                    f"Vérifié il y a {pool_status['seconds_since_check']} s"
+                )
+                breaker = pool_status["breaker"]
+                st.caption(
+                    f"🛡️ Disjoncteur : {breaker['state']} · "
+                    f"Échecs consécutifs : {breaker['failures']} · "
+                    f"Ouvertures : {breaker['opened']} · "
+                    f"Appels refusés : {breaker['rejected']}"
+                )
+            
+            # Cache des lectures
+            cache_stats = delta.db.cache_stats()
+            if cache_stats:
+                st.caption(
+                    f"⚡ Cache lectures : {cache_stats['size']} entrée(s) · "
+                    f"{cache_stats['hits']} hit(s) / {cache_stats['misses']} miss · "
+                    f"taux {cache_stats['hit_rate']:.0%}"
+                )
         else:
-            st.error("❌ Connexion Supabase inactive")
-            st.info("Vérifiez que les clés SUPABASE_URL et SUPABASE_KEY sont configurées dans les secrets Streamlit")
+            st.error(f"❌ Connexion {delta.db.name} inactive")
+            st.info("Vérifiez que les clés SUPABASE_URL et SUPABASE_KEY sont configurées dans les secrets Streamlit, "
+                    "ou choisissez STORAGE_BACKEND = \"sqlite\" pour un stockage local")
         
         st.markdown("---")
         
@@ -1176,6 +7020,21 @@ def main():
             st.info(f"**Version Python** : {sys_info['python_version']}")
             st.info(f"**Processeur** : {sys_info['processor']}")
         
+        st.caption(
+            f"🖥️ Hôte : {sys_info['hostname']} · 💾 {sys_info['disk_free']} · "
+            f"Cache des perceptions : {delta.perception.cache.stats()['hits']} lecture(s) servie(s)"
+        )
+        
+        timings = list(st.session_state.get("response_timings", []))
+        if timings:
+            ttft = [t["ttft"] for t in timings if t["ttft"] is not None]
+            total = [t["total"] for t in timings if t["total"] is not None]
+            st.caption(
+                f"⏱️ Réponses ({len(timings)}) : premier fragment p50 {percentile_ms(ttft, 50):.1f} ms · "
+                f"p95 {percentile_ms(ttft, 95):.1f} ms · réponse complète p50 {percentile_ms(total, 50):.1f} ms · "
+                f"p95 {percentile_ms(total, 95):.1f} ms"
+            )
+        
         st.markdown("---")
         
         # ─────────────────────────────────────────────────────────────────────
@@ -1205,7 +7064,7 @@ def main():
         - Mémoire Cognitive Quadruple
         - Sécurité Multi-Niveaux
         - Modules : Perception, Communication, Système
-        - Base de données : Supabase (PostgreSQL)
+        - Base de données : Supabase (PostgreSQL) ou SQLite local
         - Interface : Streamlit
         
         **Fonctionnalités** :
@@ -1221,9 +7080,536 @@ def main():
         - 🔐 Logs de toutes les actions
         """)
 
+# ═══════════════════════════════════════════════════════════════════════════════
+# SECTION 10 : LIGNE DE COMMANDE (EXPORT / IMPORT DES MÉMOIRES)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def iter_table(db: StorageBackend, table: str, key: str,
+               page_size: int = EXPORT_PAGE_ROWS) -> Iterator[List[Dict]]:
+    """
+    Parcourt une table entière par pages triées sur sa clé unique
+    
+    La page suivante est préchargée dans un thread pendant que la page
+    courante est écrite ; au plus deux pages sont en mémoire.
+    
+    Args:
+        db: Moteur de stockage
+        table: Table parcourue
+        key: Clé unique (id, action, job) servant de curseur
+        page_size: Lignes par requête
+    
+    Yields:
+        Pages de lignes, dans l'ordre de la clé
+    """
+    def fetch(after):
+        query = db.query(table)
+        if after is not None:
+            query.gt(key, after)
+        return query.order(key).limit(page_size).execute(use_cache=False)
+    
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="delta-export") as prefetcher:
+        rows = fetch(None)
+        while rows:
+            upcoming = prefetcher.submit(fetch, rows[-1][key]) if len(rows) == page_size else None
+            yield rows
+            if upcoming is None:
+                return
+            rows = upcoming.result()
+
+
+class TableWriter:
+    """Écriture d'une table par lots : Parquet / Arrow IPC (zstd) ou NDJSON compressé"""
+    
+    def __init__(self, path: str, fmt: str):
+        """
+        Initialisation (le fichier est créé au premier lot : aucun fichier pour une table vide)
+        
+        Args:
+            path: Fichier de destination
+            fmt: parquet, arrow ou ndjson
+        """
+        self.path = path
+        self.fmt = fmt
+        self._schema = None
+        self._writer = None
+    
+    def write(self, rows: List[Dict]) -> None:
+        """Écrit un lot de lignes"""
+        if self.fmt == "ndjson":
+            if self._writer is None:
+                self._writer = gzip.open(self.path, "wt", encoding="utf-8", compresslevel=6)
+            self._writer.write("".join(json_dumps(row) + "\n" for row in rows))
+            return
+        
+        # Colonnes JSON (métadonnées) stockées en texte : schéma stable d'un lot à l'autre
+        rows = [{k: json_dumps(v) if isinstance(v, (dict, list)) else v for k, v in row.items()} for row in rows]
+        if self._schema is None:
+            inferred = pa.Table.from_pylist(rows).schema
+            self._schema = pa.schema([
+                pa.field(f.name, pa.string()) if pa.types.is_null(f.type) else f for f in inferred
+            ])
+            if self.fmt == "parquet":
+                self._writer = pq.ParquetWriter(self.path, self._schema, compression="zstd")
+            else:
+                self._writer = pa.ipc.new_file(
+                    self.path, self._schema, options=pa.ipc.IpcWriteOptions(compression="zstd")
+                )
+        self._writer.write_table(pa.Table.from_pylist(rows, schema=self._schema))
+    
+    def close(self) -> None:
+        """Termine le fichier"""
+        if self._writer is not None:
+            self._writer.close()
+
+
+def read_table_file(path: str, fmt: str, batch_size: int = IMPORT_BATCH_ROWS) -> Iterator[List[Dict]]:
+    """
+    Relit un fichier exporté par lots (colonnes JSON décodées)
+    
+    Args:
+        path: Fichier exporté
+        fmt: parquet, arrow ou ndjson
+        batch_size: Lignes par lot
+    
+    Yields:
+        Lots de lignes
+    """
+    if fmt == "ndjson":
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            batch = []
+            for line in f:
+                batch.append(json_loads(line))
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+        return
+    
+    if fmt == "parquet":
+        batches = pq.ParquetFile(path).iter_batches(batch_size=batch_size)
+    else:
+        reader = pa.ipc.open_file(pa.memory_map(path))
+        batches = (reader.get_batch(i).slice(offset, batch_size)
+                   for i in range(reader.num_record_batches)
+                   for offset in range(0, reader.get_batch(i).num_rows, batch_size))
+    for record_batch in batches:
+        rows = record_batch.to_pylist()
+        for column in JSON_COLUMNS.intersection(record_batch.schema.names):
+            for row in rows:
+                if isinstance(row[column], str):
+                    row[column] = json_loads(row[column])
+        yield rows
+
+
+def export_memory(db: StorageBackend, directory: str, fmt: Optional[str] = None,
+                  tables: Optional[List[str]] = None,
+                  progress: Optional[Callable[[str, int], None]] = None) -> Dict[str, int]:
+    """
+    Exporte les tables des mémoires dans un dossier (un fichier par table et un manifeste)
+    
+    Args:
+        db: Moteur de stockage source
+        directory: Dossier de destination (créé si besoin)
+        fmt: parquet, arrow ou ndjson (parquet si pyarrow est installé, ndjson sinon)
+        tables: Tables exportées (toutes par défaut)
+        progress: Fonction appelée après chaque page (table, lignes écrites)
+    
+    Returns:
+        Dictionnaire table -> lignes exportées
+    """
+    fmt = fmt or ("parquet" if pa is not None else "ndjson")
+    if fmt != "ndjson" and pa is None:
+        raise RuntimeError(f"pyarrow est requis pour le format {fmt}")
+    os.makedirs(directory, exist_ok=True)
+    db.flush()
+    
+    counts = {}
+    for table in tables or list(MEMORY_TABLES):
+        writer = TableWriter(os.path.join(directory, table + EXPORT_FORMATS[fmt]), fmt)
+        pending: List[Dict] = []
+        written = 0
+        try:
+            for page in iter_table(db, table, MEMORY_TABLES[table]):
+                pending.extend(page)
+                if len(pending) >= EXPORT_BATCH_ROWS:
+                    writer.write(pending)
+                    pending = []
+                written += len(page)
+                if progress:
+                    progress(table, written)
+            if pending:
+                writer.write(pending)
+        finally:
+            writer.close()
+        counts[table] = written
+    
+    with open(os.path.join(directory, EXPORT_MANIFEST), "w", encoding="utf-8") as f:
+        json.dump({
+            "format": fmt,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "source": db.name,
+            "tables": counts
+        }, f, indent=2)
+    return counts
+
+
+def import_memory(db: StorageBackend, directory: str, tables: Optional[List[str]] = None,
+                  progress: Optional[Callable[[str, int], None]] = None, replace: bool = False) -> Dict[str, int]:
+    """
+    Importe un export dans le moteur de stockage (upserts groupés sur la clé d'origine)
+    
+    Les ids d'origine sont conservés : ils désigneraient d'autres lignes dans une
+    base déjà remplie, donc les tables de destination doivent être vides, ou
+    vidées avec replace. Seule memory_blobs (adressée par contenu) est fusionnée.
+    Les index de recherche et de rappel sont reconstruits au prochain démarrage.
+    
+    Args:
+        db: Moteur de stockage de destination
+        directory: Dossier produit par export_memory
+        tables: Tables importées (toutes celles du manifeste par défaut)
+        progress: Fonction appelée après chaque lot (table, lignes écrites)
+        replace: Vide les tables de destination avant l'import
+    
+    Returns:
+        Dictionnaire table -> lignes importées
+    
+    Raises:
+        RuntimeError: si une table de destination n'est pas vide (sans replace)
+                      ou si un lot ne peut pas être écrit
+    """
+    with open(os.path.join(directory, EXPORT_MANIFEST), encoding="utf-8") as f:
+        manifest = json.load(f)
+    fmt = manifest["format"]
+    if fmt != "ndjson" and pa is None:
+        raise RuntimeError(f"pyarrow est requis pour le format {fmt}")
+    
+    selected = [t for t in tables or manifest["tables"] if t in MEMORY_TABLES]
+    
+    # Vérification avant toute écriture : un import refusé ne laisse rien à moitié
+    db.flush()
+    occupied = [
+        t for t in selected
+        if t not in INSERT_IGNORE_CONFLICTS
+        and db.query(t).select(MEMORY_TABLES[t]).limit(1).execute(use_cache=False)
+    ]
+    if occupied and not replace:
+        raise RuntimeError(f"tables non vides : {', '.join(occupied)} (--replace pour les remplacer)")
+    for table in occupied:
+        key = MEMORY_TABLES[table]
+        query = db.query(table)
+        query = query.gte(key, 0) if key == "id" else query.like(key, "%")
+        if not query.delete():
+            raise RuntimeError(f"vidage de {table} impossible")
+    
+    counts = {}
+    for table in selected:
+        path = os.path.join(directory, table + EXPORT_FORMATS[fmt])
+        if not os.path.exists(path):
+            counts[table] = 0
+            continue
+        key = MEMORY_TABLES[table]
+        written = 0
+        for rows in read_table_file(path, fmt):
+            if not db.upsert(table, rows, on_conflict=[key]):
+                raise RuntimeError(f"écriture dans {table} impossible après {written} lignes")
+            written += len(rows)
+            if progress:
+                progress(table, written)
+        if key == "id" and not db.sync_identity(table):
+            raise RuntimeError(f"recalage des ids de {table} impossible")
+        counts[table] = written
+    
+    if {"semantic_memory", "episodic_memory"} & set(counts):
+        get_vector_index(db.name, db.location).reset()
+    return counts
+
+
+def merge_duplicates(db: StorageBackend) -> Dict[str, List[Dict]]:
+    """
+    Fusionne les doublons qui empêchent la création des index uniques (migration ponctuelle)
+    
+    Un seul fait par (catégorie, clé) : le plus récent est conservé. Une seule
+    habitude par action : la plus récente est conservée, avec la somme des
+    fréquences du groupe et sa dernière exécution.
+    
+    Args:
+        db: Moteur de stockage
+    
+    Returns:
+        Dictionnaire table -> lignes supprimées
+    
+    Raises:
+        RuntimeError: si une fusion ou une suppression échoue
+    """
+    db.flush()
+    removed: Dict[str, List[Dict]] = {}
+    for table, columns, unique in (("semantic_memory", "id,category,key,value,created_at", ("category", "key")),
+                                   ("procedural_memory", HABIT_COLUMNS, ("action",))):
+        # Première passe sur les clés seules ; les lignes complètes ne sont lues que pour les doublons
+        groups: Dict[Tuple, List[int]] = {}
+        for row in db.iter_rows(table, order_by="id", columns=",".join(("id",) + unique), descending=False):
+            groups.setdefault(tuple(row[column] for column in unique), []).append(row["id"])
+        
+        removed[table] = []
+        for ids in (ids for ids in groups.values() if len(ids) > 1):
+            rows = sorted(db.query(table).select(columns).in_("id", ids).limit(len(ids)).execute(use_cache=False),
+                          key=lambda row: row["id"])
+            kept, extra = rows[-1], rows[:-1]
+            if table == "procedural_memory":
+                merged = dict(kept, frequency=sum(row["frequency"] or 0 for row in rows),
+                              last_executed=max(str(row["last_executed"]) for row in rows))
+                if not db.upsert(table, merged, on_conflict=["id"]):
+                    raise RuntimeError(f"fusion de l'habitude {kept['action']!r} impossible")
+            if not db.query(table).in_("id", [row["id"] for row in extra]).delete():
+                raise RuntimeError(f"suppression des doublons de {table} impossible")
+            removed[table].extend(extra)
+    return removed
+
+
+def bench_intents(sizes: List[int], commands: int = 2000) -> List[Dict[str, float]]:
+    """
+    Micro-benchmark de l'aiguillage : latence par commande selon le nombre d'intentions
+    
+    Chaque routeur contient les intentions de DELTA plus des intentions
+    synthétiques (trois mots-clés chacune) ; les gestionnaires ne sont pas appelés.
+    
+    Args:
+        sizes: Nombres d'intentions synthétiques à mesurer
+        commands: Commandes aiguillées par mesure
+    
+    Returns:
+        Une mesure par taille (intentions, mots-clés, microsecondes par commande)
+    """
+    rng = random.Random(0)
+    syllables = ["ra", "to", "mi", "ne", "lu", "sa", "ko", "pe", "vi", "da", "ge", "bo"]
+    samples = ["quelle heure est-il ?", "où suis-je", "bonjour delta", "donne-moi les informations du système",
+               "cherche réunion genève", "quel est mon email principal ?", "montre les commandes échouées",
+               "raconte une histoire sans mot-clé connu de personne"]
+    results = []
+    for size in sizes:
+        router = IntentRouter()
+        for intent in INTENT_ROUTER._intents:
+            router.register(intent["name"], intent["handler"], intent["keywords"], intent["pattern"],
+                            intent["priority"], intent["memoize"])
+        for n in range(size):
+            words = ["".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))) for _ in range(3)]
+            router.register(f"synthetique_{n}", lambda *_: None, words)
+        router.route("")  # Compilation hors mesure
+        
+        start = time.perf_counter()
+        for i in range(commands):
+            router.route(samples[i % len(samples)])
+        elapsed = time.perf_counter() - start
+        results.append({
+            "intents": len(router.names()),
+            "keywords": len(router._keywords),
+            "us_per_command": elapsed / commands * 1e6
+        })
+    return results
+
+
+def run_batch(delta: "DELTA", lines: Iterator[str], output: Any, log: bool = False) -> Dict[str, Any]:
+    """
+    Traite un flux de commandes sans interface : une réponse NDJSON par commande
+    
+    Args:
+        delta: Instance de DELTA
+        lines: Lignes d'entrée, texte brut ou objet JSON {"command": ..., "id": ...}
+        output: Flux texte recevant les résultats
+        log: Enregistre chaque échange dans la mémoire épisodique (écritures groupées)
+    
+    Returns:
+        Statistiques : commandes, erreurs, durée (s), commandes/s, latences p50/p95/p99 (ms)
+        et temps jusqu'au premier fragment p50/p95 (ms)
+    """
+    latencies: List[float] = []
+    first_fragments: List[float] = []
+    errors = 0
+    start = time.perf_counter()
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        result: Dict[str, Any] = {"line": number}
+        command = line
+        if line.startswith("{"):
+            try:
+                payload = json_loads(line)
+                command = str(payload["command"])
+                if "id" in payload:
+                    result["id"] = payload["id"]
+            except (ValueError, KeyError, TypeError) as e:
+                errors += 1
+                output.write(json_dumps(dict(result, error=f"entrée invalide : {e}")) + "\n")
+                continue
+        
+        result["command"] = command
+        stream = delta.stream_command(command)
+        try:
+            response = "".join(stream)
+        except Exception as e:
+            response = None
+            result["error"] = str(e)
+            errors += 1
+        latency = time.perf_counter() - stream.start
+        latencies.append(latency)
+        if stream.first_fragment is not None:
+            first_fragments.append(stream.first_fragment)
+            result["ttft_ms"] = round(stream.first_fragment * 1000, 3)
+        
+        if response is not None:
+            result["response"] = response
+            if log:
+                delta.log_interaction(command, response)
+        result["latency_ms"] = round(latency * 1000, 3)
+        output.write(json_dumps(result) + "\n")
+    
+    # Les échanges encore dans le tampon comptent dans le débit
+    if log:
+        delta.db.flush()
+    output.flush()
+    elapsed = time.perf_counter() - start
+    return {
+        "commands": len(latencies),
+        "errors": errors,
+        "seconds": elapsed,
+        "commands_per_second": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "p50_ms": percentile_ms(latencies, 50),
+        "p95_ms": percentile_ms(latencies, 95),
+        "p99_ms": percentile_ms(latencies, 99),
+        "max_ms": max(latencies, default=0.0) * 1000,
+        "ttft_p50_ms": percentile_ms(first_fragments, 50),
+        "ttft_p95_ms": percentile_ms(first_fragments, 95)
+    }
+
+
+def cli(argv: List[str]) -> int:
+    """
+    Commandes hors interface : python -m delta_os export|import DOSSIER, batch, dedupe, bench-intents
+    
+    Args:
+        argv: Arguments de la ligne de commande (sans le nom du programme)
+    
+    Returns:
+        Code de sortie (0 si succès)
+    """
+    storage = argparse.ArgumentParser(add_help=False)
+    storage.add_argument("--sqlite", metavar="CHEMIN", help="base SQLite locale (sinon : moteur des secrets)")
+    common = argparse.ArgumentParser(add_help=False, parents=[storage])
+    common.add_argument("--tables", nargs="+", choices=list(MEMORY_TABLES), help="tables concernées (toutes)")
+    
+    parser = argparse.ArgumentParser(prog="python -m delta_os", description="DELTA OS - outils des mémoires")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", parents=[common], help="exporte les mémoires dans un dossier")
+    export_parser.add_argument("directory", help="dossier de destination")
+    export_parser.add_argument("--format", choices=list(EXPORT_FORMATS), help="parquet (défaut), arrow ou ndjson")
+    import_parser = commands.add_parser("import", parents=[common], help="importe un export")
+    import_parser.add_argument("directory", help="dossier produit par export")
+    import_parser.add_argument("--replace", action="store_true",
+                               help="vide les tables de destination (sinon elles doivent être vides)")
+    batch_parser = commands.add_parser("batch", parents=[storage],
+                                       help="traite des commandes sans interface (résultats NDJSON)")
+    batch_parser.add_argument("--input", type=argparse.FileType("r", encoding="utf-8"), default="-",
+                              help='commandes, une par ligne : texte ou JSON {"command": ...} (stdin)')
+    batch_parser.add_argument("--output", type=argparse.FileType("w", encoding="utf-8"), default="-",
+                              help="résultats NDJSON (stdout)")
+    batch_parser.add_argument("--log", action="store_true",
+                              help="enregistre les échanges dans la mémoire épisodique (écritures groupées)")
+    commands.add_parser("dedupe", parents=[storage],
+                        help="fusionne les faits et habitudes en double (lignes supprimées en NDJSON)")
+    bench_parser = commands.add_parser("bench-intents", help="mesure la latence de l'aiguillage des commandes")
+    bench_parser.add_argument("--sizes", nargs="+", type=int, default=[0, 10, 100, 500, 1000],
+                              help="nombres d'intentions synthétiques")
+    args = parser.parse_args(argv)
+    
+    # Messages d'état des modules sur la sortie d'erreur (stdout reste aux résultats)
+    sink = ConsoleSink()
+    set_ui_sink(sink)
+    
+    if args.command == "bench-intents":
+        for result in bench_intents(args.sizes):
+            print(f"{result['intents']:>5} intentions · {result['keywords']:>5} mots-clés : "
+                  f"{result['us_per_command']:.1f} µs / commande")
+        return 0
+    
+    db = SQLiteBackend(args.sqlite) if args.sqlite else create_storage_backend()
+    if not db.is_connected():
+        print("❌ Moteur de stockage indisponible", file=sys.stderr)
+        return 1
+    
+    if args.command == "batch":
+        if args.log and not db.enable_write_behind():
+            print("⚠️ Écritures groupées indisponibles : enregistrement ligne par ligne", file=sys.stderr)
+        delta = DELTA(db)
+        try:
+            stats = run_batch(delta, args.input, args.output, log=args.log)
+        finally:
+            db.flush()
+        print(f"✅ batch : {stats['commands']:,} commandes en {stats['seconds']:.2f} s "
+              f"({stats['commands_per_second']:,.0f} commandes/s), {stats['errors']} erreur(s)", file=sys.stderr)
+        print(f"  latence : p50 {stats['p50_ms']:.2f} ms · p95 {stats['p95_ms']:.2f} ms · "
+              f"p99 {stats['p99_ms']:.2f} ms · max {stats['max_ms']:.2f} ms", file=sys.stderr)
+        print(f"  premier fragment : p50 {stats['ttft_p50_ms']:.2f} ms · p95 {stats['ttft_p95_ms']:.2f} ms",
+              file=sys.stderr)
+        if args.log:
+            writes = db.write_stats()
+            print(f"  mémoire : {writes.get('flushed_rows', 0):,} lignes en {writes.get('batches', 0):,} lots, "
+                  f"{sink.counts['error']} message(s) d'erreur", file=sys.stderr)
+        return 1 if stats["errors"] else 0
+    
+    if args.command == "dedupe":
+        try:
+            removed = merge_duplicates(db)
+        except RuntimeError as e:
+            print(f"❌ dedupe interrompu : {e}", file=sys.stderr)
+            return 1
+        for table, rows in removed.items():
+            for row in rows:
+                print(json_dumps({"table": table, **row}))
+            print(f"  {table} : {len(rows):,} doublon(s) supprimé(s)", file=sys.stderr)
+        blocked = db.create_unique_indexes()
+        if blocked:
+            print(f"❌ index uniques toujours impossibles : {', '.join(blocked)}", file=sys.stderr)
+            return 1
+        if db.name != SQLiteBackend.name:
+            print("✅ dedupe terminé : rejouez schema.sql pour créer les index uniques", file=sys.stderr)
+        else:
+            print("✅ dedupe terminé", file=sys.stderr)
+        return 0
+    
+    start = time.perf_counter()
+    last_report = [0.0]
+    
+    def report(table: str, rows: int) -> None:
+        now = time.perf_counter()
+        if now - last_report[0] >= 0.5:
+            last_report[0] = now
+            print(f"\r  {table} : {rows:,} lignes ({rows / max(now - start, 1e-9):,.0f}/s)   ",
+                  end="", file=sys.stderr, flush=True)
+    
+    try:
+        if args.command == "export":
+            counts = export_memory(db, args.directory, args.format, args.tables, progress=report)
+        else:
+            counts = import_memory(db, args.directory, args.tables, progress=report, replace=args.replace)
+    except (OSError, RuntimeError, ValueError) as e:
+        print(f"\n❌ {args.command} interrompu : {e}", file=sys.stderr)
+        return 1
+    finally:
+        db.flush()
+    
+    elapsed = time.perf_counter() - start
+    print(f"\r✅ {args.command} terminé en {elapsed:.1f} s" + " " * 30, file=sys.stderr)
+    for table, rows in counts.items():
+        print(f"  {table} : {rows:,} lignes", file=sys.stderr)
+    return 0
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # POINT D'ENTRÉE DE L'APPLICATION
 # ═══════════════════════════════════════════════════════════════════════════════
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] in ("export", "import", "batch", "dedupe", "bench-intents"):
+        sys.exit(cli(sys.argv[1:]))
     main()
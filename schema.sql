@@ -0,0 +1,178 @@
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- DELTA OS - Schéma Supabase (PostgreSQL)
+--
+-- À exécuter dans l'éditeur SQL du projet Supabase. Les instructions sont
+-- idempotentes : le script peut être rejoué après chaque mise à jour.
+-- ═══════════════════════════════════════════════════════════════════════════════
+
+-- ───────────────────────────────────────────────────────────────────────────────
+-- Tables des mémoires persistantes
+-- ───────────────────────────────────────────────────────────────────────────────
+
+create table if not exists semantic_memory (
+    id          bigint generated by default as identity primary key,
+    category    text not null,
+    key         text not null,
+    value       text not null,
+    created_at  timestamptz not null default now()
+);
+
+create table if not exists episodic_memory (
+    id                bigint generated by default as identity primary key,
+    interaction_type  text not null,
+    content           text not null,
+    metadata          jsonb not null default '{}'::jsonb,
+    timestamp         timestamptz not null default now()
+);
+
+-- Historique compacté (RetentionEngine) : un résumé et une archive par (jour, type)
+create table if not exists episodic_summary (
+    id                 bigint generated by default as identity primary key,
+    day                date not null,
+    interaction_type   text not null,
+    interaction_count  integer not null,
+    first_timestamp    timestamptz not null,
+    last_timestamp     timestamptz not null,
+    sample             text not null default '',
+    unique (day, interaction_type)
+);
+
+create table if not exists episodic_archive (
+    id                bigint generated by default as identity primary key,
+    day               date not null,
+    interaction_type  text not null,
+    row_count         integer not null,
+    first_id          bigint not null,
+    last_id           bigint not null,
+    payload           text not null,  -- NDJSON compressé (zlib) encodé en base64
+    created_at        timestamptz not null default now(),
+    unique (day, interaction_type)
+);
+
+-- Profils cumulés des actions (HabitMiner) : histogramme heure-de-semaine et intervalles
+create table if not exists habit_profiles (
+    action      text primary key,
+    profile     text not null,
+    updated_at  timestamptz not null default now()
+);
+
+-- Contenus volumineux des métadonnées (BlobStore) : stockés une fois, référencés par empreinte
+-- SHA-256 depuis episodic_memory.metadata->'blobs' (jamais supprimés : les archives y renvoient)
+create table if not exists memory_blobs (
+    digest      text primary key,
+    content     text not null,
+    size        integer not null,
+    created_at  timestamptz not null default now()
+);
+
+create table if not exists memory_watermarks (
+    job         text primary key,
+    value       text not null,
+    updated_at  timestamptz not null default now()
+);
+
+create table if not exists procedural_memory (
+    id             bigint generated by default as identity primary key,
+    action         text not null,
+    frequency      integer not null default 1,
+    context        text,
+    last_executed  timestamptz not null default now()
+);
+
+create index if not exists semantic_memory_category_idx on semantic_memory (category);
+
+-- Un seul fait par (catégorie, clé) : cible de l'upsert de MemorySystem.store_semantic ;
+-- une seule habitude par action : cible de l'upsert des routines détectées.
+-- Aucune ligne n'est supprimée ici : si des doublons existent, l'index n'est pas créé
+-- (avis dans la sortie) tant qu'ils n'ont pas été fusionnés par « python -m delta_os dedupe ».
+do $$
+begin
+    create unique index if not exists semantic_memory_category_key_uniq on semantic_memory (category, key);
+exception when unique_violation then
+    raise notice 'doublons dans semantic_memory : lancer « python -m delta_os dedupe » puis rejouer ce script';
+end;
+$$;
+
+do $$
+begin
+    create unique index if not exists procedural_memory_action_uniq on procedural_memory (action);
+exception when unique_violation then
+    raise notice 'doublons dans procedural_memory : lancer « python -m delta_os dedupe » puis rejouer ce script';
+end;
+$$;
+
+create index if not exists episodic_memory_type_idx on episodic_memory (interaction_type);
+create index if not exists episodic_memory_timestamp_idx on episodic_memory (timestamp);
+
+-- Métadonnées en jsonb (bases créées avec une colonne text) : filtres par clé côté serveur
+do $$
+begin
+    if (select data_type from information_schema.columns
+        where table_name = 'episodic_memory' and column_name = 'metadata') = 'text' then
+        alter table episodic_memory alter column metadata drop default;
+        alter table episodic_memory alter column metadata type jsonb using metadata::jsonb;
+        alter table episodic_memory alter column metadata set default '{}'::jsonb;
+    end if;
+end;
+$$;
+
+-- Égalités (metadata @> '{"success": false}') servies par l'index GIN ; comparaisons
+-- (metadata->'return_code' <> '0') restreintes par l'index sur le type d'interaction
+create index if not exists episodic_memory_metadata_idx on episodic_memory using gin (metadata jsonb_path_ops);
+
+-- ───────────────────────────────────────────────────────────────────────────────
+-- Agrégats (appelés par SupabaseManager.count_by et SupabaseManager.sum_by)
+-- ───────────────────────────────────────────────────────────────────────────────
+
+create or replace function memory_count_by(table_name text, column_name text)
+returns table (value text, count bigint)
+language plpgsql stable
+as $$
+begin
+    if table_name not in ('semantic_memory', 'episodic_memory', 'procedural_memory', 'episodic_summary') then
+        raise exception 'table non autorisée : %', table_name;
+    end if;
+    return query execute format(
+        'select %I::text as value, count(*) as count from %I group by 1 order by 2 desc',
+        column_name, table_name
+    );
+end;
+$$;
+
+create or replace function memory_sum_by(table_name text, column_name text, sum_column text)
+returns table (value text, total bigint)
+language plpgsql stable
+as $$
+begin
+    if table_name not in ('semantic_memory', 'episodic_memory', 'procedural_memory', 'episodic_summary') then
+        raise exception 'table non autorisée : %', table_name;
+    end if;
+    return query execute format(
+        'select %I::text as value, coalesce(sum(%I), 0)::bigint as total from %I group by 1 order by 2 desc',
+        column_name, sum_column, table_name
+    );
+end;
+$$;
+
+-- ───────────────────────────────────────────────────────────────────────────────
+-- Import (appelé par SupabaseManager.sync_identity après l'écriture d'ids explicites)
+-- ───────────────────────────────────────────────────────────────────────────────
+
+create or replace function memory_sync_identity(table_name text)
+returns bigint
+language plpgsql
+as $$
+declare
+    next_id bigint;
+begin
+    if table_name not in ('semantic_memory', 'episodic_memory', 'procedural_memory',
+                          'episodic_summary', 'episodic_archive') then
+        raise exception 'table non autorisée : %', table_name;
+    end if;
+    execute format(
+        'select setval(pg_get_serial_sequence(%L, ''id''), coalesce(max(id), 0) + 1, false) from %I',
+        table_name, table_name
+    ) into next_id;
+    return next_id;
+end;
+$$;